@@ -2,30 +2,28 @@
 사주팔자 만세력 계산기 with OpenAI ChatGPT
 Saju (Four Pillars) Calculator with AI Interpretation
 """
+import importlib.util
 import streamlit as st
 import secrets as secrets_module
 from datetime import datetime
-from typing import Optional
 from saju_calculator import calculate_four_pillars, get_element_count
-from seun import get_year_jiazi
+import lunar_calendar
+from followup_context import MAX_TURNS, FollowupContext
+from interpretation import create_client, get_followup_answer, get_saju_interpretation
 
-# 현재 연도 및 간지 동적 계산 (실행 시점 기준)
-CURRENT_YEAR = datetime.now().year
-CURRENT_YEAR_JIAZI = get_year_jiazi(CURRENT_YEAR)
+# OpenAI (선택적). 임포트에 1초 가까이 걸리므로 설치 여부만 확인하고 첫 AI 호출 때 임포트한다
+OPENAI_AVAILABLE = importlib.util.find_spec('openai') is not None
 
-# OpenAI 임포트 (선택적)
-try:
-    import openai
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
 
-# Korean Lunar Calendar 임포트 (선택적)
-try:
-    from korean_lunar_calendar import KoreanLunarCalendar
-    LUNAR_CALENDAR_AVAILABLE = True
-except ImportError:
-    LUNAR_CALENDAR_AVAILABLE = False
+@st.cache_resource(show_spinner=False)
+def get_openai_client(api_key: str):
+    """
+    프로세스 전체에서 공유하는 OpenAI 클라이언트 (API 키별로 한 번만 생성)
+    
+    세션과 재실행마다 클라이언트와 연결 풀을 새로 만들지 않도록 st.cache_resource로 보관한다.
+    """
+    return create_client(api_key)
+
 
 # 세션 상태 초기화
 if 'authenticated' not in st.session_state:
@@ -88,371 +86,66 @@ def lunar_to_solar(year, month, day, is_leap_month=False):
         dict: 양력 날짜 정보 {'year': int, 'month': int, 'day': int} 또는 None
     """
     try:
-        calendar = KoreanLunarCalendar()
-        # setLunarDate() automatically populates solarYear, solarMonth, and solarDay attributes
-        calendar.setLunarDate(year, month, day, is_leap_month)
+        solar = lunar_calendar.lunar_to_solar(year, month, day, is_leap_month)
         
         return {
-            'year': calendar.solarYear,
-            'month': calendar.solarMonth,
-            'day': calendar.solarDay
+            'year': solar.year,
+            'month': solar.month,
+            'day': solar.day
         }
-    except Exception as e:
+    except ValueError as e:
         st.error(f"음력 변환 중 오류: {e}")
         return None
 
-st.title("🔮 사주팔자 만세력 계산기")
-st.caption("생년월일시를 입력하면 사주팔자를 계산하고 AI가 풀이해드립니다.")
-
-# 사이드바에 로그아웃 버튼 추가
-with st.sidebar:
-    st.markdown("---")
-    if st.button("🚪 로그아웃"):
-        st.session_state.authenticated = False
-        st.rerun()
-
-
-# Required section headings for student output (all 10 must appear)
-STUDENT_REQUIRED_HEADINGS = [
-    "## 1.",
-    "## 2.",
-    "## 3.",
-    "## 4-학생.",
-    "## 5-학생.",
-    "## 6-학생.",
-    "## 7-학생.",
-    "## 8.",
-    "## 9.",
-    "## 10.",
-]
-
-
-def validate_student_headings(text: str) -> list[str]:
+def get_session_chart(birth_datetime: datetime, gender: str, time_unknown: bool, correct_time: bool):
     """
-    Check that all required student section headings are present in the output.
-    Matching is done as a substring search (heading prefix must appear anywhere in the text).
-    Returns a list of missing heading prefixes (empty list means all present).
+    이 세션의 사주 계산 결과
+    
+    위젯 조작이나 추가 질문으로 스크립트가 다시 실행될 때 입력이 같으면
+    session_state에 둔 결과(이미 계산한 십신/신살/대운 등 포함)를 그대로 쓴다.
+    
+    Args:
+        birth_datetime: 양력 생년월일시
+        gender: '남' 또는 '여'
+        time_unknown: 출생 시간 미상 여부
+        correct_time: 출생 시각 보정 여부
+    
+    Returns:
+        SajuResult
     """
-    return [h for h in STUDENT_REQUIRED_HEADINGS if h not in text]
+    key = (birth_datetime, gender, time_unknown, correct_time)
+    cached = st.session_state.get('chart')
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    with st.spinner("사주팔자를 계산하는 중..."):
+        result = calculate_four_pillars(birth_datetime, gender, include_hour=not time_unknown,
+                                        correct_time=correct_time)
+    st.session_state['chart'] = (key, result)
+    return result
 
 
-def get_saju_interpretation(saju_result: dict, gender: str, occupation: str, student_grade: Optional[str] = None, marital_status: str = "기타", children_status: str = "자녀없음") -> str:
-    """
-    사주 용어 기반 공감형 풀이
+def get_followup_context(interpretation: str) -> FollowupContext:
     """
+    이 세션의 추가 질문 맥락 (섹션 요약과 이전 질문/답변 요약을 한 번만 만들어 보관)
     
-    is_student = occupation == "학생" and student_grade is not None
-    time_unknown = saju_result.get('hour_pillar') == '시간미상' or saju_result.get('time_unknown', False)
-
-    # 사주 데이터 공통 블록
-    header_lines = [
-        "## 생년월일시",
-        saju_result['birth_date'],
-        f"성별: {gender}",
-        f"{'학년: ' + student_grade if is_student else '직업: ' + occupation}",
-    ]
-    if not is_student:
-        header_lines.append(f"결혼여부: {marital_status} / 자녀여부: {children_status}")
-    if time_unknown:
-        header_lines.append("(출생시간 정보 없음 — 시주 제외하고 해석)")
-
-    saju_data_block = "\n".join(header_lines) + f"""
-
-## 사주팔자
-연주(年柱): {saju_result['year_pillar']} ({saju_result['year_hanja']})
-월주(月柱): {saju_result['month_pillar']} ({saju_result['month_hanja']})
-일주(日柱): {saju_result['day_pillar']} ({saju_result['day_hanja']}) — 일간(본인)
-시주(時柱): {saju_result['hour_pillar']} ({saju_result['hour_hanja']})
-
-## 오행 분포
-{' '.join([f'{k}: {v}개' for k, v in saju_result.get('elements', {}).items()])}
-
-## 십신(十神)
-연간: {saju_result.get('sipsin', {}).get('year_stem', '-')}
-월간: {saju_result.get('sipsin', {}).get('month_stem', '-')}
-일간: {saju_result.get('sipsin', {}).get('day_stem', '-')} (본인)
-시간: {saju_result.get('sipsin', {}).get('hour_stem', '-')}"""
-
-    # Note: Using English for system instructions is intentional - GPT models often
-    # follow English instructions more reliably even when generating Korean output
-    if is_student:
-        # 학생 전용 프롬프트 (기존 구조 유지)
-        system_prompt = """You are an experienced traditional Saju (사주명리) counselor with deep knowledge of classical Chinese metaphysics. You speak directly to the person as a warm, knowledgeable mentor having a real one-on-one consultation.
-
-CRITICAL OUTPUT RULES (follow strictly — violations are not acceptable):
-1. Write ONLY in flowing paragraph form. Absolutely NO bullet points, NO numbered lists, NO dash-prefixed list items, NO tables, NO star ratings (★☆), NO emoji symbols (✅ ⚠️ ❌) used as list markers.
-2. Do NOT use template sub-labels such as "사주 근거:", "구체적 재능:", "어떤 상황에서 빛나는지:", "강점:", "약점:", "전략:", "특징:", "시험 운:", "결론:" etc.
-3. Address the reader directly in second person — use "당신" or implied second person. Make it feel like real, warm conversation.
-4. Each section must include at least one concrete, vivid life situation example naturally woven into the text (e.g., school life, family dynamics, friendships, exam pressure, sleep habits, emotional ups and downs).
-5. Blend empathy and warmth naturally — acknowledge how the person might feel, not just what the Saju indicates.
-6. Avoid fatalistic or deterministic language. No fear-based predictions. No exaggeration.
-7. Avoid vague motivational phrases: 노력, 긍정, 열심히, 성공, 운이 좋다, 운이 나쁘다, 잘 될 것이다.
-8. Always connect Saju terms to real, observable, everyday life patterns.
-9. Total output MUST be 1000 Korean characters or more (aim for 1200–1800 characters).
-10. Language: Natural, warm Korean. Classical Saju terms are welcome but must always be explained in plain language.
-11. MANDATORY SECTION RULE: You MUST output ALL 10 section headings exactly as given (## 1. through ## 10., including ## 4-학생. ## 5-학생. ## 6-학생. ## 7-학생.). Omitting even ONE section heading is strictly unacceptable and counts as a failed response. Every single heading must appear in the output."""
-
-        user_prompt = f"""다음 사주팔자를 분석하여, 경험 많은 사주 상담사가 직접 상담하듯이 **문단형 풀이**를 작성해주세요.
-반드시 상담받는 분에게 직접 말하는 2인칭 대화체로 작성하세요. 모든 섹션 본문은 자연스러운 문단으로 작성하고, 리스트/번호/불릿/표/별점은 절대 사용하지 마세요.
-
-【절대 규칙】아래 10개 섹션 제목(## 1. ~ ## 10.)은 모두 빠짐없이, 정확히 그대로 출력해야 합니다. 단 하나의 섹션 제목이라도 누락되면 실패한 응답입니다. 특히 "## 7-학생. 앞으로 3년간 시험운/학업운"은 반드시 포함해야 합니다.
-
-{saju_data_block}
-
----
-
-# 풀이 양식
-
-각 섹션은 반드시 문단형으로 작성하세요. 섹션 제목(##)은 유지하되, 본문은 모두 이어진 문단으로 작성합니다.
-각 섹션에는 실제 생활에서 일어날 수 있는 구체적인 상황 예시(학교/가정/친구/시험/수면/감정 기복 등)를 자연스럽게 녹여주세요.
-전체 풀이는 최소 1000자 이상(가능하면 1200~1800자)으로 작성하세요.
-
-## 1. 핵심 성향 요약
-
-이 분의 일간과 주요 오행을 바탕으로, 어떤 유형의 사람인지 한눈에 알 수 있도록 소개해주세요. 겉모습과 속마음의 차이, 그리고 약한 오행이나 부족한 부분을 자연스럽게 서술하되, 따뜻하고 공감적인 문장으로 3문단 내외로 작성해주세요.
-
----
-
-## 2. 기질과 심리 패턴
-
-이 분의 강점과 약점을 사주 구조에 근거해 구체적으로 풀어주세요. 어떤 상황에서 강점이 발휘되고, 어떤 상황에서 스트레스를 받는지 실제 생활 예시와 함께 따뜻하게 서술해주세요. 반복되는 심리 패턴이나 사이클도 자연스럽게 녹여주세요.
-
----
-
-## 3. 인간관계 / 연애 패턴
-
-이 분의 대인관계 스타일과 연애 패턴을 사주 구조로 풀어주세요. 겉모습과 속마음의 차이, 감정 표현 방식, 신뢰와 거리감 패턴, 갈등이 생길 때 어떤 사이클이 반복되는지 구체적인 상황 예시를 포함해 문단으로 자연스럽게 서술해주세요.
-
----
-
-## 4-학생. 문과/이과 성향
-
-이 분의 사주 구조(천간·지지·식상·인성 조합)를 바탕으로 문과와 이과 중 어느 쪽 성향이 더 강한지, 어떤 전공이나 계열이 잘 맞을 것 같은지 자연스럽게 풀어주세요. 적합한 계열과 피해야 할 방향도 생활 예시와 함께 문단으로 서술해주세요.
-
----
-
-## 5-학생. 잘하는 과목 / 취약한 과목
-
-잘할 수 있는 과목과 어려움을 겪을 수 있는 과목을 사주 구조로 풀어주세요. 왜 그런지 사주 근거를 자연스럽게 녹이면서, 시험 준비나 학교 수업 상황을 예시로 들어 문단으로 서술해주세요. 보완 방법이나 학습 팁도 자연스럽게 이어서 써주세요.
-
----
-
-## 6-학생. 공부 방법
-
-이 분에게 가장 잘 맞는 공부 방법(자기주도 학습, 과외, 학원 등)을 사주 구조로 풀어주세요. 어떤 방식이 잘 맞고 어떤 방식이 부담스러울 수 있는지 구체적인 학습 상황 예시와 함께 자연스럽게 문단으로 서술해주세요.
-
----
-
-## 7-학생. 앞으로 3년간 시험운/학업운
-
-앞으로 3년간({CURRENT_YEAR}, {CURRENT_YEAR+1}, {CURRENT_YEAR+2})의 학업운과 시험운을 사주 구조로 풀어주세요. 각 해의 특징, 주의할 점, 전략을 표나 별점 없이 자연스러운 문단으로 서술해주세요.
-
----
-
-## 8. 직업 / 재물 운용 스타일
-
-적합한 직업 스타일과 재물 운용 방식을 사주 구조를 근거로 구체적으로 서술해주세요. 어떤 직무 환경이 맞고 어떤 환경을 피해야 하는지, 돈을 다루는 패턴과 투자 성향은 어떤지 생활 예시와 함께 문단으로 써주세요.
-
----
-
-## 9. 현재 고민 해석
-
-현재 이 분이 겪고 있을 고민의 원인과 반복되는 패턴을 사주 구조로 분석해주세요. 원인, 패턴, 그리고 실천 가능한 전략을 자연스러운 문단으로 서술해주세요.
-
----
-
-## 10. 실천 조언
-
-구체적이고 실천 가능한 조언을 3가지 이상 제안해주세요. 각 조언은 무엇을, 언제, 왜 해야 하는지 사주 근거와 함께 자연스러운 문단으로 작성해주세요.
-
----
-
-**중요:**
-모든 섹션을 문단형으로 작성하세요. 리스트, 표, 번호, 불릿, 별점 사용 금지.
-반복 레이블("사주 근거:", "구체적 재능:", "어떤 상황에서 빛나는지:" 등) 사용 금지.
-2인칭 대화체로, 공감과 위로가 담긴 따뜻한 문체로 작성하세요.
-전체 1000자 이상.
-【재확인】위 ## 1. ~ ## 10. 의 10개 섹션 제목이 모두 출력에 포함되어야 합니다. 특히 ## 7-학생. 앞으로 3년간 시험운/학업운 은 반드시 포함하세요."""
-
-        max_tokens = 4500  # Increased to 4500 to accommodate full output (10 sections for students: 6 general + 4 student-specific)
-
-    else:
-        # 비학생 전용 프롬프트 (5개 섹션, 3000자 이상)
-        system_prompt = """You are an experienced traditional Saju (사주명리) counselor with deep knowledge of classical Chinese metaphysics. You speak directly to the person as a warm, knowledgeable mentor having a real one-on-one consultation.
-
-CRITICAL OUTPUT RULES (follow strictly — violations are not acceptable):
-1. Write ONLY in flowing paragraph form. Absolutely NO bullet points, NO numbered lists, NO dash-prefixed list items, NO tables, NO star ratings (★☆), NO emoji symbols (✅ ⚠️ ❌) used as list markers.
-2. Do NOT use template sub-labels such as "사주 근거:", "구체적 재능:", "어떤 상황에서 빛나는지:", "강점:", "약점:", "전략:", "특징:", "결론:" etc.
-3. Address the reader directly in second person — use "당신" or implied second person. Make it feel like real, warm conversation.
-4. Each section must include at least one concrete, vivid life situation example naturally woven into the text (e.g., work life, family dynamics, relationships, financial decisions, health habits, emotional ups and downs).
-5. Blend empathy and warmth naturally — acknowledge how the person might feel, not just what the Saju indicates.
-6. Avoid fatalistic or deterministic language. No fear-based predictions. No exaggeration.
-7. Avoid vague motivational phrases: 노력, 긍정, 열심히, 성공, 운이 좋다, 운이 나쁘다, 잘 될 것이다.
-8. Always connect Saju terms to real, observable, everyday life patterns.
-9. Total output MUST be 3000 Korean characters or more (aim for 3200–4500 characters).
-10. Language: Natural, warm Korean. Classical Saju terms are welcome but must always be explained in plain language."""
-
-        # Section 5 wording depends on marital/children status
-        unmarried_no_children = (marital_status == "미혼" and children_status == "자녀없음")
-        if unmarried_no_children:
-            section5_prompt = f"""## 5. 올해운세 (재물운 건강운 가족·돌봄 흐름 애정운)
-
-올해({CURRENT_YEAR}년 {CURRENT_YEAR_JIAZI})의 전반적인 운세를 풀어주세요. 재물 쪽, 건강 쪽, 가족·돌봄/관계 확장 쪽(부모님·형제·조카·반려동물·지인 돌봄 등 돌봄 역할과 책임의 균형, 관계 확장), 애정 쪽을 각각 문단으로 자연스럽게 다루되, 번호나 불릿 없이 "재물 쪽은...", "건강 쪽은...", "가족·돌봄 흐름을 보면...", "애정 쪽은..." 같은 자연스러운 문장으로 시작해 문단 흐름을 이어가세요. "자녀운"이라는 표현은 절대 사용하지 마세요. 4문단 내외로 작성해주세요."""
-        else:
-            section5_prompt = f"""## 5. 올해운세 (재물운 건강운 자녀운 애정운)
-
-올해({CURRENT_YEAR}년 {CURRENT_YEAR_JIAZI})의 전반적인 운세를 풀어주세요. 재물 쪽, 건강 쪽, 자녀 쪽, 애정 쪽을 각각 문단으로 자연스럽게 다루되, 번호나 불릿 없이 "재물 쪽은...", "건강 쪽은...", "자녀 쪽은...", "애정 쪽은..." 같은 자연스러운 문장으로 시작해 문단 흐름을 이어가세요. 4문단 내외로 작성해주세요."""
-
-        user_prompt = f"""다음 사주팔자를 분석하여, 경험 많은 사주 상담사가 직접 상담하듯이 **문단형 풀이**를 작성해주세요.
-반드시 상담받는 분에게 직접 말하는 2인칭 대화체로 작성하세요. 모든 섹션 본문은 자연스러운 문단으로 작성하고, 리스트/번호/불릿/표/별점은 절대 사용하지 마세요.
-
-{saju_data_block}
-
----
-
-# 풀이 양식
-
-아래 5개 섹션을 반드시 순서대로 작성하세요. 섹션 제목(##)은 유지하되, 본문은 모두 자연스러운 문단으로 작성합니다.
-각 섹션에는 실제 생활에서 일어날 수 있는 구체적인 상황 예시(직장/가정/대인관계/건강/재물/감정 등)를 자연스럽게 녹여주세요.
-전체 풀이는 반드시 3000자 이상(권장 3200~4500자)으로 작성하세요.
-
-## 1. 핵심 성향 요약
-
-이 분의 일간과 주요 오행을 바탕으로, 어떤 유형의 사람인지 한눈에 알 수 있도록 소개해주세요. 겉모습과 속마음의 차이, 타인이 느끼는 인상과 본인이 느끼는 내면의 차이, 그리고 약한 오행이나 부족한 부분을 자연스럽게 서술하되, 따뜻하고 공감적인 문장으로 4문단 내외로 작성해주세요.
-
----
-
-## 2. 기질과 심리 패턴
-
-이 분의 강점과 약점을 사주 구조에 근거해 구체적으로 풀어주세요. 어떤 상황에서 강점이 발휘되고, 어떤 상황에서 스트레스를 받는지 실제 생활 예시와 함께 따뜻하게 서술해주세요. 반복되는 심리 패턴이나 사이클도 자연스럽게 녹여주세요. 4문단 내외로 작성해주세요.
-
----
-
-## 3. 주요귀인과 살성
-
-이 분의 사주에서 주요 귀인(도움을 주는 사람이나 기운)과 살성(주의해야 할 기운)을 자연스럽게 풀어주세요. 어떤 유형의 사람이나 상황이 도움이 되고, 어떤 유형이 부담이나 갈등을 일으키는지 실제 생활 예시와 함께 서술해주세요. 인간관계와 연애 패턴도 자연스럽게 녹여주세요. 4문단 내외로 작성해주세요.
-
----
-
-## 4. 평생운세 (초년/중년/말년)
-
-이 분의 평생 흐름을 초년기(0~30대 초반), 중년기(30대 중반~50대), 말년기(60대 이후)로 나누어 자연스럽게 서술해주세요. 각 시기의 주요 특징, 도전, 기회를 사주 구조와 대운 흐름으로 풀어주되, 표나 번호 없이 이어지는 문단으로 작성해주세요. 4문단 내외로 작성해주세요.
-
----
-
-{section5_prompt}
-
----
-
-**중요:**
-반드시 위 5개 섹션만 작성하세요. 추가 섹션을 만들지 마세요.
-모든 섹션을 문단형으로 작성하세요. 리스트, 표, 번호, 불릿, 별점 사용 금지.
-반복 레이블("사주 근거:", "구체적 재능:", "어떤 상황에서 빛나는지:" 등) 사용 금지.
-2인칭 대화체로, 공감과 위로가 담긴 따뜻한 문체로 작성하세요.
-전체 반드시 3000자 이상."""
-
-        max_tokens = 6000  # Increased to 6000 to accommodate 3000+ character non-student output
-
-    try:
-        response = openai.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            max_tokens=max_tokens,
-            temperature=0.75
-        )
-        
-        result_text = response.choices[0].message.content
-
-        # Post-processing validation for student output: retry once if any heading is missing.
-        # Maximum 2 attempts total (1 original + 1 retry) to avoid infinite loops.
-        if is_student:
-            missing = validate_student_headings(result_text)
-            if missing:
-                missing_list = ", ".join(missing)
-                retry_user_prompt = f"""이전 응답에서 다음 섹션 제목이 누락되었습니다: {missing_list}
-
-반드시 아래 10개 섹션 제목을 모두 포함하여 풀이 전체를 처음부터 다시 작성해주세요. 단 하나의 섹션 제목도 빠뜨리면 안 됩니다.
-
-필수 포함 섹션 제목: ## 1. ## 2. ## 3. ## 4-학생. ## 5-학생. ## 6-학생. ## 7-학생. ## 8. ## 9. ## 10.
-
-{saju_data_block}
-
----
-
-# 풀이 양식 (10개 섹션 전체 작성)
-
-아래 10개 섹션 제목을 반드시 모두 포함하여 각 섹션을 문단형으로 작성하세요. 특히 ## 7-학생. 앞으로 3년간 시험운/학업운 은 반드시 포함하세요.
-
-## 1. ## 2. ## 3. ## 4-학생. ## 5-학생. ## 6-학생. ## 7-학생. ## 8. ## 9. ## 10.
-
-리스트, 표, 번호, 불릿, 별점 사용 금지. 2인칭 대화체로, 전체 1000자 이상으로 작성하세요."""
-                retry_response = openai.chat.completions.create(
-                    model="gpt-4o",
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": retry_user_prompt}
-                    ],
-                    max_tokens=max_tokens,
-                    temperature=0.6  # Lower temperature on retry for more deterministic compliance
-                )
-                result_text = retry_response.choices[0].message.content
-                # Note: single retry only; if headings still missing, return best-effort result
-
-        return result_text
-        
-    except Exception as e:
-        return f"풀이 생성 중 오류가 발생했습니다: {str(e)}"
-
-
-def get_followup_answer(question: str, previous_interpretation: str, saju_info: str) -> str:
-    """
-    구조 패턴 분석 기반 추가 질문 답변
+    풀이가 바뀌면 새로 만들고, 그때까지의 대화 기록을 요약해 넣는다.
     """
-    
-    system_prompt = """You are an experienced traditional Saju (사주명리) counselor. You speak warmly and directly to the person as a trusted mentor.
-
-CRITICAL OUTPUT RULES:
-1. Write ONLY in flowing paragraph form. No bullet points, no numbered lists, no tables, no star ratings, no template sub-labels.
-2. Address the reader directly in second person. Make it feel like a real, warm conversation.
-3. Include concrete, vivid life situation examples naturally woven into your answer.
-4. Avoid fatalistic or deterministic language. No fear-based predictions.
-5. Avoid vague phrases: 노력, 긍정, 열심히, 성공, 운이 좋다, 운이 나쁘다, 잘 될 것이다.
-6. Connect all Saju terms to real, observable everyday patterns.
-7. Language: Natural, warm Korean."""
-    
-    user_prompt = f"""## 이전 풀이
-{previous_interpretation}
-
-## 사주 정보
-{saju_info}
-
-## 추가 질문
-{question}
-
----
+    context = st.session_state.get('followup_context')
+    if context is None or context.interpretation != interpretation:
+        context = FollowupContext(interpretation, st.session_state.get('conversation_history', []))
+        st.session_state['followup_context'] = context
+    return context
 
-위 추가 질문에 대해, 경험 많은 사주 상담사가 직접 상담하듯이 따뜻하고 공감적인 문단형으로 답변해주세요.
 
-구체적인 생활 상황 예시를 자연스럽게 녹이면서, 사주 구조를 근거로 설명해주세요. 리스트, 번호, 불릿, 표, 별점은 절대 사용하지 마세요. 2인칭 대화체로, 실천 가능한 조언도 포함해 200자 이상의 문단으로 답변해주세요."""
+st.title("🔮 사주팔자 만세력 계산기")
+st.caption("생년월일시를 입력하면 사주팔자를 계산하고 AI가 풀이해드립니다.")
 
-    try:
-        response = openai.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            max_tokens=2000,  # Followup answers are shorter, 2000 is sufficient
-            temperature=0.8
-        )
-        
-        return response.choices[0].message.content
-        
-    except Exception as e:
-        return f"추가 질문 처리 중 오류가 발생했습니다: {str(e)}"
+# 사이드바에 로그아웃 버튼 추가
+with st.sidebar:
+    st.markdown("---")
+    if st.button("🚪 로그아웃"):
+        st.session_state.authenticated = False
+        st.rerun()
 
 
 # 메인 UI
@@ -479,10 +172,6 @@ with col1:
     # 음력 선택 시에만 윤달 옵션 표시 (생년월일 입력 아래)
     is_leap_month = False
     if calendar_type == "음력":
-        if not LUNAR_CALENDAR_AVAILABLE:
-            st.error("⚠️ 음력 변환 기능을 사용하려면 `korean-lunar-calendar` 라이브러리가 필요합니다.")
-            st.stop()
-        
         is_leap_month = st.checkbox(
             "윤달 (閏月)",
             value=False,
@@ -524,6 +213,17 @@ with col1:
                 help="0분~59분 사이 선택"
             )
     
+    # 출생 당시 법정 시각 보정 (1954~1961년 UTC+8:30, 서머타임 시기)
+    correct_time = False
+    if not time_unknown:
+        correct_time = st.checkbox(
+            "🕐 당시 표준시·서머타임 보정",
+            value=False,
+            help="1954~1961년(UTC+8:30)과 서머타임 시기(1948~1960, 1987~1988)에 태어난 경우 "
+                 "출생증명서 시각을 현재 표준시 기준으로 보정합니다. "
+                 "켜면 기준 만세력(천을귀인 만세력)과 결과가 달라질 수 있습니다."
+        )
+    
     gender = st.radio(
         "성별",
         options=['남', '여'],
@@ -599,6 +299,7 @@ with col1:
         st.session_state['is_student'] = (occupation_type == "학생")
         st.session_state['grade_level'] = grade_level if occupation_type == "학생" else ""
         st.session_state['time_unknown'] = time_unknown
+        st.session_state['correct_time'] = correct_time
         st.session_state['marital_status'] = marital_status if occupation_type != "학생" else "기타"
         st.session_state['children_status'] = children_status if occupation_type != "학생" else "자녀없음"
         # 대화 히스토리 초기화 (첫 계산 시에만)
@@ -624,12 +325,18 @@ if st.session_state.get('saju_calculated', False):
     birth_datetime = st.session_state['birth_datetime']
     gender = st.session_state.get('gender', '남')
     time_unknown = st.session_state.get('time_unknown', False)
+    correct_time = st.session_state.get('correct_time', False)
     
-    with st.spinner("사주팔자를 계산하는 중..."):
-        result = calculate_four_pillars(birth_datetime, gender, include_hour=not time_unknown)
+    result = get_session_chart(birth_datetime, gender, time_unknown, correct_time)
     
     st.success(f"✅ {result['birth_date']} 출생자의 사주팔자")
     
+    # 출생 시각 보정 안내
+    correction = result.get('time_correction')
+    if correction and correction['applied']:
+        st.info(f"🕐 {', '.join(correction['applied'])} 보정: {correction['original']} → "
+                f"{correction['corrected']} ({correction['minutes']:+d}분)")
+    
     # 시간 미상 경고 메시지
     if result.get('time_unknown', False):
         st.warning("⚠️ 출생 시간을 모르시는 경우입니다. 년주, 월주, 일주만으로 풀이했습니다.")
@@ -748,27 +455,22 @@ if st.session_state.get('saju_calculated', False):
         hch = result['hyungchunghap']
         col1, col2 = st.columns(2)
         
-        with col1:
-            if hch['chung']:
-                st.error(f"**충(沖)**: {', '.join(hch['chung'])}")
-            else:
-                st.info("**충(沖)**: 없음")
-            
-            if hch['hyung']:
-                st.warning(f"**형(刑)**: {', '.join(hch['hyung'])}")
-            else:
-                st.info("**형(刑)**: 없음")
-        
-        with col2:
-            if hch['yukhap']:
-                st.success(f"**육합(六合)**: {', '.join(hch['yukhap'])}")
-            else:
-                st.info("**육합(六合)**: 없음")
-            
-            if hch['samhap']:
-                st.success(f"**삼합(三合)**: {', '.join(hch['samhap'])}")
-            else:
-                st.info("**삼합(三合)**: 없음")
+        # 왼쪽은 충돌/손상 관계, 오른쪽은 합 관계 (충/형/육합/삼합은 없으면 '없음' 표시)
+        columns = [
+            (col1, [('chung', '충(沖)', st.error), ('hyung', '형(刑)', st.warning),
+                    ('pa', '파(破)', st.warning), ('hae', '해(害)', st.warning),
+                    ('stem_chung', '천간충(天干沖)', st.error)]),
+            (col2, [('yukhap', '육합(六合)', st.success), ('samhap', '삼합(三合)', st.success),
+                    ('banhap', '반합(半合)', st.success), ('banghap', '방합(方合)', st.success),
+                    ('stem_hap', '천간합(天干合)', st.success)]),
+        ]
+        for col, kinds in columns:
+            with col:
+                for kind, label, show in kinds:
+                    if hch.get(kind):
+                        show(f"**{label}**: {', '.join(hch[kind])}")
+                    elif kind in ('chung', 'hyung', 'yukhap', 'samhap'):
+                        st.info(f"**{label}**: 없음")
     
     # 납음오행
     if 'napeum' in result:
@@ -846,11 +548,13 @@ if st.session_state.get('saju_calculated', False):
             "로컬 실행 시 `.streamlit/secrets.toml` 파일을 생성하여 설정하세요."
         )
     else:
+        parallel_sections = st.checkbox(
+            "⚡ 섹션별 동시 생성 (더 빠름)",
+            value=False,
+            help="풀이의 각 섹션을 동시에 요청해 순서대로 이어 붙입니다. 전체 대기 시간이 가장 느린 섹션 수준으로 줄어듭니다."
+        )
         if st.button("🔮 AI 사주풀이 보기", type="primary", use_container_width=True):
-            with st.spinner("AI가 사주를 풀이하는 중... (약 10-20초 소요)"):
-                # OpenAI 클라이언트 초기화
-                openai.api_key = st.secrets["OPENAI_API_KEY"]
-                
+            with st.spinner("AI가 사주를 풀이하는 중..."):
                 # 사주 풀이를 위한 정보 가져오기
                 gender = st.session_state.get('gender', '남')
                 occupation = st.session_state.get('occupation', '일반')
@@ -858,7 +562,15 @@ if st.session_state.get('saju_calculated', False):
                 marital_status = st.session_state.get('marital_status', '기타')
                 children_status = st.session_state.get('children_status', '자녀없음')
                 
-                interpretation = get_saju_interpretation(result, gender, occupation, student_grade, marital_status, children_status)
+                # 생성되는 풀이를 도착하는 대로 표시 (완료 후에는 아래 결과 영역에 표시)
+                stream_area = st.empty()
+                interpretation = get_saju_interpretation(
+                    result, gender, occupation, student_grade, marital_status, children_status,
+                    client=get_openai_client(st.secrets["OPENAI_API_KEY"]),
+                    on_text=lambda text: stream_area.markdown(text + " ▌"),
+                    parallel=parallel_sections
+                )
+                stream_area.empty()
                 
                 st.session_state['interpretation'] = interpretation
                 st.session_state['saju_result'] = result
@@ -918,9 +630,6 @@ AI 사주 풀이
             if st.button("📤 질문하기", use_container_width=True):
                 if user_question.strip():
                     with st.spinner("답변을 생성하는 중..."):
-                        # OpenAI API 키 설정
-                        openai.api_key = st.secrets["OPENAI_API_KEY"]
-                        
                         # 사주 정보 문자열 생성
                         saju_result = st.session_state['saju_result']
                         element_count = get_element_count(saju_result)
@@ -939,18 +648,24 @@ AI 사주 풀이
                         # 이전 풀이 가져오기
                         previous_interpretation = st.session_state.get('interpretation', '')
                         
-                        # 답변 생성
+                        # 답변 생성 (도착하는 대로 표시)
+                        stream_area = st.empty()
                         answer = get_followup_answer(
                             user_question,
                             previous_interpretation,
-                            saju_info
+                            saju_info,
+                            client=get_openai_client(st.secrets["OPENAI_API_KEY"]),
+                            on_text=lambda text: stream_area.markdown(f"**Q: {user_question}**\n\n{text} ▌"),
+                            context=get_followup_context(previous_interpretation)
                         )
                         
-                        # 대화 히스토리에 추가
-                        st.session_state['conversation_history'].append({
+                        # 대화 히스토리에 추가 (맥락과 같이 최근 MAX_TURNS개만 보관)
+                        history = st.session_state['conversation_history']
+                        history.append({
                             'question': user_question,
                             'answer': answer
                         })
+                        del history[:-MAX_TURNS]
                         
                         # 답변 표시를 위해 rerun
                         st.rerun()
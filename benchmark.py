@@ -0,0 +1,374 @@
+"""
+계산 모듈 벤치마크
+Benchmark Suite for the Calculation Core and Analysis Modules
+
+calculate_four_pillars(추가 분석 모듈 포함/제외), 신살/형충회합/십신/12운성 함수,
+대운/세운 생성, 음력 변환, 일괄 계산의 성능을 같은 입력(고정 시드)으로 측정한다.
+
+측정 항목:
+    ops/sec     초당 호출 수
+    p50/p99     호출당 지연 시간 (마이크로초, 빠른 함수는 반복 묶음의 평균을 표본으로 사용)
+    alloc       호출당 최대 메모리 할당량 (tracemalloc peak, 바이트)
+
+저장된 기준값(bench_baseline.json)과 비교해 ops/sec가 허용 범위 이상 떨어지거나
+할당량이 늘어난 항목이 있으면 REGRESSION으로 표시하고 종료 코드 1을 돌려준다.
+
+같은 코드를 다시 재도 한 번 측정의 ops/sec는 다른 프로세스와 CPU 클럭 때문에 15~25%씩 흔들린다.
+그래서 항목마다 여러 번(--repeat) 재서 가장 빠른 회차의 ops/sec를 쓴다. 잡음은 느려지는 쪽으로만 생기기 때문이다.
+--quick은 회차가 짧아 더 흔들리므로 허용 범위를 넓힌다.
+
+    python benchmark.py                    # 측정 후 기준값과 비교
+    python benchmark.py --save-baseline    # 현재 결과를 기준값으로 저장
+    python benchmark.py -k sinsal --quick  # 이름에 sinsal이 들어간 항목만 짧게
+"""
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+import daeun
+import hyungchunghap
+import lunar_calendar
+import saju_calculator
+import seun
+import sinsal
+import sipsin
+import unsung_12
+from saju_batch import calculate_four_pillars_batch
+from saju_calculator import EARTHLY_BRANCHES_HANJA, HEAVENLY_STEMS_HANJA, ChartRecord
+
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_baseline.json')
+
+# 입력 표본 수와 일괄 계산 크기 ([batch] 항목은 호출 한 번에 BATCH_SIZE건)
+SAMPLE_SIZE = 512
+BATCH_SIZE = 10000
+SEED = 84
+
+# 항목당 측정 회차 (가장 빠른 회차의 ops/sec 사용)
+DEFAULT_REPEAT = 5
+
+# 기준값 대비 허용 범위
+DEFAULT_SPEED_TOLERANCE = 0.30   # ops/sec가 30% 넘게 떨어지면 회귀
+QUICK_SPEED_TOLERANCE = 0.50     # --quick (회차당 0.1초)일 때
+DEFAULT_ALLOC_TOLERANCE = 0.20   # 할당량이 20% (그리고 256바이트) 넘게 늘면 회귀
+ALLOC_SLACK_BYTES = 256
+
+
+class Benchmark(NamedTuple):
+    """벤치마크 항목 하나 (args를 순환하며 func(*args) 호출)"""
+    name: str
+    func: Callable
+    args: List[tuple]
+    context: Callable = nullcontext   # 측정 중 적용할 설정 (예: 추가 모듈 끄기)
+
+
+class BenchResult(NamedTuple):
+    name: str
+    ops_per_sec: float
+    p50_us: float
+    p99_us: float
+    alloc_bytes: int
+    calls: int
+
+    def to_dict(self) -> Dict:
+        return {'ops_per_sec': round(self.ops_per_sec, 1), 'p50_us': round(self.p50_us, 3),
+                'p99_us': round(self.p99_us, 3), 'alloc_bytes': self.alloc_bytes}
+
+
+@contextmanager
+def basic_mode():
+    """추가 분석 모듈(십신, 신살, 대운 등) 없이 네 기둥만 계산하도록 전환"""
+    enabled = saju_calculator.ENHANCED_MODULES_AVAILABLE
+    saju_calculator.ENHANCED_MODULES_AVAILABLE = False
+    try:
+        yield
+    finally:
+        saju_calculator.ENHANCED_MODULES_AVAILABLE = enabled
+
+
+def sample_births(size: int = SAMPLE_SIZE, seed: int = SEED) -> List[datetime]:
+    """고정 시드의 1900~2100년 출생 시각 표본"""
+    rng = random.Random(seed)
+    start = datetime(1900, 1, 1)
+    span = (datetime(2100, 12, 31) - start).days * 1440
+    return [start + timedelta(minutes=rng.randrange(span)) for _ in range(size)]
+
+
+def build_benchmarks() -> List[Benchmark]:
+    """측정 항목 목록 (모든 항목이 같은 표본에서 입력을 만든다)"""
+    births = sample_births()
+    genders = ['남' if i % 2 else '여' for i in range(len(births))]
+    records = [saju_calculator.calculate_chart_record(b, g) for b, g in zip(births, genders)]
+
+    def chars(record: ChartRecord, position: str):
+        index = getattr(record, position)
+        return HEAVENLY_STEMS_HANJA[index % 10], EARTHLY_BRANCHES_HANJA[index % 12]
+
+    pillars = [{p: chars(r, p) for p in ChartRecord.POSITIONS} for r in records]
+    branches = [[pillar[p][1] for p in ChartRecord.POSITIONS] for pillar in pillars]
+    stems = [[pillar[p][0] for p in ChartRecord.POSITIONS] for pillar in pillars]
+    day_stems = [pillar['day'][0] for pillar in pillars]
+    year_stems = [pillar['year'][0] for pillar in pillars]
+    full = [saju_calculator.calculate_four_pillars(b, g, use_cache=False) for b, g in zip(births, genders)]
+    lunar_births = [b.date() for b in births if b.date() < lunar_calendar.LAST_SOLAR_DATE]
+    lunar_dates = [lunar_calendar.solar_to_lunar(d) for d in lunar_births]
+
+    def chart_basic(birth, gender):
+        return saju_calculator.calculate_four_pillars(birth, gender, use_cache=False).compute_all()
+
+    def chart_cached(birth, gender):
+        return saju_calculator.calculate_four_pillars(birth, gender, as_of=datetime(2026, 1, 1))
+
+    chart_args = list(zip(births, genders))
+    cached_args = chart_args[:64]
+    for args in cached_args:
+        chart_cached(*args)
+
+    # 일괄 계산 입력 (datetime64 배열, 음력은 변환 지원 범위 안의 날짜만)
+    batch_births = np.array(sample_births(BATCH_SIZE, SEED + 1), dtype='datetime64[m]')
+    batch_lunar = lunar_calendar.solar_to_lunar_batch(
+        batch_births[batch_births < np.datetime64(lunar_calendar.LAST_SOLAR_DATE)])
+
+    return [
+        Benchmark('saju.calculate_four_pillars[basic]', chart_basic, chart_args, basic_mode),
+        Benchmark('saju.calculate_four_pillars[enhanced]', chart_basic, chart_args),
+        Benchmark('saju.calculate_four_pillars[cached]', chart_cached, cached_args),
+        Benchmark('saju.calculate_chart_record', saju_calculator.calculate_chart_record, chart_args),
+        Benchmark('saju.calculate_four_pillars_batch[batch]', calculate_four_pillars_batch, [(batch_births,)]),
+        Benchmark('sipsin.get_sipsin', sipsin.get_sipsin,
+                  [(d, s[0]) for d, s in zip(day_stems, stems)]),
+        Benchmark('sipsin.get_branch_sipsin', sipsin.get_branch_sipsin,
+                  [(d, b[1]) for d, b in zip(day_stems, branches)]),
+        Benchmark('unsung_12.get_twelve_unsung', unsung_12.get_twelve_unsung,
+                  [(d, b[2]) for d, b in zip(day_stems, branches)]),
+        Benchmark('sinsal.get_cheonul_gwiin', sinsal.get_cheonul_gwiin,
+                  [(s[0], s[1], s[2], b) for s, b in zip(stems, branches)]),
+        Benchmark('sinsal.get_yeokma', sinsal.get_yeokma, [(b,) for b in branches]),
+        Benchmark('sinsal.get_dohwa', sinsal.get_dohwa, [(b,) for b in branches]),
+        Benchmark('sinsal.get_gongmang', sinsal.get_gongmang,
+                  [(s[2] + b[2], b) for s, b in zip(stems, branches)]),
+        Benchmark('sinsal.get_wonjin', sinsal.get_wonjin, [(b,) for b in branches]),
+        Benchmark('sinsal.get_yangin', sinsal.get_yangin, [(d, b) for d, b in zip(day_stems, branches)]),
+        Benchmark('hyungchunghap.get_chung', hyungchunghap.get_chung, [(b,) for b in branches]),
+        Benchmark('hyungchunghap.get_yukhap', hyungchunghap.get_yukhap, [(b,) for b in branches]),
+        Benchmark('hyungchunghap.get_samhap', hyungchunghap.get_samhap, [(b,) for b in branches]),
+        Benchmark('hyungchunghap.get_banghap', hyungchunghap.get_banghap, [(b,) for b in branches]),
+        Benchmark('hyungchunghap.get_hyung', hyungchunghap.get_hyung, [(b,) for b in branches]),
+        Benchmark('hyungchunghap.find_relations', hyungchunghap.find_relations,
+                  list(zip(stems, branches))),
+        Benchmark('daeun.calculate_daeun_start_age', daeun.calculate_daeun_start_age,
+                  [(b, g, y, r.month_index + 1) for b, g, y, r in zip(births, genders, year_stems, records)]),
+        Benchmark('daeun.generate_daeun', daeun.generate_daeun,
+                  [(f['year_stem'], f['month_stem'], f['year_branch'], f['month_branch'], g,
+                    f['daeun']['start_age'], f['day_stem'], 10) for f, g in zip(full, genders)]),
+        Benchmark('seun.generate_seun', seun.generate_seun, [(b.year, 2026, 5, 10) for b in births]),
+        Benchmark('lunar.solar_to_lunar', lunar_calendar.solar_to_lunar, [(d,) for d in lunar_births]),
+        Benchmark('lunar.lunar_to_solar', lunar_calendar.lunar_to_solar, lunar_dates),
+        Benchmark('lunar.lunar_to_solar_batch[batch]', lunar_calendar.lunar_to_solar_batch,
+                  [(batch_lunar['year'], batch_lunar['month'], batch_lunar['day'], batch_lunar['is_leap'])]),
+    ]
+
+
+def _run_calls(func: Callable, args: List[tuple], start: int, count: int) -> float:
+    """args를 start부터 순환하며 count번 호출, 걸린 시간(초)"""
+    size = len(args)
+    clock = time.perf_counter
+    began = clock()
+    for i in range(start, start + count):
+        func(*args[i % size])
+    return clock() - began
+
+
+def measure(bench: Benchmark, min_time: float = 0.5, max_samples: int = 2000,
+            sample_target: float = 200e-6, alloc_calls: int = 50, repeat: int = DEFAULT_REPEAT) -> BenchResult:
+    """
+    항목 하나 측정
+
+    Args:
+        bench: 측정 항목
+        min_time: 회차당 최소 측정 시간 (초)
+        max_samples: 회차당 최대 표본 수
+        sample_target: 표본 하나(반복 묶음)의 목표 시간 (초, 타이머 오차 대비)
+        alloc_calls: 할당량 측정 호출 수
+        repeat: 측정 회차 수 (ops/sec는 가장 빠른 회차, p50/p99는 모든 회차의 표본으로 계산)
+    """
+    with bench.context():
+        # 예열 후 묶음 크기 결정
+        _run_calls(bench.func, bench.args, 0, min(len(bench.args), 32))
+        inner = 1
+        while inner < (1 << 16) and _run_calls(bench.func, bench.args, 0, inner) < sample_target:
+            inner *= 2
+
+        gc.collect()
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            samples = []
+            calls = 0
+            best_ops = 0.0
+            for _ in range(max(1, repeat)):
+                round_calls = 0
+                round_samples = 0
+                total = 0.0
+                while total < min_time and round_samples < max_samples:
+                    elapsed = _run_calls(bench.func, bench.args, calls, inner)
+                    samples.append(elapsed / inner)
+                    calls += inner
+                    round_calls += inner
+                    round_samples += 1
+                    total += elapsed
+                if total:
+                    best_ops = max(best_ops, round_calls / total)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+        # 호출당 최대 할당량 (tracemalloc peak의 중앙값)
+        peaks = []
+        tracemalloc.start()
+        try:
+            for i in range(min(alloc_calls, max(len(samples), 1))):
+                args = bench.args[i % len(bench.args)]
+                tracemalloc.reset_peak()
+                base = tracemalloc.get_traced_memory()[0]
+                bench.func(*args)
+                peaks.append(tracemalloc.get_traced_memory()[1] - base)
+        finally:
+            tracemalloc.stop()
+
+    samples.sort()
+    peaks.sort()
+    return BenchResult(
+        name=bench.name,
+        ops_per_sec=best_ops,
+        p50_us=samples[len(samples) // 2] * 1e6,
+        p99_us=samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1e6,
+        alloc_bytes=peaks[len(peaks) // 2] if peaks else 0,
+        calls=calls,
+    )
+
+
+def load_baseline(path: str = DEFAULT_BASELINE_PATH) -> Optional[Dict]:
+    """저장된 기준값 (없으면 None)"""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(results: List[BenchResult], path: str = DEFAULT_BASELINE_PATH):
+    """측정 결과를 기준값으로 저장 (기존 항목 중 이번에 측정하지 않은 것은 유지)"""
+    baseline = load_baseline(path) or {}
+    entries = baseline.get('results', {})
+    entries.update({r.name: r.to_dict() for r in results})
+    baseline = {'environment': environment(), 'results': dict(sorted(entries.items()))}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=2)
+        f.write('\n')
+
+
+def environment() -> Dict[str, str]:
+    """측정 환경 (기준값과 다른 환경이면 경고용)"""
+    return {'python': platform.python_version(), 'machine': platform.machine(),
+            'system': platform.system(), 'processor': platform.processor() or ''}
+
+
+def compare(result: BenchResult, baseline: Optional[Dict],
+            speed_tolerance: float = DEFAULT_SPEED_TOLERANCE,
+            alloc_tolerance: float = DEFAULT_ALLOC_TOLERANCE) -> List[str]:
+    """
+    기준값 대비 회귀 사유 목록 (없으면 빈 리스트)
+    """
+    if baseline is None:
+        return []
+    problems = []
+    if result.ops_per_sec < baseline['ops_per_sec'] * (1 - speed_tolerance):
+        problems.append(f"ops/sec {baseline['ops_per_sec']:,.0f} → {result.ops_per_sec:,.0f}")
+    alloc_limit = baseline['alloc_bytes'] * (1 + alloc_tolerance) + ALLOC_SLACK_BYTES
+    if result.alloc_bytes > alloc_limit:
+        problems.append(f"alloc {baseline['alloc_bytes']:,}B → {result.alloc_bytes:,}B")
+    return problems
+
+
+def format_row(result: BenchResult, baseline: Optional[Dict], problems: List[str]) -> str:
+    change = ''
+    if baseline:
+        change = f"{(result.ops_per_sec / baseline['ops_per_sec'] - 1) * 100:+6.1f}%"
+    status = 'REGRESSION ' + '; '.join(problems) if problems else ('new' if baseline is None else 'ok')
+    return (f"{result.name:<42} {result.ops_per_sec:>13,.0f} {result.p50_us:>10.2f} {result.p99_us:>10.2f} "
+            f"{result.alloc_bytes:>10,} {change:>8}  {status}")
+
+
+def run(pattern: Optional[str] = None, baseline_path: str = DEFAULT_BASELINE_PATH,
+        min_time: float = 0.5, speed_tolerance: float = DEFAULT_SPEED_TOLERANCE,
+        alloc_tolerance: float = DEFAULT_ALLOC_TOLERANCE, out=sys.stdout, repeat: int = DEFAULT_REPEAT):
+    """
+    벤치마크 실행 후 결과 표 출력
+
+    Returns:
+        (결과 리스트, 회귀 항목 수)
+    """
+    baseline = load_baseline(baseline_path)
+    if baseline and baseline.get('environment') != environment():
+        print(f"주의: 기준값 측정 환경이 다릅니다 ({baseline.get('environment')})", file=out)
+    entries = (baseline or {}).get('results', {})
+
+    print(f"{'benchmark':<42} {'ops/sec':>13} {'p50(µs)':>10} {'p99(µs)':>10} {'alloc(B)':>10} "
+          f"{'change':>8}  status", file=out)
+    results = []
+    regressions = 0
+    for bench in build_benchmarks():
+        if pattern and pattern not in bench.name:
+            continue
+        result = measure(bench, min_time=min_time, repeat=repeat)
+        problems = compare(result, entries.get(bench.name), speed_tolerance, alloc_tolerance)
+        regressions += bool(problems)
+        results.append(result)
+        print(format_row(result, entries.get(bench.name), problems), file=out, flush=True)
+    return results, regressions
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='계산 모듈 벤치마크 (기준값 비교)')
+    parser.add_argument('-k', dest='pattern', help='이름에 이 문자열이 들어간 항목만 측정')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_PATH, help='기준값 파일')
+    parser.add_argument('--save-baseline', action='store_true', help='측정 결과를 기준값으로 저장')
+    parser.add_argument('--quick', action='store_true',
+                        help=f'회차당 0.1초만 측정 (허용 범위 기본 {QUICK_SPEED_TOLERANCE:.2f})')
+    parser.add_argument('--min-time', type=float, default=0.5, help='회차당 최소 측정 시간 (초)')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help=f'항목당 측정 회차 (가장 빠른 회차 사용, 기본 {DEFAULT_REPEAT})')
+    parser.add_argument('--tolerance', type=float,
+                        help=f'허용 ops/sec 감소 비율 (기본 {DEFAULT_SPEED_TOLERANCE:.2f})')
+    parser.add_argument('--output', help='결과 표를 파일에도 저장 (예: bench_output.txt)')
+    args = parser.parse_args()
+
+    min_time = 0.1 if args.quick else args.min_time
+    if args.tolerance is None:
+        args.tolerance = QUICK_SPEED_TOLERANCE if args.quick else DEFAULT_SPEED_TOLERANCE
+    results, regressions = run(args.pattern, args.baseline, min_time, args.tolerance, repeat=args.repeat)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(f"# {datetime.now():%Y-%m-%d %H:%M} {environment()}\n")
+            baseline_entries = (load_baseline(args.baseline) or {}).get('results', {})
+            for result in results:
+                entry = baseline_entries.get(result.name)
+                f.write(format_row(result, entry, compare(result, entry, args.tolerance)) + '\n')
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print(f"기준값 저장: {args.baseline} ({len(results)}개 항목)")
+    elif regressions:
+        print(f"\n성능 회귀 {regressions}개 항목 (허용 범위: ops/sec -{args.tolerance:.0%}, "
+              f"alloc +{DEFAULT_ALLOC_TOLERANCE:.0%})")
+        sys.exit(1)
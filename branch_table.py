@@ -0,0 +1,184 @@
+"""
+지지 관계 조회표 모듈
+Precomputed Branch Interaction Table Module
+
+네 지지(년지, 월지, 일지, 시지)의 조합은 12⁴ = 20,736가지(시간 미상 3지지는
+12³ = 1,728가지)뿐이다. 조합마다 정수 레코드 두 개를 만들어 두고, 이후에는 조합
+인덱스로 한 번 읽는다. hyungchunghap의 지지 관계, sinsal의 원진/역마/도화와 saju_batch가
+이 표를 쓴다.
+
+- RELATION_RECORDS (array 'Q'): hyungchunghap.relation_bits 비트셋 (지지 관계만, 천간 비트는 0)
+- SINSAL_RECORDS (array 'H'): 비트 0~5 원진인 위치 쌍(POSITION_PAIRS 순서),
+  비트 6~9 역마 위치, 비트 10~13 도화 위치 (위치 비트 p = 0:년지 ~ 3:시지)
+
+표는 임포트할 때 hyungchunghap 비트마스크 엔진에서 만든다 (수십 ms). 조합의 지지
+마스크는 793가지뿐이라 관계 판정은 마스크별로 한 번만 하고, 조합별로는 마스크와 중복
+비트를 이어 붙여 읽는다. 두 배열을 합쳐 약 220KB다.
+"""
+import itertools
+from array import array
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from hyungchunghap import JAHYUNG_BIT, JAHYUNG_MASK, RELATION_DEFS, relation_bits
+from sinsal import DOHWA_TABLE, WONJIN_PAIRS, YEOKMA_TABLE
+
+BRANCHES_HANJA = ('子', '丑', '寅', '卯', '辰', '巳', '午', '未', '申', '酉', '戌', '亥')
+_BRANCH_INDEX = {b: i for i, b in enumerate(BRANCHES_HANJA)}
+
+# 4지지 조합 수와 3지지(시간 미상) 조합의 시작 위치
+FOUR_BRANCH_COUNT = 12 ** 4
+THREE_BRANCH_COUNT = 12 ** 3
+TABLE_SIZE = FOUR_BRANCH_COUNT + THREE_BRANCH_COUNT
+
+# SINSAL_RECORDS 비트 배치 (원진 비트 n = POSITION_PAIRS[n]의 두 위치가 원진)
+POSITION_PAIRS = ((0, 1), (0, 2), (0, 3), (1, 2), (1, 3), (2, 3))
+WONJIN_BITS = (1 << len(POSITION_PAIRS)) - 1
+YEOKMA_SHIFT = 6
+DOHWA_SHIFT = 10
+
+# get_count_table의 열 순서 (지지 관계 종류 + 지지 기반 신살)
+RELATIONS = tuple(dict.fromkeys(d.kind for d in RELATION_DEFS if d.target == 'branch')) + (
+    'wonjin', 'yeokma', 'dohwa')
+
+
+class BranchRecord(NamedTuple):
+    """지지 조합 하나의 레코드"""
+    indices: Tuple[int, ...]
+    relations: int
+    sinsal: int
+
+
+def _build_records() -> Tuple[array, array]:
+    """모든 지지 조합의 레코드 (combination_index 순서: 4지지 다음 3지지)"""
+    bit = [1 << i for i in range(12)]
+    span = range(12)
+
+    # 조합별 지지 마스크와 두 번 이상 나온 지지의 마스크
+    masks3 = [bit[y] | bit[m] | bit[d] for y in span for m in span for d in span]
+    dups3 = [(bit[y] & bit[m]) | ((bit[y] | bit[m]) & bit[d]) for y in span for m in span for d in span]
+    masks4 = [mask | bit[h] for mask in masks3 for h in span]
+    dups4 = [dup | (mask & bit[h]) for mask, dup in zip(masks3, dups3) for h in span]
+    masks = masks4 + masks3
+    # 관계 판정은 고유 마스크별로 한 번, 자형은 중복 비트로 따로 붙인다
+    unique = {mask: relation_bits(mask, 0) for mask in set(masks)}
+    jahyung = 1 << JAHYUNG_BIT
+    relations = array('Q', [unique[mask] | (dup & JAHYUNG_MASK and jahyung)
+                            for mask, dup in zip(masks, dups4 + dups3)])
+
+    # 년지 y 기준으로 지지 b가 역마/도화인지 (위치 0 비트 자리에 둔 값, 위치 p면 p만큼 민다)
+    cell = [[(BRANCHES_HANJA[b] == YEOKMA_TABLE[BRANCHES_HANJA[y]]) << YEOKMA_SHIFT
+             | (BRANCHES_HANJA[b] == DOHWA_TABLE[BRANCHES_HANJA[y]]) << DOHWA_SHIFT
+             for b in span] for y in span]
+    # 두 지지가 원진인지 (위치 쌍 비트는 POSITION_PAIRS 순서)
+    wonjin = [[0] * 12 for _ in span]
+    for a, b in WONJIN_PAIRS:
+        wonjin[_BRANCH_INDEX[a]][_BRANCH_INDEX[b]] = wonjin[_BRANCH_INDEX[b]][_BRANCH_INDEX[a]] = 1
+    triples = list(itertools.product(span, repeat=3))
+    sinsal3 = [cell[y][y] | cell[y][m] << 1 | cell[y][d] << 2
+               | wonjin[y][m] | wonjin[y][d] << 1 | wonjin[m][d] << 3 for y, m, d in triples]
+    sinsal4 = [value | cell[y][h] << 3 | wonjin[y][h] << 2 | wonjin[m][h] << 4 | wonjin[d][h] << 5
+               for (y, m, d), value in zip(triples, sinsal3) for h in span]
+    return relations, array('H', sinsal4 + sinsal3)
+
+
+RELATION_RECORDS, SINSAL_RECORDS = _build_records()
+
+_counts = None
+
+
+def combination_index(branch_indices: Sequence[int]) -> int:
+    """
+    지지 인덱스 3~4개를 조회표 인덱스로 변환
+
+    4지지: ((년*12 + 월)*12 + 일)*12 + 시
+    3지지: FOUR_BRANCH_COUNT + (년*12 + 월)*12 + 일
+    """
+    if len(branch_indices) == 4:
+        y, m, d, h = branch_indices
+        return ((y * 12 + m) * 12 + d) * 12 + h
+    y, m, d = branch_indices
+    return FOUR_BRANCH_COUNT + (y * 12 + m) * 12 + d
+
+
+def branch_indices(branches: Sequence[str]) -> Optional[List[int]]:
+    """지지 표기('子' 또는 '자(子)') 3~4개를 인덱스로, 해석할 수 없으면 None"""
+    if not 3 <= len(branches) <= 4:
+        return None
+    indices = []
+    for branch in branches:
+        index = _BRANCH_INDEX.get(branch)
+        if index is None:
+            if not isinstance(branch, str) or '(' not in branch:
+                return None
+            index = _BRANCH_INDEX.get(branch.split('(')[1].rstrip(')'))
+            if index is None:
+                return None
+        indices.append(index)
+    return indices
+
+
+def lookup(branches: Sequence[str]) -> Optional[BranchRecord]:
+    """
+    지지 리스트의 레코드 조회
+
+    Args:
+        branches: [년지, 월지, 일지, 시지] (시간 미상이면 3개)
+
+    Returns:
+        BranchRecord, 표준 지지 3~4개가 아니면 None (호출 측에서 직접 계산)
+    """
+    indices = branch_indices(branches)
+    if indices is None:
+        return None
+    index = combination_index(indices)
+    return BranchRecord(tuple(indices), RELATION_RECORDS[index], SINSAL_RECORDS[index])
+
+
+def get_count_table():
+    """
+    조합별 관계 개수 배열 (numpy uint8, shape=(TABLE_SIZE, len(RELATIONS)), 일괄 계산용)
+
+    형충회합은 성립한 관계 정의 수(자형은 hyung에 포함), 원진은 원진인 위치 쌍 수,
+    역마/도화는 해당 위치 수다.
+    """
+    global _counts
+    if _counts is None:
+        import numpy as np
+        from hyungchunghap import POPCOUNT, relation_counts
+
+        popcount = np.frombuffer(POPCOUNT, dtype=np.uint8)
+        sinsal = np.frombuffer(SINSAL_RECORDS, dtype=np.uint16)
+        counts = relation_counts(np.frombuffer(RELATION_RECORDS, dtype=np.uint64))
+        counts['wonjin'] = popcount[sinsal & WONJIN_BITS]
+        counts['yeokma'] = popcount[(sinsal >> YEOKMA_SHIFT) & 0xF]
+        counts['dohwa'] = popcount[(sinsal >> DOHWA_SHIFT) & 0xF]
+        _counts = np.stack([counts[name] for name in RELATIONS], axis=1).astype(np.uint8)
+    return _counts
+
+
+def combination_indices(year, month, day, hour):
+    """
+    지지 인덱스 배열 4개를 조회표 인덱스 배열로 (numpy, hour가 -1인 행은 3지지 조합)
+    """
+    import numpy as np
+
+    year, month, day, hour = (np.asarray(a, dtype=np.int64) for a in (year, month, day, hour))
+    base = (year * 12 + month) * 12 + day
+    return np.where(hour < 0, FOUR_BRANCH_COUNT + base, base * 12 + hour)
+
+
+if __name__ == '__main__':
+    import time
+
+    started = time.perf_counter()
+    relations, sinsal = _build_records()
+    elapsed = time.perf_counter() - started
+    print(f"=== 지지 관계 조회표: {len(relations):,}개 조합 ({elapsed * 1000:.1f}ms) ===")
+    record = lookup(['丑', '子', '未', '申'])
+    found = [RELATION_DEFS[n].kind + f"({RELATION_DEFS[n].members})"
+             for n in range(len(RELATION_DEFS)) if record.relations >> n & 1]
+    if record.relations >> JAHYUNG_BIT & 1:
+        found.append('hyung(자형)')
+    print(f"형충회합: {found if found else '없음'}")
+    print(f"원진 위치 쌍: {record.sinsal & WONJIN_BITS:06b}, "
+          f"역마 위치: {record.sinsal >> YEOKMA_SHIFT & 0xF:04b}, 도화 위치: {record.sinsal >> DOHWA_SHIFT & 0xF:04b}")
@@ -0,0 +1,374 @@
+"""
+사주 일괄 계산 CLI
+Bulk Charting Command-Line Tool
+
+CSV/JSONL 출생 정보 파일을 읽어 사주를 일괄 계산한다.
+입력을 청크로 나눠 ProcessPoolExecutor 워커에 보내고, 결과는 입력 순서대로
+완료되는 즉시 기록한다. 청크를 기록할 때마다 체크포인트를 남기므로 중단된
+작업을 같은 명령으로 다시 실행하면 이어서 계산한다.
+
+입력 컬럼 (CSV 헤더 또는 JSONL 키):
+    id          식별자 (선택, 그대로 출력)
+    date        생년월일 YYYY-MM-DD
+    time        출생 시각 HH:MM (비어 있으면 시간 미상)
+    calendar    양력/음력 (solar/lunar, 기본 양력)
+    leap        음력 윤달 여부 (1/true/윤, 선택)
+    gender      남/여 (M/F, 기본 남)
+    longitude   출생지 경도 (선택, 주면 경도 보정)
+
+    python bulk_chart.py customers.csv charts.csv --workers 8
+    python bulk_chart.py customers.jsonl charts.jsonl --full   # 십신/신살/대운 등 전체 결과
+"""
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from calendar_table import FIRST_DATE, LAST_DATE
+from lunar_calendar import lunar_to_solar_batch
+from saju_batch import calculate_four_pillars_batch, pillar_indices
+from saju_calculator import EARTHLY_BRANCHES_HANJA, HEAVENLY_STEMS_HANJA, ChartRecord, calculate_four_pillars
+
+DEFAULT_CHUNK_SIZE = 10000
+
+# 결과 컬럼 (기본 모드)
+OUTPUT_COLUMNS = ['row', 'id', 'solar_datetime', 'gender', 'time_unknown',
+                  'year_pillar', 'month_pillar', 'day_pillar', 'hour_pillar',
+                  'daeun_forward', 'correction_minutes', 'error']
+
+JIAZI_HANJA = [HEAVENLY_STEMS_HANJA[i % 10] + EARTHLY_BRANCHES_HANJA[i % 12] for i in range(60)]
+
+_LUNAR_VALUES = {'음력', 'lunar', 'l', '음'}
+_TRUE_VALUES = {'1', 'true', 'yes', 'y', '윤', '윤달', 't'}
+_FEMALE_VALUES = {'여', 'f', 'female', '여자', 'w'}
+
+
+class BirthInput:
+    """입력 한 행을 해석한 결과 (해석 실패 시 error에 사유)"""
+    __slots__ = ('row', 'id', 'year', 'month', 'day', 'hour', 'minute', 'lunar', 'leap',
+                 'female', 'time_unknown', 'longitude', 'error')
+
+    def __init__(self, row: int, record: Dict):
+        self.row = row
+        self.id = record.get('id', '')
+        self.error = ''
+        self.hour = 12
+        self.minute = 0
+        self.longitude = float('nan')
+        try:
+            self.year, self.month, self.day = (int(v) for v in str(record.get('date', '')).strip().split('-'))
+            time_text = str(record.get('time') or '').strip()
+            self.time_unknown = not time_text
+            if time_text:
+                self.hour, self.minute = (int(v) for v in time_text.split(':')[:2])
+                if not (0 <= self.hour < 24 and 0 <= self.minute < 60):
+                    raise ValueError(f"시각 범위 오류: {time_text}")
+            self.lunar = str(record.get('calendar') or '').strip().lower() in _LUNAR_VALUES
+            self.leap = str(record.get('leap') or '').strip().lower() in _TRUE_VALUES
+            self.female = str(record.get('gender') or '').strip().lower() in _FEMALE_VALUES
+            longitude = record.get('longitude')
+            if longitude not in (None, ''):
+                self.longitude = float(longitude)
+        except (TypeError, ValueError) as e:
+            self.year = self.month = self.day = 0
+            self.lunar = self.leap = self.female = False
+            self.time_unknown = True
+            self.error = f"입력 해석 실패: {e}"
+
+
+def read_records(path: str) -> Iterator[Dict]:
+    """CSV(헤더 필요) 또는 JSONL 입력을 행 dict로 읽기 (확장자로 구분)"""
+    if path.endswith('.jsonl'):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+    else:
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            yield from csv.DictReader(f)
+
+
+def _solar_datetimes(inputs: List[BirthInput]) -> np.ndarray:
+    """입력 행들의 양력 생년월일시 (datetime64[m], 변환 실패/범위 밖은 NaT, 사유는 error에 기록)"""
+    years = np.array([b.year for b in inputs], dtype=np.int64)
+    months = np.array([b.month for b in inputs], dtype=np.int64)
+    days = np.array([b.day for b in inputs], dtype=np.int64)
+    lunar = np.array([b.lunar for b in inputs], dtype=bool)
+
+    solar = np.full(len(inputs), np.datetime64('NaT'), dtype='datetime64[D]')
+    if lunar.any():
+        leap = np.array([b.leap for b in inputs], dtype=bool)
+        solar[lunar] = lunar_to_solar_batch(years[lunar], months[lunar], days[lunar], leap[lunar])
+    for i in np.flatnonzero(~lunar):
+        b = inputs[i]
+        if b.error:
+            continue
+        try:
+            solar[i] = np.datetime64(datetime(b.year, b.month, b.day).date(), 'D')
+        except ValueError as e:
+            b.error = f"날짜 오류: {e}"
+
+    first, last = np.datetime64(FIRST_DATE, 'D'), np.datetime64(LAST_DATE, 'D')
+    for i in np.flatnonzero(np.isnat(solar) | (solar < first) | (solar > last)):
+        b = inputs[i]
+        if not b.error:
+            b.error = ("음력 날짜 변환 실패" if b.lunar and np.isnat(solar[i])
+                       else f"지원 범위({FIRST_DATE}~{LAST_DATE}) 밖의 날짜")
+        solar[i] = np.datetime64('NaT')
+
+    clock = np.array([b.hour * 60 + b.minute for b in inputs], dtype=np.int64)
+    return solar.astype('datetime64[m]') + clock.astype('timedelta64[m]')
+
+
+def chart_chunk(task: Tuple[int, List[Dict], bool, bool]) -> Tuple[int, List[Dict]]:
+    """
+    청크 하나 계산 (워커 프로세스에서 실행)
+
+    Args:
+        task: (첫 행 번호, 입력 행 dict 리스트, 보정 여부, 전체 결과 여부)
+
+    Returns:
+        (첫 행 번호, 결과 행 dict 리스트)
+    """
+    first_row, records, correct_time, full = task
+    inputs = [BirthInput(first_row + i, record) for i, record in enumerate(records)]
+    births = _solar_datetimes(inputs)
+    ok = np.flatnonzero(~np.isnat(births))
+    longitudes = np.array([b.longitude for b in inputs], dtype=float)
+    has_longitude = not np.isnan(longitudes[ok]).all() if ok.size else False
+
+    if full:
+        return first_row, _full_rows(inputs, births, correct_time, longitudes)
+
+    batch = calculate_four_pillars_batch(
+        births[ok],
+        genders=np.array([inputs[i].female for i in ok], dtype=bool),
+        include_hour=np.array([not inputs[i].time_unknown for i in ok], dtype=bool),
+        correct_time=correct_time,
+        longitudes=longitudes[ok] if has_longitude else None,
+    )
+    columns = {p: pillar_indices(batch, p).tolist() for p in ChartRecord.POSITIONS}
+    forward = batch['daeun_forward'].tolist()
+    correction = batch['correction_minutes'].tolist() if 'correction_minutes' in batch else None
+
+    rows = []
+    position = {int(i): n for n, i in enumerate(ok)}
+    for i, b in enumerate(inputs):
+        row = dict.fromkeys(OUTPUT_COLUMNS, '')
+        row.update(row=b.row, id=b.id, gender='여' if b.female else '남',
+                   time_unknown=b.time_unknown, error=b.error)
+        n = position.get(i)
+        if n is not None:
+            row['solar_datetime'] = str(births[i]).replace('T', ' ')
+            for p in ChartRecord.POSITIONS:
+                index = columns[p][n]
+                row[f'{p}_pillar'] = JIAZI_HANJA[index] if index >= 0 else ''
+            row['daeun_forward'] = forward[n]
+            # 보정 열은 청크 구성과 상관없이 그 행의 조건(보정 여부, 경도 유무)으로만 채운다
+            if correct_time or not np.isnan(longitudes[i]):
+                row['correction_minutes'] = correction[n]
+        rows.append(row)
+    return first_row, rows
+
+
+def _full_rows(inputs: List[BirthInput], births: np.ndarray, correct_time: bool,
+               longitudes: np.ndarray) -> List[Dict]:
+    """--full 모드: 행마다 calculate_four_pillars 전체 결과"""
+    rows = []
+    for i, b in enumerate(inputs):
+        row = {'row': b.row, 'id': b.id, 'error': b.error}
+        if not b.error:
+            birth = births[i].astype(datetime)
+            longitude = None if np.isnan(longitudes[i]) else float(longitudes[i])
+            result = calculate_four_pillars(birth, '여' if b.female else '남',
+                                            include_hour=not b.time_unknown, use_cache=False,
+                                            correct_time=correct_time, longitude=longitude)
+            row['solar_datetime'] = birth.strftime('%Y-%m-%d %H:%M')
+            row['chart'] = dict(result)
+        rows.append(row)
+    return rows
+
+
+class Checkpoint:
+    """
+    이어하기 체크포인트 (출력 파일 옆 .checkpoint.json)
+
+    입력 순서대로 기록을 마친 청크 수와 그 시점의 출력 파일 크기를 저장한다.
+    이어서 실행할 때는 출력 파일을 그 크기로 자르고 다음 청크부터 계산한다.
+    """
+
+    def __init__(self, output: str, settings: Dict):
+        self.path = output + '.checkpoint.json'
+        self.settings = settings
+        self.chunks_done = 0
+        self.rows_done = 0
+        self.output_bytes = 0
+
+    def load(self) -> bool:
+        """같은 설정의 체크포인트가 있으면 읽기"""
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, encoding='utf-8') as f:
+            saved = json.load(f)
+        if saved.get('settings') != self.settings:
+            print(f"체크포인트 설정이 달라 처음부터 계산합니다: {self.path}", file=sys.stderr)
+            return False
+        self.chunks_done = saved['chunks_done']
+        self.rows_done = saved['rows_done']
+        self.output_bytes = saved['output_bytes']
+        return True
+
+    def save(self):
+        temp = self.path + '.tmp'
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump({'settings': self.settings, 'chunks_done': self.chunks_done,
+                       'rows_done': self.rows_done, 'output_bytes': self.output_bytes}, f)
+        os.replace(temp, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class ResultWriter:
+    """CSV/JSONL 결과 기록 (확장자로 구분)"""
+
+    def __init__(self, path: str, full: bool, append: bool):
+        self.jsonl = full or path.endswith('.jsonl')
+        self.file = open(path, 'a' if append else 'w', encoding='utf-8', newline='')
+        if not self.jsonl:
+            self.csv = csv.DictWriter(self.file, fieldnames=OUTPUT_COLUMNS)
+            if not append:
+                self.csv.writeheader()
+
+    def write(self, rows: List[Dict]) -> int:
+        """행 기록 후 디스크에 반영, 현재 파일 크기 반환"""
+        if self.jsonl:
+            self.file.writelines(json.dumps(row, ensure_ascii=False, default=str) + '\n' for row in rows)
+        else:
+            self.csv.writerows(rows)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def _chunks(records: Iterator[Dict], chunk_size: int, skip_chunks: int) -> Iterator[Tuple[int, List[Dict]]]:
+    """(첫 행 번호, 행 리스트) 청크 생성, 앞의 skip_chunks개는 읽고 버린다"""
+    row = 0
+    index = 0
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        if index >= skip_chunks:
+            yield row, chunk
+        row += len(chunk)
+        index += 1
+
+
+def run(input_path: str, output_path: str, workers: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE, correct_time: bool = False, full: bool = False,
+        restart: bool = False, progress_interval: float = 5.0) -> Dict:
+    """
+    일괄 계산 실행
+
+    Args:
+        input_path: 입력 CSV/JSONL
+        output_path: 출력 CSV/JSONL (--full이면 항상 JSONL 형식)
+        workers: 워커 프로세스 수 (None이면 CPU 수, 1이면 현재 프로세스에서 계산)
+        chunk_size: 청크당 행 수
+        correct_time: 당시 법정 시각(UTC+8:30, 서머타임) 보정 여부
+        full: 행마다 전체 결과(십신, 신살, 대운 등)를 기록
+        restart: 체크포인트를 무시하고 처음부터 계산
+        progress_interval: 진행 상황 출력 간격 (초)
+
+    Returns:
+        {'rows', 'errors', 'seconds', 'rows_per_sec', 'resumed_rows'}
+    """
+    settings = {'input': os.path.abspath(input_path), 'chunk_size': chunk_size,
+                'correct_time': correct_time, 'full': full}
+    checkpoint = Checkpoint(output_path, settings)
+    resumed = (not restart and os.path.exists(output_path) and checkpoint.load())
+    if resumed:
+        with open(output_path, 'r+b') as f:
+            f.truncate(checkpoint.output_bytes)
+        print(f"체크포인트에서 이어서 계산: {checkpoint.rows_done:,}행 완료", file=sys.stderr)
+    else:
+        checkpoint = Checkpoint(output_path, settings)
+
+    writer = ResultWriter(output_path, full, append=resumed)
+    resumed_rows = checkpoint.rows_done
+    rows = errors = 0
+    started = last_report = time.perf_counter()
+
+    def record(chunk_rows: List[Dict]):
+        nonlocal rows, errors, last_report
+        checkpoint.output_bytes = writer.write(chunk_rows)
+        checkpoint.chunks_done += 1
+        checkpoint.rows_done += len(chunk_rows)
+        checkpoint.save()
+        rows += len(chunk_rows)
+        errors += sum(1 for row in chunk_rows if row['error'])
+        now = time.perf_counter()
+        if now - last_report >= progress_interval:
+            last_report = now
+            print(f"  {checkpoint.rows_done:,}행 ({rows / (now - started):,.0f} rows/sec)", file=sys.stderr)
+
+    tasks = ((row, chunk, correct_time, full)
+             for row, chunk in _chunks(read_records(input_path), chunk_size, checkpoint.chunks_done))
+    try:
+        if workers == 1:
+            for task in tasks:
+                record(chart_chunk(task)[1])
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # 대기 중인 청크 수를 제한해 메모리를 일정하게 유지하고, 결과는 입력 순서대로 기록
+                in_flight = []
+                limit = (workers or os.cpu_count() or 1) * 2
+                for task in tasks:
+                    in_flight.append(pool.submit(chart_chunk, task))
+                    if len(in_flight) >= limit:
+                        record(in_flight.pop(0).result()[1])
+                for future in in_flight:
+                    record(future.result()[1])
+    finally:
+        writer.close()
+
+    checkpoint.remove()
+    seconds = time.perf_counter() - started
+    return {'rows': rows, 'errors': errors, 'seconds': round(seconds, 2),
+            'rows_per_sec': round(rows / seconds, 1) if seconds else 0.0, 'resumed_rows': resumed_rows}
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='사주 일괄 계산 (CSV/JSONL, 중단 후 이어하기 지원)')
+    parser.add_argument('input', help='입력 파일 (.csv 또는 .jsonl)')
+    parser.add_argument('output', help='출력 파일 (.csv 또는 .jsonl)')
+    parser.add_argument('--workers', type=int, default=None, help='워커 프로세스 수 (기본: CPU 수)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--correct-time', action='store_true', help='당시 표준시·서머타임 보정')
+    parser.add_argument('--full', action='store_true', help='전체 결과(JSONL) 기록')
+    parser.add_argument('--restart', action='store_true', help='체크포인트 무시하고 처음부터')
+    args = parser.parse_args()
+
+    try:
+        summary = run(args.input, args.output, args.workers, args.chunk_size,
+                      args.correct_time, args.full, args.restart)
+    except KeyboardInterrupt:
+        print("\n중단됨: 같은 명령으로 다시 실행하면 체크포인트에서 이어서 계산합니다.", file=sys.stderr)
+        sys.exit(130)
+    print(f"{args.output}: {summary['rows']:,}행 ({summary['errors']:,}건 오류), "
+          f"{summary['seconds']}초, {summary['rows_per_sec']:,.0f} rows/sec")
@@ -0,0 +1,233 @@
+"""
+만세력 일별 조회표 모듈
+Memory-mapped Precomputed Calendar Table Module
+
+지원 범위(1900-2100)의 날짜별 고정 정보(일주, 입춘 기준 연주, 절월, 월주)와
+solar_terms의 24절기 시각 배열을 작은 바이너리 파일로 미리 계산해 두고,
+읽기 전용 mmap으로 연다. 여러 Streamlit/API 워커가 같은 페이지 캐시를 공유하며,
+조회는 배열 인덱싱 한 번이다.
+
+파일 형식 (little-endian):
+    헤더: magic(8s) version(H) record_size(H) first_day(i) count(I)
+          term_first_year(H) term_count(I)
+    레코드: 날짜당 8바이트
+        [일주, 연주, 월주 (00:00 기준 60갑자), 절월 인덱스,
+         절입 시각(하루 중 분, 절입 없는 날은 0xFFFF),
+         절입 이후 연주, 절입 이후 월주]
+    절기 배열: int32 × term_count (solar_terms 기준 분 오프셋, 오름차순)
+    first_day는 1900-01-01 기준 일수
+
+빌드:
+    python calendar_table.py build [경로]
+"""
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from datetime import date
+from typing import Optional, Sequence, Tuple
+
+TABLE_MAGIC = b'SAJUCAL\x00'
+TABLE_VERSION = 2
+HEADER_FORMAT = '<8sHHiIHI'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+RECORD_FORMAT = '<4BH2B'
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+NO_JEOL = 0xFFFF
+
+# numpy 구조화 dtype (RECORD_FORMAT과 동일한 배치)
+RECORD_FIELDS = [('day', 'u1'), ('year', 'u1'), ('month', 'u1'), ('month_index', 'u1'),
+                 ('jeol_minute', '<u2'), ('year_after', 'u1'), ('month_after', 'u1')]
+
+# 지원 범위
+FIRST_DATE = date(1900, 1, 1)
+LAST_DATE = date(2100, 12, 31)
+
+# 기본 경로 (SAJU_CALENDAR_TABLE 환경변수로 변경 가능)
+DEFAULT_TABLE_PATH = os.environ.get(
+    'SAJU_CALENDAR_TABLE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'calendar_table.bin')
+)
+
+_BASE_ORDINAL = FIRST_DATE.toordinal()
+
+
+class DayTable:
+    """
+    읽기 전용 mmap 일별 조회표
+
+    lookup(day_number)은 날짜 레코드를 복사 없이 읽고,
+    terms는 절기 시각 배열(solar_terms 기준)을 복사 없이 노출한다.
+    day_number는 1900-01-01 기준 일수.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, record_size, first_day, count,
+         term_first_year, term_count) = struct.unpack_from(HEADER_FORMAT, self._mmap, 0)
+        if magic != TABLE_MAGIC or version != TABLE_VERSION or record_size != RECORD_SIZE:
+            self._mmap.close()
+            raise ValueError(f"지원하지 않는 만세력 조회표 형식입니다: {path} (python calendar_table.py build로 재생성)")
+        self._terms_offset = HEADER_SIZE + count * RECORD_SIZE
+        if len(self._mmap) < self._terms_offset + term_count * 4:
+            self._mmap.close()
+            raise ValueError(f"만세력 조회표 파일이 손상되었습니다: {path}")
+        self.first_day = first_day
+        self.count = count
+        self.term_first_year = term_first_year
+        self.term_count = term_count
+        self.terms = self._load_terms()
+
+    def _load_terms(self):
+        """절기 배열 (little-endian 시스템에서는 mmap 위의 memoryview, 복사 없음)"""
+        view = memoryview(self._mmap)[self._terms_offset:self._terms_offset + self.term_count * 4]
+        if sys.byteorder == 'little':
+            return view.cast('i')
+        terms = array('i', view.tobytes())
+        terms.byteswap()
+        return terms
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, day_number: int) -> bool:
+        return 0 <= day_number - self.first_day < self.count
+
+    def lookup(self, day_number: int) -> Tuple[int, int, int, int, int, int, int]:
+        """
+        (일주, 연주, 월주, 절월 인덱스, 절입 분, 절입 후 연주, 절입 후 월주)
+        
+        연주/월주/절월 인덱스는 그날 00:00 기준이며, 하루 중 분이 절입 분 이상이면
+        절입 후 연주/월주를 쓴다. 범위 밖이면 IndexError.
+        """
+        offset = day_number - self.first_day
+        if not 0 <= offset < self.count:
+            raise IndexError(f"조회표 범위 밖의 날짜입니다: day_number={day_number}")
+        return struct.unpack_from(RECORD_FORMAT, self._mmap, HEADER_SIZE + offset * RECORD_SIZE)
+
+    def as_array(self):
+        """numpy 구조화 배열 뷰 (RECORD_FIELDS, 복사 없음, 일괄 계산용)"""
+        import numpy as np
+        return np.frombuffer(self._mmap, dtype=np.dtype(RECORD_FIELDS), count=self.count,
+                             offset=HEADER_SIZE)
+
+    def close(self):
+        if isinstance(self.terms, memoryview):
+            self.terms.release()
+        self._mmap.close()
+
+
+def day_number(d) -> int:
+    """date/datetime을 1900-01-01 기준 일수로 변환"""
+    return d.toordinal() - _BASE_ORDINAL
+
+
+def iter_records(terms: Sequence[int], first: date = FIRST_DATE, last: date = LAST_DATE):
+    """조회표 레코드 생성 (terms: solar_terms.compute_term_minutes() 결과)"""
+    from saju_calculator import DAY_PILLAR_BASE_OFFSET, term_pillars
+
+    for day in range(day_number(first), day_number(last) + 1):
+        start = day * 1440
+        year_idx, month_pillar, month_idx, k = term_pillars(start, terms)
+        # 이날 중 다음 절(節)이 들어오는지 확인 (절기 인덱스 짝수 = 절)
+        k_jeol = k + 2 - (k % 2)
+        if terms[k_jeol] < start + 1440:
+            jeol_minute = terms[k_jeol] - start
+            year_after, month_after, _, _ = term_pillars(terms[k_jeol], terms)
+        else:
+            jeol_minute, year_after, month_after = NO_JEOL, year_idx, month_pillar
+        day_idx = (DAY_PILLAR_BASE_OFFSET + day) % 60
+        yield day_idx, year_idx, month_pillar, month_idx, jeol_minute, year_after, month_after
+
+
+def build_table(path: str = DEFAULT_TABLE_PATH, first: date = FIRST_DATE, last: date = LAST_DATE) -> str:
+    """
+    조회표 바이너리 파일 생성 (절기 계산 포함, 약 1초)
+
+    임시 파일에 쓴 뒤 os.replace로 교체하므로, 실행 중인 워커가
+    반쯤 쓰인 파일을 mmap하는 일은 없다.
+
+    Returns:
+        생성된 파일 경로
+    """
+    from solar_terms import FIRST_TERM_YEAR, compute_term_minutes
+
+    terms = compute_term_minutes()
+    count = (last - first).days + 1
+    payload = bytearray(HEADER_SIZE + count * RECORD_SIZE + len(terms) * 4)
+    struct.pack_into(HEADER_FORMAT, payload, 0, TABLE_MAGIC, TABLE_VERSION, RECORD_SIZE,
+                     day_number(first), count, FIRST_TERM_YEAR, len(terms))
+    offset = HEADER_SIZE
+    for record in iter_records(terms, first, last):
+        struct.pack_into(RECORD_FORMAT, payload, offset, *record)
+        offset += RECORD_SIZE
+    struct.pack_into(f'<{len(terms)}i', payload, offset, *terms)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.calendar_table.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return path
+
+
+_TABLE_CACHE = {}
+
+
+def load_table(path: str = DEFAULT_TABLE_PATH, build_if_missing: bool = True) -> Optional[DayTable]:
+    """
+    조회표를 mmap으로 열기 (프로세스당 한 번, 이후 캐시)
+
+    파일이 없으면 build_if_missing일 때 생성을 시도하고,
+    생성/열기에 실패하면 None을 반환한다 (호출 측은 직접 계산으로 대체).
+    """
+    if path in _TABLE_CACHE:
+        return _TABLE_CACHE[path]
+    table = None
+    try:
+        if not os.path.exists(path) and build_if_missing:
+            build_table(path)
+        table = DayTable(path)
+    except ValueError:
+        # 이전 형식 파일이면 다시 생성
+        if build_if_missing:
+            try:
+                build_table(path)
+                table = DayTable(path)
+            except (OSError, ValueError) as e:
+                print(f"만세력 조회표를 사용할 수 없어 직접 계산합니다: {e}")
+    except OSError as e:
+        print(f"만세력 조회표를 사용할 수 없어 직접 계산합니다: {e}")
+    _TABLE_CACHE[path] = table
+    return table
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='만세력 일별 조회표 빌드/확인')
+    parser.add_argument('command', choices=['build', 'info'])
+    parser.add_argument('path', nargs='?', default=DEFAULT_TABLE_PATH)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        built = build_table(args.path)
+        print(f"조회표 생성 완료: {built} ({os.path.getsize(built):,} bytes)")
+    else:
+        table = load_table(args.path, build_if_missing=False)
+        if table is None:
+            sys.exit(1)
+        print(f"경로: {table.path}")
+        print(f"레코드: {len(table):,}일 (first_day={table.first_day})")
+        print(f"절기: {table.term_count:,}개 ({table.term_first_year}년 소한부터)")
+        print(f"1900-01-01: {table.lookup(0)}")
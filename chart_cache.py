@@ -0,0 +1,152 @@
+"""
+사주 결과 메모이제이션 모듈
+Bounded LRU/TTL Memo Cache Module
+
+정규화 키(canonical key)로 계산 결과를 보관하는 크기 제한 LRU 캐시.
+항목마다 TTL(초)이 지나면 만료되며, 적중/실패/퇴출 통계를 제공한다.
+여러 Streamlit 세션 스레드에서 동시에 사용할 수 있도록 잠금을 건다. get_or_compute는
+같은 키를 동시에 요청하면 한 스레드만 계산하고 나머지는 그 결과를 기다린다.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional
+
+
+class CacheStats(NamedTuple):
+    """캐시 통계"""
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    size: int
+    maxsize: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class LRUTTLCache:
+    """
+    크기 제한 LRU + TTL 캐시
+
+    Args:
+        maxsize: 최대 항목 수 (초과 시 가장 오래 사용하지 않은 항목 퇴출, 0이면 캐시 안 함)
+        ttl: 항목 유효 시간 (초, None이면 만료 없음)
+        clock: 시간 함수 (기본 time.monotonic)
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: Optional[float] = 3600.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()  # key -> (만료 시각, 값)
+        self._pending: Dict[Hashable, Future] = {}  # get_or_compute가 계산 중인 키 -> 결과 Future
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """키 조회 (없거나 만료되면 default)"""
+        with self._lock:
+            return self._get_locked(key, default)
+
+    def _get_locked(self, key: Hashable, default: Any) -> Any:
+        """get 본체 (잠금을 잡은 상태에서 호출)"""
+        entry = self._data.get(key)
+        if entry is not None:
+            expires, value = entry
+            if expires is None or expires > self._clock():
+                self._data.move_to_end(key)
+                self._hits += 1
+                return value
+            del self._data[key]
+            self._expirations += 1
+        self._misses += 1
+        return default
+
+    def set(self, key: Hashable, value: Any):
+        """키 저장 (최대 크기를 넘으면 LRU 항목 퇴출)"""
+        with self._lock:
+            self._set_locked(key, value)
+
+    def _set_locked(self, key: Hashable, value: Any):
+        """set 본체 (잠금을 잡은 상태에서 호출)"""
+        if self.maxsize <= 0:
+            return
+        expires = None if self.ttl is None else self._clock() + self.ttl
+        self._data[key] = (expires, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self._evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        캐시에 있으면 반환, 없으면 compute() 결과를 저장 후 반환
+
+        조회와 계산 중 표시는 한 번의 잠금 안에서 한다. 같은 키를 다른 스레드가 계산 중이면
+        compute를 다시 부르지 않고 그 결과를 기다린다 (계산이 예외로 끝나면 같은 예외를 낸다).
+        계산 자체는 잠금 밖에서 하므로 다른 키의 조회/계산을 막지 않는다.
+        """
+        with self._lock:
+            value = self._get_locked(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._pending[key] = Future()
+        if not owner:
+            return pending.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._pending[key]
+            pending.set_exception(e)
+            raise
+        with self._lock:
+            self._set_locked(key, value)
+            del self._pending[key]
+        pending.set_result(value)
+        return value
+
+    def clear(self):
+        """모든 항목과 통계 초기화"""
+        with self._lock:
+            self._data.clear()
+            self._hits = self._misses = self._evictions = self._expirations = 0
+
+    def resize(self, maxsize: int):
+        """최대 항목 수 변경 (줄어들면 LRU 항목부터 퇴출)"""
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._data) > max(maxsize, 0):
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self._hits, self._misses, self._evictions, self._expirations,
+                              len(self._data), self.maxsize)
+
+    def stats_dict(self) -> Dict[str, Any]:
+        """통계를 dict로 (로그/JSON 출력용)"""
+        stats = self.stats()
+        result = stats._asdict()
+        result['hit_rate'] = round(stats.hit_rate, 4)
+        return result
+
+
+_MISSING = object()
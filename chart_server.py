@@ -0,0 +1,330 @@
+"""
+사주 계산 HTTP JSON API 서버
+Standalone asyncio HTTP Chart API
+
+Streamlit 없이 다른 서비스에서 사주를 계산할 수 있도록 표준 라이브러리
+asyncio만으로 만든 가벼운 HTTP/1.1 서버.
+
+    GET  /chart?date=1992-10-24&time=05:30&gender=남   단건 (전체 결과)
+    POST /chart   {"date": "...", "time": "...", ...}   단건 (JSON 본문)
+    POST /charts  [{...}, {...}] 또는 {"records": [...], "correct_time": true}
+                  일괄 (saju_batch 일괄 계산, 네 기둥만)
+    GET  /health  상태와 캐시 통계 (--instrument로 실행하면 단계별 계측 포함)
+
+입력 필드는 bulk_chart와 같다 (date, time, calendar, leap, gender, longitude,
+그리고 correct_time). 단건 응답의 ETag는 정규화 키(chart_cache_key)로 만들므로
+If-None-Match가 맞으면 결과를 계산하지 않고 304를 돌려준다. 인코딩된 응답 본문도
+ETag로 캐시해 같은 키의 요청은 JSON 직렬화와 gzip 압축을 건너뛴다.
+연결 유지(keep-alive)와 gzip 응답(Accept-Encoding)을 지원한다.
+일괄 계산과 캐시에 없는 단건 계산(인코딩, 압축 포함)은 작업 스레드에서 실행해
+이벤트 루프가 그동안에도 다른 연결을 처리한다.
+
+    python chart_server.py --host 127.0.0.1 --port 8080
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import instrumentation
+import lunar_calendar
+from bulk_chart import BirthInput, chart_chunk
+from chart_cache import LRUTTLCache
+from saju_calculator import (calculate_chart_record, calculate_four_pillars, chart_cache_key,
+                             get_chart_cache_stats)
+from time_correction import normalize_birth_time
+
+SERVER_NAME = 'saju-chart-api'
+
+# ETag에 넣는 결과 형식 버전 (응답 구조가 바뀌면 올린다)
+RESPONSE_VERSION = 1
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 8 * 1024 * 1024
+MAX_BULK_RECORDS = 50000
+KEEP_ALIVE_TIMEOUT = 15.0
+GZIP_MIN_BYTES = 1024
+
+# 계산 작업 스레드 수 (이벤트 루프의 기본 executor)
+COMPUTE_WORKERS = 4
+
+_REASONS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+            405: 'Method Not Allowed', 411: 'Length Required', 413: 'Payload Too Large',
+            431: 'Request Header Fields Too Large', 500: 'Internal Server Error'}
+
+_TRUE_VALUES = {'1', 'true', 'yes', 'y', 'on'}
+
+
+class EncodedBody:
+    """JSON 인코딩이 끝난 응답 본문 (gzip 본문은 처음 요청될 때 만들어 보관)"""
+    __slots__ = ('raw', '_gzipped')
+
+    def __init__(self, payload):
+        self.raw = json.dumps(payload, ensure_ascii=False, default=str, separators=(',', ':')).encode()
+        self._gzipped = None
+
+    def gzipped(self) -> bytes:
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.raw, compresslevel=5)
+        return self._gzipped
+
+
+# 단건 응답 본문 캐시 (ETag → EncodedBody, 같은 키는 인코딩/압축을 다시 하지 않는다)
+_body_cache = LRUTTLCache(maxsize=4096, ttl=3600.0)
+
+
+class HTTPError(Exception):
+    """요청 오류 (상태 코드와 메시지)"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _flag(value) -> bool:
+    return value is True or str(value or '').strip().lower() in _TRUE_VALUES
+
+
+def _single_birth(fields: Dict) -> Tuple[datetime, str, bool, bool, Optional[float]]:
+    """단건 입력을 (양력 생년월일시, 성별, 시주 포함, 보정 여부, 경도)로 해석"""
+    birth = BirthInput(0, fields)
+    if birth.error:
+        raise HTTPError(400, birth.error)
+    try:
+        if birth.lunar:
+            solar = lunar_calendar.lunar_to_solar(birth.year, birth.month, birth.day, birth.leap)
+            birth_date = datetime(solar.year, solar.month, solar.day, birth.hour, birth.minute)
+        else:
+            birth_date = datetime(birth.year, birth.month, birth.day, birth.hour, birth.minute)
+    except ValueError as e:
+        raise HTTPError(400, f"날짜 오류: {e}")
+    longitude = None if birth.longitude != birth.longitude else birth.longitude
+    return birth_date, '여' if birth.female else '남', not birth.time_unknown, _flag(fields.get('correct_time')), longitude
+
+
+def chart_etag(birth_date: datetime, gender: str, include_hour: bool, correct_time: bool,
+               longitude: Optional[float], as_of: datetime) -> str:
+    """
+    단건 결과의 ETag (calculate_four_pillars와 같은 정규화 키의 해시)
+
+    같은 날 같은 시간대처럼 결과가 같은 요청은 같은 ETag를 받는다.
+    """
+    correction = None
+    if correct_time or longitude is not None:
+        correction = normalize_birth_time(birth_date, longitude, historical=correct_time)
+        birth_date = correction.corrected
+    key = chart_cache_key(calculate_chart_record(birth_date, gender, include_hour), birth_date, as_of)
+    if correction is not None:
+        key += (correction.original, correction.flags)
+    digest = hashlib.blake2b(repr((RESPONSE_VERSION,) + key).encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def _seconds_until_next_year(now: datetime) -> int:
+    """세운 기준 연도가 바뀔 때까지 남은 초 (Cache-Control max-age 상한)"""
+    return int((datetime(now.year + 1, 1, 1) - now).total_seconds())
+
+
+async def _run_blocking(func, *args):
+    """CPU를 쓰는 작업을 작업 스레드에서 실행 (예외는 그대로 전파)"""
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+def _chart_body(birth_date: datetime, gender: str, include_hour: bool, as_of: datetime,
+                correct_time: bool, longitude: Optional[float], accepts_gzip: bool) -> EncodedBody:
+    """단건 결과 계산과 인코딩 (작업 스레드에서 실행)"""
+    body = EncodedBody(dict(calculate_four_pillars(
+        birth_date, gender, include_hour=include_hour, as_of=as_of,
+        correct_time=correct_time, longitude=longitude)))
+    if accepts_gzip and len(body.raw) >= GZIP_MIN_BYTES:
+        body.gzipped()
+    return body
+
+
+async def handle_chart(fields: Dict, headers: Dict[str, str]) -> Tuple[int, Optional[EncodedBody], Dict[str, str]]:
+    """단건 계산 (If-None-Match가 맞으면 304, 캐시에 없으면 작업 스레드에서 계산)"""
+    birth_date, gender, include_hour, correct_time, longitude = _single_birth(fields)
+    now = datetime.now()
+    try:
+        etag = chart_etag(birth_date, gender, include_hour, correct_time, longitude, now)
+    except ValueError as e:
+        raise HTTPError(400, str(e))
+    response_headers = {
+        'ETag': etag,
+        'Cache-Control': f"public, max-age={min(86400, _seconds_until_next_year(now))}",
+    }
+    if etag in [tag.strip() for tag in headers.get('if-none-match', '').split(',')]:
+        return 304, None, response_headers
+    body = _body_cache.get(etag)
+    if body is None:
+        body = await _run_blocking(_chart_body, birth_date, gender, include_hour, now, correct_time,
+                                   longitude, 'gzip' in headers.get('accept-encoding', ''))
+        _body_cache.set(etag, body)
+    return 200, body, response_headers
+
+
+def handle_bulk(body: bytes, accepts_gzip: bool = False) -> Tuple[int, EncodedBody, Dict[str, str]]:
+    """
+    일괄 계산 (bulk_chart.chart_chunk, saju_batch 일괄 경로)
+
+    본문 해석부터 결과 인코딩/압축까지 모두 CPU 작업이라 route가 작업 스레드에서 실행한다.
+    """
+    payload = _parse_json(body)
+    correct_time = False
+    if isinstance(payload, dict):
+        correct_time = _flag(payload.get('correct_time'))
+        payload = payload.get('records')
+    if not isinstance(payload, list) or not all(isinstance(r, dict) for r in payload):
+        raise HTTPError(400, "본문은 레코드 배열 또는 {\"records\": [...]} 이어야 합니다")
+    if len(payload) > MAX_BULK_RECORDS:
+        raise HTTPError(413, f"한 번에 최대 {MAX_BULK_RECORDS:,}건까지 계산할 수 있습니다")
+    _, rows = chart_chunk((0, payload, correct_time, False))
+    encoded = EncodedBody({'count': len(rows), 'results': rows})
+    if accepts_gzip and len(encoded.raw) >= GZIP_MIN_BYTES:
+        encoded.gzipped()
+    return 200, encoded, {'Cache-Control': 'no-store'}
+
+
+def _parse_json(body: bytes):
+    try:
+        return json.loads(body or b'null')
+    except ValueError as e:
+        raise HTTPError(400, f"JSON 해석 실패: {e}")
+
+
+async def route(method: str, target: str, headers: Dict[str, str], body: bytes) -> Tuple[int, object, Dict[str, str]]:
+    """요청을 처리해 (상태 코드, JSON 본문(dict 또는 EncodedBody), 추가 헤더) 반환"""
+    url = urlsplit(target)
+    if url.path == '/health':
+        health = {'status': 'ok', 'chart_cache': get_chart_cache_stats(),
+                  'response_cache': _body_cache.stats_dict()}
+        if instrumentation.ENABLED:
+            health['instrumentation'] = instrumentation.snapshot()
+        return 200, health, {'Cache-Control': 'no-store'}
+    if url.path not in ('/chart', '/charts'):
+        raise HTTPError(404, f"알 수 없는 경로: {url.path}")
+
+    if method == 'GET' and url.path == '/chart':
+        return await handle_chart(dict(parse_qsl(url.query)), headers)
+    if method != 'POST':
+        raise HTTPError(405, "POST 요청만 지원합니다" if url.path == '/charts' else "GET 또는 POST 요청만 지원합니다")
+    if url.path == '/charts':
+        return await _run_blocking(handle_bulk, body, 'gzip' in headers.get('accept-encoding', ''))
+    payload = _parse_json(body)
+    if not isinstance(payload, dict):
+        raise HTTPError(400, "본문은 JSON 객체여야 합니다")
+    return await handle_chart(payload, headers)
+
+
+def _encode_response(status: int, payload, extra: Dict[str, str],
+                     accepts_gzip: bool, keep_alive: bool, head_only: bool = False) -> bytes:
+    body = b''
+    headers = {'Server': SERVER_NAME, 'Connection': 'keep-alive' if keep_alive else 'close'}
+    headers.update(extra)
+    if status != 304 and payload is not None:
+        encoded = payload if isinstance(payload, EncodedBody) else EncodedBody(payload)
+        body = encoded.raw
+        headers['Content-Type'] = 'application/json; charset=utf-8'
+        headers['Vary'] = 'Accept-Encoding'
+        if accepts_gzip and len(body) >= GZIP_MIN_BYTES:
+            body = encoded.gzipped()
+            headers['Content-Encoding'] = 'gzip'
+    if status != 304:
+        headers['Content-Length'] = str(len(body))
+    lines = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    head = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+    return head if head_only or status == 304 else head + body
+
+
+async def _read_request(reader: asyncio.StreamReader):
+    """요청 하나 읽기: (method, target, version, headers, body), 연결이 끝났으면 None"""
+    try:
+        head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), KEEP_ALIVE_TIMEOUT)
+    except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+        return None
+    except asyncio.LimitOverrunError:
+        raise HTTPError(431, "요청 헤더가 너무 큽니다")
+    request_line, *header_lines = head.decode('latin-1').rstrip('\r\n').split('\r\n')
+    try:
+        method, target, version = request_line.split(' ')
+    except ValueError:
+        raise HTTPError(400, f"잘못된 요청 줄: {request_line}")
+    headers = {}
+    for line in header_lines:
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    body = b''
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        raise HTTPError(411, "Content-Length가 필요합니다")
+    length = int(headers.get('content-length') or 0)
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, "요청 본문이 너무 큽니다")
+    if length:
+        body = await reader.readexactly(length)
+    return method.upper(), target, version, headers, body
+
+
+async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """연결 하나 처리 (keep-alive면 여러 요청)"""
+    try:
+        while True:
+            try:
+                request = await _read_request(reader)
+            except HTTPError as e:
+                writer.write(_encode_response(e.status, {'error': e.message}, {}, False, False))
+                break
+            if request is None:
+                break
+            method, target, version, headers, body = request
+            connection = headers.get('connection', '').lower()
+            keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+            accepts_gzip = 'gzip' in headers.get('accept-encoding', '')
+            try:
+                status, payload, extra = await route('GET' if method == 'HEAD' else method, target, headers, body)
+            except HTTPError as e:
+                status, payload, extra = e.status, {'error': e.message}, {}
+            except Exception as e:
+                print(f"요청 처리 오류 ({method} {target}): {e}")
+                status, payload, extra = 500, {'error': '서버 오류'}, {}
+            writer.write(_encode_response(status, payload, extra, accepts_gzip, keep_alive,
+                                          head_only=method == 'HEAD'))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host: str = '127.0.0.1', port: int = 8080):
+    """서버 실행 (중단될 때까지)"""
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=COMPUTE_WORKERS, thread_name_prefix='chart-compute'))
+    server = await asyncio.start_server(handle_connection, host, port, limit=MAX_HEADER_BYTES)
+    print(f"사주 API 서버: http://{host}:{port} (/chart, /charts, /health)")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='사주 계산 HTTP JSON API 서버')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--instrument', action='store_true', help='단계별 계측을 켜고 /health에 표시')
+    args = parser.parse_args()
+    if args.instrument:
+        instrumentation.enable()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
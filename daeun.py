@@ -2,7 +2,10 @@
 대운(大運) 계산 모듈
 Major Luck Cycles Calculator Module
 """
-from datetime import datetime, timedelta
+from datetime import datetime
+
+import instrumentation
+from solar_terms import next_jeol, previous_jeol, to_minutes
 
 # 천간과 지지
 STEMS = ['甲', '乙', '丙', '丁', '戊', '己', '庚', '辛', '壬', '癸']
@@ -11,23 +14,6 @@ BRANCHES = ['子', '丑', '寅', '卯', '辰', '巳', '午', '未', '申', '酉'
 # 양간
 YANG_STEMS = ['甲', '丙', '戊', '庚', '壬']
 
-# 월 절입일 근사치 (양력 기준)
-# 실제로는 정확한 절기 계산이 필요하지만, 근사치 사용
-JEOLIP_DATES = {
-    1: (2, 4),   # 입춘 (2월 4일경)
-    2: (3, 6),   # 경칩 (3월 6일경)
-    3: (4, 5),   # 청명 (4월 5일경)
-    4: (5, 6),   # 입하 (5월 6일경)
-    5: (6, 6),   # 망종 (6월 6일경)
-    6: (7, 7),   # 소서 (7월 7일경)
-    7: (8, 8),   # 입추 (8월 8일경)
-    8: (9, 8),   # 백로 (9월 8일경)
-    9: (10, 8),  # 한로 (10월 8일경)
-    10: (11, 7), # 입동 (11월 7일경)
-    11: (12, 7), # 대설 (12월 7일경)
-    12: (1, 6)   # 소한 (1월 6일경)
-}
-
 
 def get_daeun_direction(gender: str, year_stem: str) -> str:
     """
@@ -59,60 +45,35 @@ def calculate_daeun_start_age(birth_date: datetime, gender: str, year_stem: str,
     대운 시작 나이 계산 (전통 방식)
     
     3일 = 1년 원칙 적용
-    출생일부터 다음/이전 절입일까지의 일수를 계산하여 대운수 산출
+    출생 시각부터 다음/이전 절입 시각(solar_terms, 분 단위)까지의 일수를 계산하여 대운수 산출
     
     Args:
         birth_date: 생년월일시
         gender: 성별 ('남' 또는 '여')
         year_stem: 년간 (한자)
-        month: 절월 (1-12, 입춘 기준)
+        month: 절월 (1-12, 입춘 기준) - 절입 시각은 출생 시각으로 직접 찾으므로 참고용
     
     Returns:
         대운 시작 나이 (최소 1세)
     """
     direction = get_daeun_direction(gender, year_stem)
     
-    birth_year = birth_date.year
     birth_month = birth_date.month
     birth_day = birth_date.day
+    birth_minutes = to_minutes(birth_date)
     
     try:
         if direction == '순행':
-            # 다음 절입일 찾기
-            # month는 절월 기준이므로, 다음 절월의 절입일을 찾음
-            next_month = month + 1 if month < 12 else 1
-            next_jeolip_month, next_jeolip_day = JEOLIP_DATES.get(next_month, (month + 1, 5))
-            
-            # 다음 절입일 날짜 생성
-            # 현재 월보다 다음 절입일 월이 작으면 다음 해
-            if next_jeolip_month < birth_month or \
-               (next_jeolip_month == birth_month and next_jeolip_day <= birth_day):
-                next_jeolip_year = birth_year + 1
-            else:
-                next_jeolip_year = birth_year
-            
-            next_jeolip_date = datetime(next_jeolip_year, next_jeolip_month, next_jeolip_day)
-            days_diff = (next_jeolip_date - birth_date).days
-            
+            # 다음 절입 시각까지
+            days_diff = (next_jeol(birth_minutes) - birth_minutes) // 1440
         else:  # 역행
-            # 이전 절입일 찾기
-            # 현재 절월의 절입일을 찾음
-            current_jeolip_month, current_jeolip_day = JEOLIP_DATES.get(month, (birth_month, 5))
-            
-            # 현재 절월의 절입일 날짜 생성
-            # 현재 월보다 절입일 월이 크면 이전 해
-            if current_jeolip_month > birth_month or \
-               (current_jeolip_month == birth_month and current_jeolip_day > birth_day):
-                current_jeolip_year = birth_year - 1
-            else:
-                current_jeolip_year = birth_year
-            
-            current_jeolip_date = datetime(current_jeolip_year, current_jeolip_month, current_jeolip_day)
-            days_diff = (birth_date - current_jeolip_date).days
+            # 현재 절월의 절입 시각부터
+            days_diff = (birth_minutes - previous_jeol(birth_minutes)) // 1440
             
     except ValueError as e:
-        # 잘못된 날짜 (예: 2월 30일)
+        # 절기 계산 지원 범위 밖
         print(f"Date calculation error: {e}")
+        instrumentation.count('daeun.term_range_fallback')
         days_diff = 15  # 기본값: 약 5세
     
     # 음수 방지
@@ -123,6 +84,7 @@ def calculate_daeun_start_age(birth_date: datetime, gender: str, year_stem: str,
         # 너무 크면 월 단위로 다시 계산 (간단한 근사)
         # 보통 15~45일 사이여야 정상
         print(f"Warning: Abnormal days_diff={days_diff} detected for {birth_date}. Using fallback calculation.")
+        instrumentation.count('daeun.abnormal_days_diff')
         days_diff = 15 + ((birth_month * birth_day) % 30)  # 15~45일 범위로 조정 (결정적)
     
     # 3일 = 1년 계산 (전통 방식)
@@ -0,0 +1,198 @@
+"""
+추가 질문 맥락 압축 모듈
+Token-Budgeted Context Compaction for Follow-up Questions
+
+추가 질문마다 이전 풀이 전체(보통 한글 3000자 이상)를 다시 보내지 않도록,
+풀이를 섹션으로 나누고 섹션별 요약과 이전 질문/답변 요약을 한 번만 만들어 보관한다.
+질문마다 관련 있는 섹션만 원문으로 넣고 나머지는 요약으로 넣되, 전체 프롬프트가
+토큰 예산을 넘지 않게 고른다.
+
+세션마다 FollowupContext 하나를 st.session_state에 두고 쓴다.
+
+    context = FollowupContext(interpretation)
+    text = context.render("올해 이직해도 될까요?", budget_tokens=1500)
+    context.add_turn(question, answer)
+"""
+import importlib.util
+import math
+import re
+from typing import List, NamedTuple, Optional, Set
+
+# 토큰 수 계산 (tiktoken이 있으면 정확히, 없으면 근사). 앱 시작 시간을 늘리지 않도록 처음 셀 때 임포트한다
+TIKTOKEN_AVAILABLE = importlib.util.find_spec('tiktoken') is not None
+
+# 섹션 요약과 질문/답변 요약의 최대 토큰 수
+SECTION_SUMMARY_TOKENS = 100
+TURN_SUMMARY_TOKENS = 80
+
+# 보관하는 최근 질문/답변 수 (앱의 대화 기록도 이만큼만 남긴다)
+MAX_TURNS = 20
+
+_encoding = None
+_SECTION_SPLIT = re.compile(r'(?m)^(?=## )')
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?。])\s+|\n+')
+_NON_WORD = re.compile(r'[\W_]+')
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    텍스트의 토큰 수
+
+    tiktoken이 없으면 근사값을 쓴다: 한글 등 ASCII 밖 문자는 1자당 1토큰,
+    ASCII는 4자당 1토큰 (UTF-8 바이트 수 차이로 ASCII 밖 문자 수를 센다).
+    """
+    global _encoding
+    if TIKTOKEN_AVAILABLE and _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding('o200k_base')
+        except Exception:
+            _encoding = False   # 인코딩 파일을 받을 수 없으면 근사값 사용
+    if _encoding:
+        return len(_encoding.encode(text))
+    non_ascii = (len(text.encode('utf-8')) - len(text)) // 2
+    return non_ascii + math.ceil((len(text) - non_ascii) / 4)
+
+
+def _bigrams(text: str) -> Set[str]:
+    """공백/문장부호를 뺀 글자 2-gram (형태소 분석 없이 한글 관련도 비교용)"""
+    words = _NON_WORD.sub(' ', text.lower()).split()
+    return {word[i:i + 2] for word in words for i in range(max(1, len(word) - 1))}
+
+
+def _truncate_tokens(text: str, max_tokens: int) -> str:
+    """text를 '…'까지 합쳐 max_tokens 안에 들어가는 가장 긴 앞부분으로 (estimate_tokens 기준 이진 탐색)"""
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(text[:middle] + '…') <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low] + '…'
+
+
+def _leading_sentences(text: str, max_tokens: int) -> str:
+    """앞 문장부터 max_tokens 안에 들어가는 만큼 (첫 문장이 너무 길면 잘라서)"""
+    picked, used = [], 0
+    for sentence in _SENTENCE_SPLIT.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        tokens = estimate_tokens(sentence)
+        if used + tokens > max_tokens:
+            if not picked:
+                picked.append(_truncate_tokens(sentence, max_tokens))
+            break
+        picked.append(sentence)
+        used += tokens
+    return ' '.join(picked)
+
+
+class Section(NamedTuple):
+    """풀이의 섹션 하나 (제목 줄이 없으면 title은 빈 문자열)"""
+    title: str
+    text: str
+    tokens: int
+    summary: str
+    summary_tokens: int
+    bigrams: Set[str]
+    title_bigrams: Set[str]
+
+
+class Turn(NamedTuple):
+    """이전 질문과 답변 요약"""
+    summary: str
+    tokens: int
+
+
+class FollowupContext:
+    """
+    추가 질문용 대화 맥락 (풀이 섹션, 섹션 요약, 질문/답변 요약)
+
+    Args:
+        interpretation: AI 풀이 전체 텍스트
+        history: 이미 있는 대화 기록 [{'question', 'answer'}, ...]
+    """
+
+    def __init__(self, interpretation: str, history: Optional[List[dict]] = None):
+        self.interpretation = interpretation
+        self.sections: List[Section] = []
+        for block in _SECTION_SPLIT.split(interpretation):
+            block = block.strip()
+            if not block:
+                continue
+            first_line, _, body = block.partition('\n')
+            title = first_line.lstrip('#').strip() if first_line.startswith('## ') else ''
+            body = body if title else block
+            summary = '\n'.join(part for part in (first_line if title else '',
+                                                  _leading_sentences(body, SECTION_SUMMARY_TOKENS)) if part)
+            self.sections.append(Section(title, block, estimate_tokens(block), summary,
+                                         estimate_tokens(summary), _bigrams(block), _bigrams(title)))
+        self.turns: List[Turn] = []
+        for entry in history or []:
+            self.add_turn(entry['question'], entry['answer'])
+
+    def add_turn(self, question: str, answer: str):
+        """질문/답변을 요약해 보관 (최근 MAX_TURNS개만)"""
+        summary = f"Q: {question.strip()}\nA: {_leading_sentences(answer, TURN_SUMMARY_TOKENS)}"
+        self.turns.append(Turn(summary, estimate_tokens(summary)))
+        del self.turns[:-MAX_TURNS]
+
+    def relevance(self, question: str) -> List[float]:
+        """섹션별 질문 관련도 (질문 2-gram이 섹션에 있는 비율, 제목에 있으면 가중)"""
+        query = _bigrams(question)
+        if not query:
+            return [0.0] * len(self.sections)
+        return [(len(query & s.bigrams) + 2 * len(query & s.title_bigrams)) / len(query)
+                for s in self.sections]
+
+    def render(self, question: str, budget_tokens: int) -> str:
+        """
+        질문에 맞춘 이전 풀이 맥락 (budget_tokens 이하)
+
+        1. 관련도가 높은 섹션부터 원문을 넣는다.
+        2. 남은 섹션은 요약을 넣는다.
+        3. 최근 질문/답변 요약부터 넣는다.
+        원문이나 요약이 예산을 넘는 항목은 건너뛴다. 섹션은 원래 순서대로, 대화는 시간 순서대로 쓴다.
+        """
+        used = len(self.sections) + 8   # 구분 줄과 대화 요약 제목 몫
+        chosen = [None] * len(self.sections)   # 섹션별 넣을 텍스트
+        scores = self.relevance(question)
+        for index in sorted(range(len(self.sections)), key=lambda i: -scores[i]):
+            section = self.sections[index]
+            if scores[index] > 0 and used + section.tokens <= budget_tokens:
+                chosen[index] = section.text
+                used += section.tokens
+        for index, section in enumerate(self.sections):
+            if chosen[index] is None and used + section.summary_tokens <= budget_tokens:
+                chosen[index] = section.summary
+                used += section.summary_tokens
+        turns = []
+        for turn in reversed(self.turns):
+            if used + turn.tokens > budget_tokens:
+                continue
+            turns.append(turn.summary)
+            used += turn.tokens
+
+        parts = [text for text in chosen if text]
+        if turns:
+            parts.append("### 이전 질문과 답변 요약\n" + "\n\n".join(reversed(turns)))
+        return "\n\n".join(parts)
+
+
+if __name__ == '__main__':
+    sample = "\n\n".join(
+        f"## {n}. {title}\n\n" + f"{title}에 관한 풀이 문장입니다. " * 40
+        for n, title in enumerate(['핵심 성향 요약', '기질과 심리 패턴', '주요귀인과 살성',
+                                   '평생운세 (초년/중년/말년)', '올해운세 (재물운 건강운 자녀운 애정운)'], 1)
+    )
+    context = FollowupContext(sample)
+    context.add_turn("연애운은 어떤가요?", "연애에서는 천천히 신뢰를 쌓는 편입니다. " * 20)
+    question = "올해 재물운과 이직 시기가 궁금해요"
+    print(f"토큰 계산: {'tiktoken' if TIKTOKEN_AVAILABLE else '근사값'}")
+    print(f"원문 {estimate_tokens(sample)}토큰, 관련도 {[round(s, 2) for s in context.relevance(question)]}")
+    for budget in (300, 800, 3000):
+        text = context.render(question, budget)
+        print(f"예산 {budget:>5}토큰 → {estimate_tokens(text):>5}토큰, "
+              f"원문 섹션 {sum(s.text in text for s in context.sections)}개")
@@ -1,25 +1,19 @@
 """
 형충회합(刑沖會合) 계산 모듈
 Punishments, Clashes, and Harmonies Module
-"""
 
-# 지지 충(沖) - 정반대 위치
-CHUNG_TABLE = {
-    '子': '午', '丑': '未', '寅': '申',
-    '卯': '酉', '辰': '戌', '巳': '亥',
-    '午': '子', '未': '丑', '申': '寅',
-    '酉': '卯', '戌': '辰', '亥': '巳'
-}
+find_relations/relation_bits는 비트마스크 엔진이다. 지지는 12비트, 천간은 10비트
+마스크로 표현하고, 모든 관계(충, 육합, 삼합, 반합, 방합, 형, 파, 해, 천간 합/충)를
+미리 만든 마스크와의 AND/popcount로 판정한다. 결과는 문자열 대신 구조화된
+Relation 튜플로 돌려주고, 표시용 문자열은 format_relation으로 만든다.
 
-# 지지 육합(六合)
-YUKHAP_TABLE = {
-    '子': '丑', '丑': '子',
-    '寅': '亥', '亥': '寅',
-    '卯': '戌', '戌': '卯',
-    '辰': '酉', '酉': '辰',
-    '巳': '申', '申': '巳',
-    '午': '未', '未': '午'
-}
+표준 지지 3~4개의 관계 비트셋은 이 엔진으로 임포트 때 만든 branch_table.RELATION_RECORDS에서 읽는다.
+
+get_* 함수(충/육합/삼합/방합/형)와 describe_relations도 같은 비트셋을 쓰되, 기존 형식대로
+관계인 두 위치마다 한 항목씩 보여 준다 (같은 지지가 겹쳐도 쌍마다 나뉜다). 참여 위치를 한 항목으로
+합친 보기는 find_relations/group_relations다.
+"""
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
 
 # 지지 삼합(三合)
 SAMHAP_TABLE = {
@@ -40,10 +34,13 @@ BANGHAP_TABLE = {
 # 지지 형(刑)
 # 무은지형: 寅刑巳, 巳刑申, 申刑寅 (恩을 배반하는 형)
 # 무례지형: 丑刑戌, 戌刑未, 未刑丑 (예의없는 형)
+# 상형: 子刑卯, 卯刑子 (무례지형과 함께 무례지형으로 묶기도 함)
 # 자형: 辰辰, 午午, 酉酉, 亥亥 (스스로를 해치는 형)
+# 자형 외에는 서로 다른 두 글자 이상이 있어야 성립한다 (寅寅처럼 같은 글자만 겹친 것은 형이 아님)
 HYUNG_GROUPS = {
     '무은지형': ['寅', '巳', '申'],
     '무례지형': ['丑', '戌', '未'],
+    '상형': ['子', '卯'],
     '자형': ['辰', '午', '酉', '亥']
 }
 
@@ -55,31 +52,372 @@ def extract_hanja(text: str) -> str:
     return text
 
 
+# ===== 비트마스크 엔진 =====
+
+BRANCH_ORDER = '子丑寅卯辰巳午未申酉戌亥'
+STEM_ORDER = '甲乙丙丁戊己庚辛壬癸'
+POSITION_NAMES = ('년', '월', '일', '시')
+
+# 0~4095의 비트 수 (12비트 마스크 popcount)
+# 비트를 하나 늘릴 때마다 앞 절반에 1을 더한 표를 이어 붙인다 (임포트 시 4096번 bin() 호출을 피함)
+POPCOUNT = b'\x00'
+for _bit in range(12):
+    POPCOUNT += POPCOUNT.translate(bytes(range(1, 256)) + b'\x00')
+del _bit
+
+
+def branch_mask(chars: str) -> int:
+    """지지 한자 문자열을 12비트 마스크로 (예: '申子辰')"""
+    mask = 0
+    for c in chars:
+        mask |= 1 << BRANCH_ORDER.index(c)
+    return mask
+
+
+def stem_mask(chars: str) -> int:
+    """천간 한자 문자열을 10비트 마스크로"""
+    mask = 0
+    for c in chars:
+        mask |= 1 << STEM_ORDER.index(c)
+    return mask
+
+
+class RelationDef(NamedTuple):
+    """관계 정의: 대상('branch'/'stem') 마스크 중 min_count개 이상이 있으면 성립"""
+    kind: str
+    members: str
+    mask: int
+    min_count: int
+    target: str = 'branch'
+    result: Optional[str] = None
+
+
+class Relation(NamedTuple):
+    """
+    사주에서 찾은 관계
+
+    kind: 'chung', 'yukhap', 'samhap', 'banhap', 'banghap', 'hyung', 'pa', 'hae',
+          'stem_hap', 'stem_chung'
+    positions: 관계에 참여한 기둥 위치 (0=년, 1=월, 2=일, 3=시)
+    members: 참여한 글자 (한자)
+    result: 합화 오행/국 또는 형의 종류 (없으면 None)
+    """
+    kind: str
+    positions: Tuple[int, ...]
+    members: Tuple[str, ...]
+    result: Optional[str] = None
+
+
+def _pair_defs(kind, pairs, target='branch', results=None):
+    to_mask = branch_mask if target == 'branch' else stem_mask
+    return [RelationDef(kind, pair, to_mask(pair), 2, target, results[n] if results else None)
+            for n, pair in enumerate(pairs)]
+
+
+# 관계 정의 (순서 = relation_bits의 비트 위치)
+RELATION_DEFS = tuple(
+    _pair_defs('chung', ['子午', '丑未', '寅申', '卯酉', '辰戌', '巳亥'])
+    + _pair_defs('yukhap', ['子丑', '寅亥', '卯戌', '辰酉', '巳申', '午未'],
+                 results=['土', '木', '火', '金', '水', '火'])
+    + [RelationDef('samhap', key, branch_mask(key), 3, 'branch', value) for key, value in SAMHAP_TABLE.items()]
+    # 반합: 삼합 중 왕지(子午卯酉)를 포함한 두 글자
+    + _pair_defs('banhap', ['申子', '子辰', '亥卯', '卯未', '寅午', '午戌', '巳酉', '酉丑'],
+                 results=['水局', '水局', '木局', '木局', '火局', '火局', '金局', '金局'])
+    + [RelationDef('banghap', key, branch_mask(key), 3, 'branch', value) for key, value in BANGHAP_TABLE.items()]
+    + [RelationDef('hyung', ''.join(members), branch_mask(''.join(members)), 2, 'branch', name)
+       for name, members in HYUNG_GROUPS.items() if name != '자형']
+    + _pair_defs('pa', ['子酉', '丑辰', '寅亥', '卯午', '巳申', '未戌'])
+    + _pair_defs('hae', ['子未', '丑午', '寅巳', '卯辰', '申亥', '酉戌'])
+    + _pair_defs('stem_hap', ['甲己', '乙庚', '丙辛', '丁壬', '戊癸'], 'stem',
+                 results=['土', '金', '水', '木', '火'])
+    + _pair_defs('stem_chung', ['甲庚', '乙辛', '丙壬', '丁癸'], 'stem')
+)
+
+# 자형(自刑): 같은 지지가 두 번 이상 (辰辰, 午午, 酉酉, 亥亥)
+JAHYUNG_MASK = branch_mask(''.join(HYUNG_GROUPS['자형']))
+JAHYUNG_BIT = len(RELATION_DEFS)
+
+# 삼합이 성립하면 같은 국의 반합은 따로 보고하지 않는다
+_SAMHAP_BANHAP = {n: [m for m, d in enumerate(RELATION_DEFS)
+                      if d.kind == 'banhap' and d.result == RELATION_DEFS[n].result]
+                  for n, d in enumerate(RELATION_DEFS) if d.kind == 'samhap'}
+
+
+# 마스크별 관계 비트 (지지 4개까지의 마스크는 793가지, 천간은 1024가지뿐이라 한 번 계산해 재사용)
+_BRANCH_DEFS = tuple(n for n, d in enumerate(RELATION_DEFS) if d.target == 'branch')
+_STEM_DEFS = tuple(n for n, d in enumerate(RELATION_DEFS) if d.target == 'stem')
+_BRANCH_SET_BITS: Dict[int, int] = {}
+_STEM_SET_BITS: Dict[int, int] = {}
+
+
+def _set_bits(mask: int, defs: Tuple[int, ...], cache: Dict[int, int]) -> int:
+    """마스크 하나에서 성립하는 관계 비트 (defs 범위만, 결과는 cache에 저장)"""
+    bits = cache.get(mask)
+    if bits is None:
+        bits = 0
+        for n in defs:
+            d = RELATION_DEFS[n]
+            if POPCOUNT[mask & d.mask] >= d.min_count:
+                bits |= 1 << n
+        for n, banhap in _SAMHAP_BANHAP.items():
+            if bits >> n & 1:
+                for m in banhap:
+                    bits &= ~(1 << m)
+        cache[mask] = bits
+    return bits
+
+
+def relation_bits(branch_bits: int, stem_bits: int, duplicate_bits: int = 0) -> int:
+    """
+    지지/천간 마스크로 성립하는 관계 비트셋 계산
+
+    Args:
+        branch_bits: 사주 지지의 12비트 마스크
+        stem_bits: 사주 천간의 10비트 마스크
+        duplicate_bits: 두 번 이상 나온 지지의 12비트 마스크 (자형 판정용)
+
+    Returns:
+        비트 n = RELATION_DEFS[n] 성립, 비트 JAHYUNG_BIT = 자형
+    """
+    bits = _set_bits(branch_bits, _BRANCH_DEFS, _BRANCH_SET_BITS)
+    if stem_bits:
+        bits |= _set_bits(stem_bits, _STEM_DEFS, _STEM_SET_BITS)
+    if duplicate_bits & JAHYUNG_MASK:
+        bits |= 1 << JAHYUNG_BIT
+    return bits
+
+
+_ORDER_INDEX = {order: {c: i for i, c in enumerate(order)} for order in (BRANCH_ORDER, STEM_ORDER)}
+
+
+def _indices(chars: Sequence[Optional[str]], order: str) -> List[Optional[int]]:
+    """한자/한글 병기 표기('자(子)')도 받아 인덱스로 (None/'미상'은 None)"""
+    index = _ORDER_INDEX[order]
+    indices = []
+    for c in chars:
+        i = index.get(c)
+        if i is None and c is not None and c != '미상':
+            i = order.index(extract_hanja(c))
+        indices.append(i)
+    return indices
+
+
+# 지지/천간 인덱스 조합별 Relation 튜플 (조합은 지지 12⁴, 천간 10⁴ 정도라 처음 본 조합만 만든다)
+_BRANCH_RELATIONS: Dict[Tuple[Optional[int], ...], Tuple[Relation, ...]] = {}
+_STEM_RELATIONS: Dict[Tuple[Optional[int], ...], Tuple[Relation, ...]] = {}
+
+
+_branch_table_module = None
+
+
+def _branch_table():
+    """branch_table 모듈 (branch_table이 임포트할 때 이 모듈의 엔진으로 표를 만들므로 처음 쓸 때 임포트)"""
+    global _branch_table_module
+    if _branch_table_module is None:
+        import branch_table
+        _branch_table_module = branch_table
+    return _branch_table_module
+
+
+def _index_bits(idx: Tuple[Optional[int], ...], target: str) -> Tuple[int, int]:
+    """
+    인덱스 조합 하나(지지 또는 천간)의 관계 비트셋과 중복 지지 마스크
+
+    표준 지지 3~4개는 지지 관계 조회표(branch_table.RELATION_RECORDS)에서 읽고,
+    빈 자리가 있는 지지와 천간은 relation_bits로 직접 계산한다.
+    """
+    bits = duplicate_bits = 0
+    for i in idx:
+        if i is not None:
+            if bits >> i & 1:
+                duplicate_bits |= 1 << i
+            bits |= 1 << i
+    if target != 'branch':
+        return relation_bits(0, bits), 0
+    if 3 <= len(idx) <= 4 and None not in idx:
+        table = _branch_table()
+        return table.RELATION_RECORDS[table.combination_index(idx)], duplicate_bits
+    return relation_bits(bits, 0, duplicate_bits), duplicate_bits
+
+
+def _relations_of(idx: Tuple[Optional[int], ...], target: str) -> Tuple[Relation, ...]:
+    """인덱스 조합 하나(지지 또는 천간)의 Relation 튜플 (조합별로 한 번 계산)"""
+    cache = _BRANCH_RELATIONS if target == 'branch' else _STEM_RELATIONS
+    relations = cache.get(idx)
+    if relations is not None:
+        return relations
+
+    bits, duplicate_bits = _index_bits(idx, target)
+    order = BRANCH_ORDER if target == 'branch' else STEM_ORDER
+    found = []
+    # 성립한 비트만 낮은 쪽부터 (자형 비트가 가장 높다)
+    while bits:
+        low = bits & -bits
+        bits ^= low
+        n = low.bit_length() - 1
+        if n == JAHYUNG_BIT:
+            for b in range(12):
+                if (duplicate_bits & JAHYUNG_MASK) >> b & 1:
+                    positions = tuple(p for p, i in enumerate(idx) if i == b)
+                    found.append(Relation('hyung', positions, (BRANCH_ORDER[b],) * len(positions), '자형'))
+            break
+        d = RELATION_DEFS[n]
+        positions = tuple(p for p, i in enumerate(idx) if i is not None and d.mask >> i & 1)
+        found.append(Relation(d.kind, positions, tuple(order[idx[p]] for p in positions), d.result))
+    relations = cache[idx] = tuple(found)
+    return relations
+
+
+def find_relations(stems: Sequence[Optional[str]], branches: Sequence[Optional[str]]) -> List[Relation]:
+    """
+    사주의 모든 관계 찾기 (비트마스크 엔진)
+
+    Args:
+        stems: [년간, 월간, 일간, 시간] 한자 (시간 미상이면 3개 또는 None, 지지만 볼 때는 빈 리스트)
+        branches: [년지, 월지, 일지, 시지] 한자
+
+    Returns:
+        Relation 리스트 (지지 관계를 RELATION_DEFS 순서로, 자형은 지지 관계의 마지막, 그 뒤에 천간 관계)
+    """
+    relations = list(_relations_of(tuple(_indices(branches, BRANCH_ORDER)), 'branch'))
+    if stems:
+        relations.extend(_relations_of(tuple(_indices(stems, STEM_ORDER)), 'stem'))
+    return relations
+
+
+# 관계 종류별 표시 이름 (표시 순서)
+RELATION_LABELS = {
+    'chung': '충', 'yukhap': '육합', 'samhap': '삼합', 'banhap': '반합', 'banghap': '방합',
+    'hyung': '형', 'pa': '파', 'hae': '해', 'stem_hap': '천간합', 'stem_chung': '천간충',
+}
+
+
+def format_relation(relation: Relation, label: bool = True) -> str:
+    """
+    Relation을 표시용 문자열로
+
+    Args:
+        relation: find_relations 결과 항목
+        label: 앞에 관계 이름을 붙일지 여부
+
+    Returns:
+        예: '충: 년지-일지(丑-未)', label=False면 '년지-일지(丑-未)'
+        (합화 오행/국이나 형의 종류가 있으면 뒤에 ' → 木局' 형태로 붙는다)
+    """
+    suffix = '간' if relation.kind.startswith('stem') else '지'
+    places = '-'.join(POSITION_NAMES[p] + suffix for p in relation.positions)
+    text = f"{places}({'-'.join(relation.members)})"
+    if label:
+        text = f"{RELATION_LABELS[relation.kind]}: {text}"
+    return f"{text} → {relation.result}" if relation.result else text
+
+
+def group_relations(relations: Sequence[Relation]) -> Dict[str, List[str]]:
+    """
+    Relation 리스트를 종류별 표시 문자열 리스트로 (RELATION_LABELS의 모든 종류 키 포함)
+
+    Returns:
+        {'chung': ['년지-월지(子-午)'], 'hyung': ['년지-월지(寅-巳) → 무은지형'], ...}
+    """
+    grouped = {kind: [] for kind in RELATION_LABELS}
+    for relation in relations:
+        grouped[relation.kind].append(format_relation(relation, label=False))
+    return grouped
+
+
+def _describe(idx: Tuple[Optional[int], ...], target: str) -> Dict[str, Tuple[str, ...]]:
+    """
+    인덱스 조합 하나의 관계를 쌍마다 한 항목씩 표시 문자열로 (get_*, describe_relations 형식)
+
+    충/육합/반합/파/해/천간 합충: 관계인 두 위치마다 '년지-일지(子-午)' (반합만 ' → 水局'을 붙인다)
+    삼합/방합: '년지-월지-시지(申子辰) → 水局'
+    형: '무은지형: 년지-월지(寅巳)', 자형은 '자형: 일지-시지(午)'
+    """
+    bits, duplicate_bits = _index_bits(idx, target)
+    suffix, order = ('지', BRANCH_ORDER) if target == 'branch' else ('간', STEM_ORDER)
+    names = [POSITION_NAMES[p] + suffix for p in range(len(idx))]
+    described = {}
+    while bits:
+        low = bits & -bits
+        bits ^= low
+        n = low.bit_length() - 1
+        if n == JAHYUNG_BIT:
+            for b in range(12):
+                if (duplicate_bits & JAHYUNG_MASK) >> b & 1:
+                    places = '-'.join(names[p] for p, i in enumerate(idx) if i == b)
+                    described.setdefault('hyung', []).append((None, f"자형: {places}({BRANCH_ORDER[b]})"))
+            break
+        d = RELATION_DEFS[n]
+        positions = [p for p, i in enumerate(idx) if i is not None and d.mask >> i & 1]
+        entries = described.setdefault(d.kind, [])
+        if d.kind == 'hyung':
+            members = ''.join(order[idx[p]] for p in positions)
+            entries.append((None, f"{d.result}: {'-'.join(names[p] for p in positions)}({members})"))
+        elif d.min_count > 2:
+            entries.append((None, f"{'-'.join(names[p] for p in positions)}({d.members}) → {d.result}"))
+        else:
+            for a, i in enumerate(positions):
+                for j in positions[a + 1:]:
+                    if idx[i] != idx[j]:
+                        text = f"{names[i]}-{names[j]}({order[idx[i]]}-{order[idx[j]]})"
+                        if d.kind == 'banhap':
+                            text += f" → {d.result}"
+                        entries.append(((i, j), text))
+    # 쌍 관계는 위치 쌍 순서로 (같은 종류의 정의가 여럿 성립해도 년지-월지, 년지-일지, ... 순)
+    return {kind: tuple(text for _, text in (sorted(entries) if entries[0][0] is not None else entries))
+            for kind, entries in described.items()}
+
+
+# 지지/천간 인덱스 조합별 describe 결과 (get_*가 조합마다 한 번만 formatting)
+_BRANCH_TEXTS: Dict[Tuple[Optional[int], ...], Dict[str, Tuple[str, ...]]] = {}
+_STEM_TEXTS: Dict[Tuple[Optional[int], ...], Dict[str, Tuple[str, ...]]] = {}
+
+
+def _described(chars: Sequence[Optional[str]], target: str) -> Dict[str, Tuple[str, ...]]:
+    """지지 또는 천간 리스트의 describe 결과 (조합별 메모)"""
+    cache, order = (_BRANCH_TEXTS, BRANCH_ORDER) if target == 'branch' else (_STEM_TEXTS, STEM_ORDER)
+    idx = tuple(_indices(chars, order))
+    texts = cache.get(idx)
+    if texts is None:
+        texts = cache[idx] = _describe(idx, target)
+    return texts
+
+
+def describe_relations(stems: Sequence[Optional[str]], branches: Sequence[Optional[str]]) -> Dict[str, List[str]]:
+    """
+    사주의 모든 관계를 종류별 표시 문자열로 (관계인 두 위치마다 한 항목, get_*와 같은 형식)
+
+    find_relations/group_relations는 같은 관계에 참여한 위치를 한 항목으로 합쳐 보여 주고
+    (예: 子子午의 충 → '년지-월지-일지(子-子-午)'), 이 함수는 쌍마다 나눠 보여 준다
+    (예: '년지-일지(子-午)', '월지-일지(子-午)').
+
+    Args:
+        stems: [년간, 월간, 일간, 시간] 한자 (지지만 볼 때는 빈 리스트)
+        branches: [년지, 월지, 일지, 시지] 한자
+
+    Returns:
+        RELATION_LABELS의 모든 종류 키를 가진 dict
+    """
+    described = {kind: [] for kind in RELATION_LABELS}
+    for kind, texts in _described(branches, 'branch').items():
+        described[kind] = list(texts)
+    if stems:
+        for kind, texts in _described(stems, 'stem').items():
+            described[kind] = list(texts)
+    return described
+
+
 def get_chung(branches: list) -> list:
     """
     충(沖) 관계 찾기
     
     Args:
-        branches: 4개 지지 리스트 [년지, 월지, 일지, 시지]
+        branches: 4개 지지 리스트 [년지, 월지, 일지, 시지] (시간 미상이면 3개)
     
     Returns:
         충 관계 리스트 (예: ['년지-월지(子-午)', '일지-시지(寅-申)'])
     """
-    positions = ['년지', '월지', '일지', '시지']
-    result = []
-    
-    branches_hanja = [extract_hanja(b) for b in branches]
-    
-    # 모든 지지 쌍 확인
-    for i in range(len(branches_hanja)):
-        for j in range(i+1, len(branches_hanja)):
-            b1, b2 = branches_hanja[i], branches_hanja[j]
-            
-            # 충 관계인지 확인
-            if CHUNG_TABLE.get(b1) == b2:
-                result.append(f"{positions[i]}-{positions[j]}({b1}-{b2})")
-    
-    return result
+    return list(_described(branches, 'branch').get('chung', ()))
 
 
 def get_yukhap(branches: list) -> list:
@@ -90,23 +428,9 @@ def get_yukhap(branches: list) -> list:
         branches: 4개 지지 리스트
     
     Returns:
-        육합 관계 리스트
+        육합 관계 리스트 (예: ['월지-일지(子-丑)'])
     """
-    positions = ['년지', '월지', '일지', '시지']
-    result = []
-    
-    branches_hanja = [extract_hanja(b) for b in branches]
-    
-    # 모든 지지 쌍 확인
-    for i in range(len(branches_hanja)):
-        for j in range(i+1, len(branches_hanja)):
-            b1, b2 = branches_hanja[i], branches_hanja[j]
-            
-            # 육합 관계인지 확인
-            if YUKHAP_TABLE.get(b1) == b2:
-                result.append(f"{positions[i]}-{positions[j]}({b1}-{b2})")
-    
-    return result
+    return list(_described(branches, 'branch').get('yukhap', ()))
 
 
 def get_samhap(branches: list) -> list:
@@ -117,25 +441,9 @@ def get_samhap(branches: list) -> list:
         branches: 4개 지지 리스트
     
     Returns:
-        삼합 관계 리스트
+        삼합 관계 리스트 (예: ['년지-월지-시지(申子辰) → 水局'])
     """
-    result = []
-    branches_hanja = [extract_hanja(b) for b in branches]
-    
-    # 삼합 체크
-    for key, value in SAMHAP_TABLE.items():
-        samhap_set = set(key)
-        if samhap_set.issubset(set(branches_hanja)):
-            # 위치 찾기
-            positions = []
-            pos_names = ['년지', '월지', '일지', '시지']
-            for i, b in enumerate(branches_hanja):
-                if b in samhap_set:
-                    positions.append(pos_names[i])
-            
-            result.append(f"{'-'.join(positions)}({key}) → {value}")
-    
-    return result
+    return list(_described(branches, 'branch').get('samhap', ()))
 
 
 def get_banghap(branches: list) -> list:
@@ -146,67 +454,75 @@ def get_banghap(branches: list) -> list:
         branches: 4개 지지 리스트
     
     Returns:
-        방합 관계 리스트
+        방합 관계 리스트 (예: ['년지-월지-일지(寅卯辰) → 木局(東方)'])
     """
-    result = []
-    branches_hanja = [extract_hanja(b) for b in branches]
-    
-    # 방합 체크
-    for key, value in BANGHAP_TABLE.items():
-        banghap_set = set(key)
-        if banghap_set.issubset(set(branches_hanja)):
-            # 위치 찾기
-            positions = []
-            pos_names = ['년지', '월지', '일지', '시지']
-            for i, b in enumerate(branches_hanja):
-                if b in banghap_set:
-                    positions.append(pos_names[i])
-            
-            result.append(f"{'-'.join(positions)}({key}) → {value}")
-    
-    return result
+    return list(_described(branches, 'branch').get('banghap', ()))
 
 
 def get_hyung(branches: list) -> list:
     """
-    형(刑) 관계 찾기
+    형(刑) 관계 찾기 (무은지형, 무례지형, 상형, 자형)
     
     Args:
         branches: 4개 지지 리스트
     
     Returns:
-        형 관계 리스트
-    """
-    result = []
-    branches_hanja = [extract_hanja(b) for b in branches]
-    positions = ['년지', '월지', '일지', '시지']
-    
-    # 무은지형, 무례지형 체크 (3개 중 2개 이상 있으면 형)
-    for hyung_type, hyung_branches in HYUNG_GROUPS.items():
-        if hyung_type == '자형':
-            continue
-        
-        found_branches = [b for b in branches_hanja if b in hyung_branches]
-        if len(found_branches) >= 2:
-            # 위치 찾기
-            pos_list = []
-            for b in found_branches:
-                for i, branch in enumerate(branches_hanja):
-                    if branch == b:
-                        pos_list.append(positions[i])
-                        break
-            
-            result.append(f"{hyung_type}: {'-'.join(pos_list)}({''.join(found_branches)})")
-    
-    # 자형 체크 (같은 지지가 2개 이상)
-    jachung_branches = HYUNG_GROUPS['자형']
-    for branch in jachung_branches:
-        count = branches_hanja.count(branch)
-        if count >= 2:
-            pos_list = [positions[i] for i, b in enumerate(branches_hanja) if b == branch]
-            result.append(f"자형: {'-'.join(pos_list)}({branch})")
-    
-    return result
+        형 관계 리스트 (예: ['무은지형: 년지-월지(寅巳)', '자형: 일지-시지(午)'])
+    """
+    return list(_described(branches, 'branch').get('hyung', ()))
+
+
+def relation_bits_batch(stems, branches):
+    """
+    사주 배열의 관계 비트셋 일괄 계산 (numpy)
+
+    Args:
+        stems: 천간 인덱스 배열 목록 [년간, 월간, 일간, 시간] (각 int 배열, 시간 미상은 -1)
+        branches: 지지 인덱스 배열 목록 [년지, 월지, 일지, 시지]
+
+    Returns:
+        uint64 배열 (비트 의미는 relation_bits와 같다)
+    """
+    import numpy as np
+
+    popcount = np.frombuffer(POPCOUNT, dtype=np.uint8)
+    branches = [np.asarray(b, dtype=np.int64) for b in branches]
+    stems = [np.asarray(t, dtype=np.int64) for t in stems]
+    size = branches[0].shape[0]
+    branch_bits = np.zeros(size, dtype=np.int64)
+    duplicate_bits = np.zeros(size, dtype=np.int64)
+    for b in branches:
+        bit = np.where(b >= 0, np.left_shift(1, np.maximum(b, 0)), 0)
+        duplicate_bits |= branch_bits & bit
+        branch_bits |= bit
+    stem_bits = np.zeros(size, dtype=np.int64)
+    for t in stems:
+        stem_bits |= np.where(t >= 0, np.left_shift(1, np.maximum(t, 0)), 0)
+
+    bits = np.zeros(size, dtype=np.uint64)
+    for n, d in enumerate(RELATION_DEFS):
+        source = branch_bits if d.target == 'branch' else stem_bits
+        hit = popcount[source & d.mask] >= d.min_count
+        bits |= hit.astype(np.uint64) << np.uint64(n)
+    for n, banhap in _SAMHAP_BANHAP.items():
+        has_samhap = (bits >> np.uint64(n)) & np.uint64(1)
+        for m in banhap:
+            bits &= ~(has_samhap << np.uint64(m))
+    bits |= ((duplicate_bits & JAHYUNG_MASK) != 0).astype(np.uint64) << np.uint64(JAHYUNG_BIT)
+    return bits
+
+
+def relation_counts(bits) -> dict:
+    """relation_bits_batch 결과를 관계 종류별 개수 배열로 (자형은 hyung에 포함)"""
+    import numpy as np
+
+    bits = np.asarray(bits, dtype=np.uint64)
+    counts = {}
+    for n, d in enumerate(RELATION_DEFS):
+        hit = ((bits >> np.uint64(n)) & np.uint64(1)).astype(np.uint8)
+        counts[d.kind] = counts.get(d.kind, 0) + hit
+    counts['hyung'] = counts['hyung'] + ((bits >> np.uint64(JAHYUNG_BIT)) & np.uint64(1)).astype(np.uint8)
+    return counts
 
 
 if __name__ == '__main__':
@@ -234,3 +550,8 @@ if __name__ == '__main__':
     branches2 = ['子', '卯', '午', '酉']
     chung2 = get_chung(branches2)
     print(f"충(沖): {chung2}")
+    
+    # 테스트 3: 비트마스크 엔진 (파/해/반합/천간 합충 포함)
+    print("\n=== 전체 관계: 己丑 丙子 丁未 戊申 ===")
+    for relation in find_relations(['己', '丙', '丁', '戊'], branches):
+        print(format_relation(relation))
@@ -0,0 +1,181 @@
+"""
+임포트 시간 보고 및 예산 확인
+Import-Time Report and Cold-Start Budget
+
+새 파이썬 프로세스에서 `python -X importtime`으로 계산 모듈과 앱을 임포트해
+콜드 스타트 시간과 오래 걸리는 모듈을 보고한다. 항목마다 시간 예산과
+'처음 사용할 때까지 임포트하면 안 되는 모듈' 목록을 두고, 예산을 넘기거나
+금지 모듈이 임포트되면 OVER BUDGET으로 표시하고 종료 코드 1을 돌려준다.
+
+첫 실행은 바이트코드(.pyc) 컴파일이 섞이므로 버리고, 나머지 실행의 중앙값을 쓴다.
+
+    python import_budget.py                 # 모든 항목 측정 후 예산 확인
+    python import_budget.py -k app --top 20 # app 항목만, 오래 걸리는 모듈 20개 표시
+"""
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 추가 분석 모듈 (saju_calculator가 첫 계산 때 임포트)
+ENHANCED_MODULES = ('sipsin', 'unsung_12', 'sinsal', 'napeum', 'hyungchunghap', 'daeun', 'seun')
+
+
+class ImportBudget(NamedTuple):
+    """예산 항목 하나 (code를 새 프로세스에서 실행)"""
+    name: str
+    code: str
+    max_ms: float
+    forbidden: Tuple[str, ...] = ()   # 이 코드 실행 중 임포트되면 안 되는 최상위 패키지
+
+
+BUDGETS = [
+    ImportBudget('saju_calculator', 'import saju_calculator', 30.0,
+                 ENHANCED_MODULES + ('numpy', 'pandas', 'openai')),
+    ImportBudget('saju_calculator.first_chart',
+                 'from datetime import datetime\n'
+                 'import saju_calculator\n'
+                 "saju_calculator.calculate_four_pillars(datetime(1990, 5, 15, 14, 30), '남').compute_all()",
+                 60.0, ('numpy', 'pandas', 'openai')),
+    # Streamlit 없이 실행하면 bare 모드로 로그인 화면까지 스크립트를 실행한다
+    ImportBudget('app', 'import app', 1000.0, ('openai', 'pandas')),
+]
+
+DEFAULT_RUNS = 5
+
+# 인터프리터 시작(site, .pth 등) 임포트를 빼기 위해 측정 코드 앞에서 stderr에 쓰는 표시
+START_MARKER = '--- import_budget start ---'
+
+
+class ModuleTime(NamedTuple):
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+class ImportReport(NamedTuple):
+    budget: ImportBudget
+    total_ms: float                 # 최상위 임포트 누적 시간 합 (실행 간 중앙값)
+    runs_ms: List[float]
+    modules: List[ModuleTime]       # 중앙값에 가장 가까운 실행의 모듈별 시간
+    forbidden_loaded: List[str]
+    error: Optional[str] = None
+
+    @property
+    def over_budget(self) -> bool:
+        return self.error is not None or self.total_ms > self.budget.max_ms or bool(self.forbidden_loaded)
+
+
+def parse_importtime(stderr: str) -> List[ModuleTime]:
+    """
+    -X importtime 출력 파싱
+
+    Args:
+        stderr: 'import time: self [us] | cumulative | imported package' 형식의 줄이 섞인 출력
+                (START_MARKER 줄이 있으면 그 뒤만 읽는다)
+
+    Returns:
+        임포트 순서대로 ModuleTime 리스트 (depth는 들여쓰기 단계, 최상위는 0)
+    """
+    lines = stderr.splitlines()
+    if START_MARKER in lines:
+        lines = lines[lines.index(START_MARKER) + 1:]
+    modules = []
+    for line in lines:
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue   # 머리글 줄
+        name = parts[2].rstrip()
+        stripped = name.lstrip()
+        depth = (len(name) - len(stripped) - 1) // 2
+        modules.append(ModuleTime(stripped, int(parts[0]), int(parts[1]), depth))
+    return modules
+
+
+def _run_once(code: str, python: str, env: Dict[str, str]) -> Tuple[List[ModuleTime], Optional[str]]:
+    code = f"import sys; sys.stderr.write({START_MARKER!r} + '\\n'); sys.stderr.flush()\n{code}"
+    proc = subprocess.run([python, '-X', 'importtime', '-c', code], cwd=PROJECT_DIR, env=env,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, timeout=120)
+    modules = parse_importtime(proc.stderr)
+    if proc.returncode != 0:
+        last = proc.stderr.strip().splitlines()[-1:] or ['']
+        return modules, f"종료 코드 {proc.returncode}: {last[0]}"
+    return modules, None
+
+
+def measure(budget: ImportBudget, runs: int = DEFAULT_RUNS, python: str = sys.executable) -> ImportReport:
+    """새 프로세스에서 budget.code를 runs번 실행해 임포트 시간 측정 (워밍업 1회 별도)"""
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)   # 워밍업에서 만든 .pyc를 이후 실행이 쓰도록
+    env.setdefault('STREAMLIT_SERVER_HEADLESS', 'true')
+
+    _, error = _run_once(budget.code, python, env)
+    if error:
+        return ImportReport(budget, 0.0, [], [], [], error)
+
+    samples = []
+    for _ in range(max(1, runs)):
+        modules, error = _run_once(budget.code, python, env)
+        if error:
+            return ImportReport(budget, 0.0, [], modules, [], error)
+        total_ms = sum(m.cumulative_us for m in modules if m.depth == 0) / 1000
+        samples.append((total_ms, modules))
+
+    runs_ms = [total for total, _ in samples]
+    median_ms = statistics.median(runs_ms)
+    _, modules = min(samples, key=lambda sample: abs(sample[0] - median_ms))
+    loaded = {m.name.split('.')[0] for m in modules}
+    forbidden_loaded = [name for name in budget.forbidden if name in loaded]
+    return ImportReport(budget, median_ms, runs_ms, modules, forbidden_loaded)
+
+
+def print_report(report: ImportReport, top: int = 10):
+    budget = report.budget
+    if report.error:
+        print(f"{budget.name:<30} 실행 실패  {report.error}")
+        return
+    status = 'OVER BUDGET' if report.over_budget else 'ok'
+    print(f"{budget.name:<30} {report.total_ms:>9.1f}ms  (예산 {budget.max_ms:.0f}ms, "
+          f"범위 {min(report.runs_ms):.1f}~{max(report.runs_ms):.1f}ms)  {status}")
+    if report.forbidden_loaded:
+        print(f"    처음 사용 전에 임포트된 모듈: {', '.join(report.forbidden_loaded)}")
+    if top > 0:
+        slowest = sorted(report.modules, key=lambda m: m.self_us, reverse=True)[:top]
+        for module in slowest:
+            print(f"    {module.name:<40} self {module.self_us / 1000:>7.2f}ms  "
+                  f"누적 {module.cumulative_us / 1000:>8.2f}ms")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='임포트 시간 보고 및 콜드 스타트 예산 확인')
+    parser.add_argument('-k', dest='pattern', help='이름에 이 문자열이 들어간 항목만 측정')
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS, help='항목당 측정 횟수 (워밍업 제외)')
+    parser.add_argument('--top', type=int, default=10, help='self 시간이 긴 모듈을 몇 개 보여줄지 (0이면 생략)')
+    parser.add_argument('--python', default=sys.executable, help='측정에 쓸 파이썬 실행 파일')
+    args = parser.parse_args()
+
+    selected = [b for b in BUDGETS if not args.pattern or args.pattern in b.name]
+    if not selected:
+        print(f"'{args.pattern}'에 해당하는 항목이 없습니다.")
+        sys.exit(2)
+
+    print(f"Python {sys.version.split()[0]}, 항목당 {args.runs}회 (중앙값)\n")
+    reports = []
+    for budget in selected:
+        report = measure(budget, args.runs, args.python)
+        print_report(report, args.top)
+        reports.append(report)
+
+    failed = [r.budget.name for r in reports if r.over_budget]
+    if failed:
+        print(f"\n예산 초과: {', '.join(failed)}")
+        sys.exit(1)
+    print("\n모든 항목이 예산 안에 있습니다.")
@@ -0,0 +1,203 @@
+"""
+계산 단계 계측 모듈
+Opt-in Per-Stage Timing and Counter Instrumentation
+
+사주 계산의 단계별(시각 보정, 네 기둥, 십신, 신살, 대운, 세운 등) 소요 시간,
+호출 수, 예외 수와 이벤트 카운터(예: 대운의 비정상 days_diff 대체 계산)를 모은다.
+
+기본은 꺼져 있다. 꺼져 있을 때 계측 지점의 비용은 모듈 변수 ENABLED 확인 한 번뿐이다.
+단, 단계 실패(record_error)는 드물고 놓치면 안 되므로 꺼져 있어도 항상 센다.
+
+    import instrumentation
+    instrumentation.enable()
+    instrumentation.add_callback(lambda event: print(event))
+    ...
+    print(instrumentation.snapshot())
+"""
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+# 계측 여부 (계측 지점에서 직접 확인한다: `if instrumentation.ENABLED:`)
+ENABLED = False
+
+
+class StageEvent(NamedTuple):
+    """콜백에 전달되는 이벤트"""
+    kind: str                 # 'stage' 또는 'counter'
+    name: str                 # 단계/카운터 이름 (예: 'section.daeun', 'daeun.abnormal_days_diff')
+    seconds: float = 0.0      # 단계 소요 시간 (counter는 0)
+    error: Optional[str] = None  # 단계에서 발생한 예외 이름
+    value: int = 1            # counter 증가량
+
+
+class StageStats:
+    """단계 하나의 누적 통계"""
+    __slots__ = ('calls', 'errors', 'total_seconds', 'max_seconds')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'total_ms': round(self.total_seconds * 1000, 3),
+            'mean_us': round(self.total_seconds / self.calls * 1e6, 2) if self.calls else 0.0,
+            'max_us': round(self.max_seconds * 1e6, 2),
+        }
+
+
+_lock = threading.Lock()
+_stages: Dict[str, StageStats] = {}
+_counters: Dict[str, int] = {}
+_callbacks: List[Callable[[StageEvent], None]] = []
+
+
+def enable():
+    """계측 켜기"""
+    global ENABLED
+    ENABLED = True
+
+
+def disable():
+    """계측 끄기 (모은 통계는 유지)"""
+    global ENABLED
+    ENABLED = False
+
+
+def is_enabled() -> bool:
+    return ENABLED
+
+
+def _notify(event: StageEvent):
+    for callback in list(_callbacks):
+        try:
+            callback(event)
+        except Exception as e:
+            print(f"계측 콜백 오류 ({event.name}): {e}")
+
+
+def record_stage(name: str, seconds: float, error: Optional[BaseException] = None):
+    """단계 소요 시간 기록 (계측이 꺼져 있으면 무시)"""
+    if not ENABLED:
+        return
+    with _lock:
+        stats = _stages.get(name)
+        if stats is None:
+            stats = _stages[name] = StageStats()
+        stats.calls += 1
+        stats.total_seconds += seconds
+        if seconds > stats.max_seconds:
+            stats.max_seconds = seconds
+        if error is not None:
+            stats.errors += 1
+    if _callbacks:
+        _notify(StageEvent('stage', name, seconds, None if error is None else type(error).__name__))
+
+
+def count(name: str, value: int = 1):
+    """이벤트 카운터 증가 (계측이 꺼져 있으면 무시)"""
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+    if _callbacks:
+        _notify(StageEvent('counter', name, value=value))
+
+
+def record_error(name: str, error: BaseException):
+    """
+    단계 실패 기록 (계측이 꺼져 있어도 항상 카운터 '{name}.errors'를 센다)
+
+    계측이 켜져 있으면 콜백에 error가 채워진 'counter' 이벤트도 보낸다.
+    """
+    counter = f'{name}.errors'
+    with _lock:
+        _counters[counter] = _counters.get(counter, 0) + 1
+    if ENABLED and _callbacks:
+        _notify(StageEvent('counter', counter, error=type(error).__name__))
+
+
+@contextmanager
+def stage(name: str):
+    """
+    with 블록을 단계로 계측 (예외는 기록 후 그대로 전파)
+
+    계측이 꺼져 있으면 시간을 재지 않는다. 호출 빈도가 높은 지점에서는
+    컨텍스트 매니저 생성 비용도 피하도록 ENABLED를 먼저 확인하고 record_stage를 쓴다.
+    """
+    if not ENABLED:
+        yield
+        return
+    started = perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        record_stage(name, perf_counter() - started, e)
+        raise
+    record_stage(name, perf_counter() - started)
+
+
+def add_callback(callback: Callable[[StageEvent], None]) -> Callable[[StageEvent], None]:
+    """이벤트 콜백 등록 (데코레이터로도 사용 가능)"""
+    with _lock:
+        _callbacks.append(callback)
+    return callback
+
+
+def remove_callback(callback: Callable[[StageEvent], None]):
+    with _lock:
+        if callback in _callbacks:
+            _callbacks.remove(callback)
+
+
+def snapshot() -> Dict:
+    """
+    현재까지의 통계
+
+    Returns:
+        {'enabled': bool,
+         'stages': {이름: {'calls', 'errors', 'total_ms', 'mean_us', 'max_us'}},
+         'counters': {이름: 값}}
+    """
+    with _lock:
+        return {
+            'enabled': ENABLED,
+            'stages': {name: stats.to_dict() for name, stats in sorted(_stages.items())},
+            'counters': dict(sorted(_counters.items())),
+        }
+
+
+def reset():
+    """모은 통계 초기화 (콜백과 켜짐 상태는 유지)"""
+    with _lock:
+        _stages.clear()
+        _counters.clear()
+
+
+if __name__ == '__main__':
+    from datetime import datetime
+
+    # 스크립트로 실행하면 이 파일은 __main__이므로 계산 모듈이 쓰는 instrumentation 모듈을 다시 가져온다
+    import instrumentation as registry
+    from saju_calculator import calculate_four_pillars
+
+    registry.enable()
+    errors = []
+    registry.add_callback(lambda event: errors.append(event) if event.error else None)
+    for hour in range(0, 24, 3):
+        calculate_four_pillars(datetime(1992, 10, 24, hour, 30), '남', use_cache=False).compute_all()
+    calculate_four_pillars(datetime(2100, 12, 30, 12, 0), '여', correct_time=True).compute_all()
+
+    print("=== 단계별 계측 ===")
+    result = registry.snapshot()
+    for name, stats in result['stages'].items():
+        print(f"{name:<22} {stats['calls']:>4}회  평균 {stats['mean_us']:>8.1f}µs  "
+              f"최대 {stats['max_us']:>8.1f}µs  오류 {stats['errors']}")
+    print(f"카운터: {result['counters'] or '없음'}")
+    print(f"오류 이벤트: {len(errors)}건")
@@ -0,0 +1,729 @@
+"""
+AI 사주 풀이 모듈
+AI Interpretation Prompts and Generation
+
+OpenAI ChatGPT로 사주 풀이와 추가 질문 답변을 생성한다. 프롬프트 작성과 API 호출을
+화면 코드(app.py)와 분리해, 오프라인 캐시 채우기(interpretation_cache.py warm)에서도
+같은 프롬프트를 쓴다. 같은 프롬프트의 풀이는 interpretation_cache에서 바로 돌려준다.
+"""
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import instrumentation
+from followup_context import FollowupContext, estimate_tokens
+from interpretation_cache import InterpretationCache, get_default_cache, make_key
+from seun import get_year_jiazi
+
+MODEL = "gpt-4o"
+
+# 스트리밍 중 on_text 호출 최소 간격 (초). 토큰마다 화면 전체를 다시 그리지 않도록 묶어서 알린다
+STREAM_UPDATE_INTERVAL = 0.1
+
+# 빠진 섹션 보충 요청의 섹션당 최대 토큰 수
+REPAIR_TOKENS_PER_SECTION = 700
+
+# 섹션별 병렬 생성: 동시 요청 수 상한과 섹션당 토큰 여유 (전체 max_tokens / 섹션 수의 배수)
+DEFAULT_SECTION_WORKERS = 4
+SECTION_TOKEN_HEADROOM = 1.5
+
+# 섹션별 생성 요청에서 시스템 프롬프트 뒤에 붙이는 안내 (전체 섹션/분량 규칙을 한 섹션 기준으로 바꾼다)
+SECTION_SYSTEM_NOTE = """
+
+SECTION MODE: This request covers exactly ONE section of the reading. The other sections are written by separate requests and assembled afterwards. Output only the requested section, starting with its heading line exactly as given. The all-sections rule and the total-length rule above apply to the assembled reading, not to this single section."""
+
+# 추가 질문 프롬프트(시스템 + 사용자) 토큰 예산 (FollowupContext를 넘길 때 적용)
+DEFAULT_FOLLOWUP_TOKEN_BUDGET = 3000
+
+# 스트리밍 중 지금까지 받은 전체 텍스트를 받는 콜백
+TextCallback = Callable[[str], None]
+
+# 풀이 프롬프트 양식 버전 (양식을 고치면 올린다. 캐시 키에 들어가 이전 풀이는 더 이상 쓰이지 않음)
+PROMPT_VERSION = "2"
+
+# 이 프로세스에서 받은 응답의 토큰 사용량 누적 (cached_tokens: 프롬프트 캐시로 재사용된 프롬프트 토큰)
+_usage_lock = threading.Lock()
+_token_usage = {'responses': 0, 'prompt_tokens': 0, 'cached_tokens': 0, 'completion_tokens': 0}
+
+# Required section headings for student output (all 10 must appear)
+STUDENT_REQUIRED_HEADINGS = [
+    "## 1.",
+    "## 2.",
+    "## 3.",
+    "## 4-학생.",
+    "## 5-학생.",
+    "## 6-학생.",
+    "## 7-학생.",
+    "## 8.",
+    "## 9.",
+    "## 10.",
+]
+
+# 비학생 풀이의 섹션 제목 (5개)
+GENERAL_HEADINGS = ["## 1.", "## 2.", "## 3.", "## 4.", "## 5."]
+
+# 줄 맨 앞의 번호 붙은 섹션 제목 ('## 4.', '## 4-학생.', '## 4 학업운' 등)
+_NUMBERED_HEADING = re.compile(r'(?m)^## (\d+)')
+
+
+def validate_student_headings(text: str) -> list[str]:
+    """
+    Check that all required student section headings are present in the output.
+    Matching uses split_sections (heading prefix must start a line), the same parser
+    the repair step uses to splice sections.
+    Returns a list of missing heading prefixes (empty list means all present).
+    """
+    _, sections, _ = split_sections(text, STUDENT_REQUIRED_HEADINGS)
+    return [h for h in STUDENT_REQUIRED_HEADINGS if h not in sections]
+
+
+class InterpretationPrompt(NamedTuple):
+    """풀이 요청 한 건의 프롬프트와 생성 설정"""
+    system_prompt: str
+    user_prompt: str
+    max_tokens: int
+    temperature: float
+    is_student: bool
+    saju_data_block: str             # user_prompt 맨 끝의 사주 데이터 (앞부분은 같은 유형끼리 동일)
+    headings: Tuple[str, ...] = ()   # 풀이 양식의 섹션 제목 접두어 (순서대로)
+    min_chars: int = 0               # 전체 풀이 최소 글자 수
+
+
+def build_interpretation_prompt(saju_result: dict, gender: str, occupation: str, student_grade: Optional[str] = None, marital_status: str = "기타", children_status: str = "자녀없음", year: Optional[int] = None) -> InterpretationPrompt:
+    """
+    사주 용어 기반 공감형 풀이 프롬프트 작성
+    
+    Args:
+        saju_result: calculate_four_pillars 결과
+        gender: '남' 또는 '여'
+        occupation: '일반' 또는 '학생'
+        student_grade: 학년 (학생일 때)
+        marital_status: 결혼 여부 (비학생)
+        children_status: 자녀 여부 (비학생)
+        year: 올해운세/3년 학업운의 기준 연도 (None이면 호출 시점의 연도)
+    
+    Returns:
+        InterpretationPrompt
+    """
+    # 기준 연도와 간지는 호출할 때마다 구한다 (오래 떠 있는 서버도 새해가 되면 바로 바뀐다)
+    current_year = year if year is not None else datetime.now().year
+    current_year_jiazi = get_year_jiazi(current_year)
+    
+    is_student = occupation == "학생" and student_grade is not None
+    time_unknown = saju_result.get('hour_pillar') == '시간미상' or saju_result.get('time_unknown', False)
+
+    # 사주 데이터 블록 (사람마다 다른 유일한 부분이라 프롬프트 맨 끝에 둔다. 토큰을 아끼도록 한 줄에 여러 항목)
+    profile = [
+        f"생년월일시: {saju_result['birth_date']}",
+        f"성별: {gender}",
+        f"학년: {student_grade}" if is_student else f"직업: {occupation}",
+    ]
+    if not is_student:
+        profile += [f"결혼여부: {marital_status}", f"자녀여부: {children_status}"]
+    data_lines = ["# 사주 데이터", " / ".join(profile)]
+    if time_unknown:
+        data_lines.append("출생시간 정보 없음 — 시주 제외하고 해석")
+    data_lines.append("사주팔자 (연주/월주/일주/시주, 일간이 본인): " + " ".join(
+        saju_result[f'{pillar}_pillar'] for pillar in ('year', 'month', 'day', 'hour')))
+    elements = saju_result.get('elements') or {}
+    if elements:
+        data_lines.append("오행: " + " ".join(f"{k}{v}" for k, v in elements.items()))
+    sipsin = saju_result.get('sipsin') or {}
+    data_lines.append("천간 십신 (연간/월간/시간): " + " ".join(
+        sipsin.get(f'{pillar}_stem', '-') for pillar in ('year', 'month', 'hour')))
+    saju_data_block = "\n".join(data_lines)
+
+    # Note: Using English for system instructions is intentional - GPT models often
+    # follow English instructions more reliably even when generating Korean output
+    if is_student:
+        # 학생 전용 프롬프트 (기존 구조 유지)
+        system_prompt = """You are an experienced traditional Saju (사주명리) counselor with deep knowledge of classical Chinese metaphysics. You speak directly to the person as a warm, knowledgeable mentor having a real one-on-one consultation.
+
+CRITICAL OUTPUT RULES (follow strictly — violations are not acceptable):
+1. Write ONLY in flowing paragraph form. Absolutely NO bullet points, NO numbered lists, NO dash-prefixed list items, NO tables, NO star ratings (★☆), NO emoji symbols (✅ ⚠️ ❌) used as list markers.
+2. Do NOT use template sub-labels such as "사주 근거:", "구체적 재능:", "어떤 상황에서 빛나는지:", "강점:", "약점:", "전략:", "특징:", "시험 운:", "결론:" etc.
+3. Address the reader directly in second person — use "당신" or implied second person. Make it feel like real, warm conversation.
+4. Each section must include at least one concrete, vivid life situation example naturally woven into the text (e.g., school life, family dynamics, friendships, exam pressure, sleep habits, emotional ups and downs).
+5. Blend empathy and warmth naturally — acknowledge how the person might feel, not just what the Saju indicates.
+6. Avoid fatalistic or deterministic language. No fear-based predictions. No exaggeration.
+7. Avoid vague motivational phrases: 노력, 긍정, 열심히, 성공, 운이 좋다, 운이 나쁘다, 잘 될 것이다.
+8. Always connect Saju terms to real, observable, everyday life patterns.
+9. Total output MUST be 1000 Korean characters or more (aim for 1200–1800 characters).
+10. Language: Natural, warm Korean. Classical Saju terms are welcome but must always be explained in plain language.
+11. MANDATORY SECTION RULE: You MUST output ALL 10 section headings exactly as given (## 1. through ## 10., including ## 4-학생. ## 5-학생. ## 6-학생. ## 7-학생.). Omitting even ONE section heading is strictly unacceptable and counts as a failed response. Every single heading must appear in the output."""
+
+        instructions = f"""맨 아래 사주 데이터의 사주팔자를 분석하여, 경험 많은 사주 상담사가 직접 상담하듯이 **문단형 풀이**를 작성해주세요.
+반드시 상담받는 분에게 직접 말하는 2인칭 대화체로 작성하세요. 모든 섹션 본문은 자연스러운 문단으로 작성하고, 리스트/번호/불릿/표/별점은 절대 사용하지 마세요.
+
+【절대 규칙】아래 10개 섹션 제목(## 1. ~ ## 10.)은 모두 빠짐없이, 정확히 그대로 출력해야 합니다. 단 하나의 섹션 제목이라도 누락되면 실패한 응답입니다. 특히 "## 7-학생. 앞으로 3년간 시험운/학업운"은 반드시 포함해야 합니다.
+
+---
+
+# 풀이 양식
+
+각 섹션은 반드시 문단형으로 작성하세요. 섹션 제목(##)은 유지하되, 본문은 모두 이어진 문단으로 작성합니다.
+각 섹션에는 실제 생활에서 일어날 수 있는 구체적인 상황 예시(학교/가정/친구/시험/수면/감정 기복 등)를 자연스럽게 녹여주세요.
+전체 풀이는 최소 1000자 이상(가능하면 1200~1800자)으로 작성하세요.
+
+## 1. 핵심 성향 요약
+
+이 분의 일간과 주요 오행을 바탕으로, 어떤 유형의 사람인지 한눈에 알 수 있도록 소개해주세요. 겉모습과 속마음의 차이, 그리고 약한 오행이나 부족한 부분을 자연스럽게 서술하되, 따뜻하고 공감적인 문장으로 3문단 내외로 작성해주세요.
+
+---
+
+## 2. 기질과 심리 패턴
+
+이 분의 강점과 약점을 사주 구조에 근거해 구체적으로 풀어주세요. 어떤 상황에서 강점이 발휘되고, 어떤 상황에서 스트레스를 받는지 실제 생활 예시와 함께 따뜻하게 서술해주세요. 반복되는 심리 패턴이나 사이클도 자연스럽게 녹여주세요.
+
+---
+
+## 3. 인간관계 / 연애 패턴
+
+이 분의 대인관계 스타일과 연애 패턴을 사주 구조로 풀어주세요. 겉모습과 속마음의 차이, 감정 표현 방식, 신뢰와 거리감 패턴, 갈등이 생길 때 어떤 사이클이 반복되는지 구체적인 상황 예시를 포함해 문단으로 자연스럽게 서술해주세요.
+
+---
+
+## 4-학생. 문과/이과 성향
+
+이 분의 사주 구조(천간·지지·식상·인성 조합)를 바탕으로 문과와 이과 중 어느 쪽 성향이 더 강한지, 어떤 전공이나 계열이 잘 맞을 것 같은지 자연스럽게 풀어주세요. 적합한 계열과 피해야 할 방향도 생활 예시와 함께 문단으로 서술해주세요.
+
+---
+
+## 5-학생. 잘하는 과목 / 취약한 과목
+
+잘할 수 있는 과목과 어려움을 겪을 수 있는 과목을 사주 구조로 풀어주세요. 왜 그런지 사주 근거를 자연스럽게 녹이면서, 시험 준비나 학교 수업 상황을 예시로 들어 문단으로 서술해주세요. 보완 방법이나 학습 팁도 자연스럽게 이어서 써주세요.
+
+---
+
+## 6-학생. 공부 방법
+
+이 분에게 가장 잘 맞는 공부 방법(자기주도 학습, 과외, 학원 등)을 사주 구조로 풀어주세요. 어떤 방식이 잘 맞고 어떤 방식이 부담스러울 수 있는지 구체적인 학습 상황 예시와 함께 자연스럽게 문단으로 서술해주세요.
+
+---
+
+## 7-학생. 앞으로 3년간 시험운/학업운
+
+앞으로 3년간({current_year}, {current_year + 1}, {current_year + 2})의 학업운과 시험운을 사주 구조로 풀어주세요. 각 해의 특징, 주의할 점, 전략을 표나 별점 없이 자연스러운 문단으로 서술해주세요.
+
+---
+
+## 8. 직업 / 재물 운용 스타일
+
+적합한 직업 스타일과 재물 운용 방식을 사주 구조를 근거로 구체적으로 서술해주세요. 어떤 직무 환경이 맞고 어떤 환경을 피해야 하는지, 돈을 다루는 패턴과 투자 성향은 어떤지 생활 예시와 함께 문단으로 써주세요.
+
+---
+
+## 9. 현재 고민 해석
+
+현재 이 분이 겪고 있을 고민의 원인과 반복되는 패턴을 사주 구조로 분석해주세요. 원인, 패턴, 그리고 실천 가능한 전략을 자연스러운 문단으로 서술해주세요.
+
+---
+
+## 10. 실천 조언
+
+구체적이고 실천 가능한 조언을 3가지 이상 제안해주세요. 각 조언은 무엇을, 언제, 왜 해야 하는지 사주 근거와 함께 자연스러운 문단으로 작성해주세요.
+
+---
+
+**중요:**
+모든 섹션을 문단형으로 작성하세요. 리스트, 표, 번호, 불릿, 별점 사용 금지.
+반복 레이블("사주 근거:", "구체적 재능:", "어떤 상황에서 빛나는지:" 등) 사용 금지.
+2인칭 대화체로, 공감과 위로가 담긴 따뜻한 문체로 작성하세요.
+전체 1000자 이상.
+【재확인】위 ## 1. ~ ## 10. 의 10개 섹션 제목이 모두 출력에 포함되어야 합니다. 특히 ## 7-학생. 앞으로 3년간 시험운/학업운 은 반드시 포함하세요."""
+
+        max_tokens = 4500  # Increased to 4500 to accommodate full output (10 sections for students: 6 general + 4 student-specific)
+
+    else:
+        # 비학생 전용 프롬프트 (5개 섹션, 3000자 이상)
+        system_prompt = """You are an experienced traditional Saju (사주명리) counselor with deep knowledge of classical Chinese metaphysics. You speak directly to the person as a warm, knowledgeable mentor having a real one-on-one consultation.
+
+CRITICAL OUTPUT RULES (follow strictly — violations are not acceptable):
+1. Write ONLY in flowing paragraph form. Absolutely NO bullet points, NO numbered lists, NO dash-prefixed list items, NO tables, NO star ratings (★☆), NO emoji symbols (✅ ⚠️ ❌) used as list markers.
+2. Do NOT use template sub-labels such as "사주 근거:", "구체적 재능:", "어떤 상황에서 빛나는지:", "강점:", "약점:", "전략:", "특징:", "결론:" etc.
+3. Address the reader directly in second person — use "당신" or implied second person. Make it feel like real, warm conversation.
+4. Each section must include at least one concrete, vivid life situation example naturally woven into the text (e.g., work life, family dynamics, relationships, financial decisions, health habits, emotional ups and downs).
+5. Blend empathy and warmth naturally — acknowledge how the person might feel, not just what the Saju indicates.
+6. Avoid fatalistic or deterministic language. No fear-based predictions. No exaggeration.
+7. Avoid vague motivational phrases: 노력, 긍정, 열심히, 성공, 운이 좋다, 운이 나쁘다, 잘 될 것이다.
+8. Always connect Saju terms to real, observable, everyday life patterns.
+9. Total output MUST be 3000 Korean characters or more (aim for 3200–4500 characters).
+10. Language: Natural, warm Korean. Classical Saju terms are welcome but must always be explained in plain language."""
+
+        # Section 5 wording depends on marital/children status
+        unmarried_no_children = (marital_status == "미혼" and children_status == "자녀없음")
+        if unmarried_no_children:
+            section5_prompt = f"""## 5. 올해운세 (재물운 건강운 가족·돌봄 흐름 애정운)
+
+올해({current_year}년 {current_year_jiazi})의 전반적인 운세를 풀어주세요. 재물 쪽, 건강 쪽, 가족·돌봄/관계 확장 쪽(부모님·형제·조카·반려동물·지인 돌봄 등 돌봄 역할과 책임의 균형, 관계 확장), 애정 쪽을 각각 문단으로 자연스럽게 다루되, 번호나 불릿 없이 "재물 쪽은...", "건강 쪽은...", "가족·돌봄 흐름을 보면...", "애정 쪽은..." 같은 자연스러운 문장으로 시작해 문단 흐름을 이어가세요. "자녀운"이라는 표현은 절대 사용하지 마세요. 4문단 내외로 작성해주세요."""
+        else:
+            section5_prompt = f"""## 5. 올해운세 (재물운 건강운 자녀운 애정운)
+
+올해({current_year}년 {current_year_jiazi})의 전반적인 운세를 풀어주세요. 재물 쪽, 건강 쪽, 자녀 쪽, 애정 쪽을 각각 문단으로 자연스럽게 다루되, 번호나 불릿 없이 "재물 쪽은...", "건강 쪽은...", "자녀 쪽은...", "애정 쪽은..." 같은 자연스러운 문장으로 시작해 문단 흐름을 이어가세요. 4문단 내외로 작성해주세요."""
+
+        instructions = f"""맨 아래 사주 데이터의 사주팔자를 분석하여, 경험 많은 사주 상담사가 직접 상담하듯이 **문단형 풀이**를 작성해주세요.
+반드시 상담받는 분에게 직접 말하는 2인칭 대화체로 작성하세요. 모든 섹션 본문은 자연스러운 문단으로 작성하고, 리스트/번호/불릿/표/별점은 절대 사용하지 마세요.
+
+---
+
+# 풀이 양식
+
+아래 5개 섹션을 반드시 순서대로 작성하세요. 섹션 제목(##)은 유지하되, 본문은 모두 자연스러운 문단으로 작성합니다.
+각 섹션에는 실제 생활에서 일어날 수 있는 구체적인 상황 예시(직장/가정/대인관계/건강/재물/감정 등)를 자연스럽게 녹여주세요.
+전체 풀이는 반드시 3000자 이상(권장 3200~4500자)으로 작성하세요.
+
+## 1. 핵심 성향 요약
+
+이 분의 일간과 주요 오행을 바탕으로, 어떤 유형의 사람인지 한눈에 알 수 있도록 소개해주세요. 겉모습과 속마음의 차이, 타인이 느끼는 인상과 본인이 느끼는 내면의 차이, 그리고 약한 오행이나 부족한 부분을 자연스럽게 서술하되, 따뜻하고 공감적인 문장으로 4문단 내외로 작성해주세요.
+
+---
+
+## 2. 기질과 심리 패턴
+
+이 분의 강점과 약점을 사주 구조에 근거해 구체적으로 풀어주세요. 어떤 상황에서 강점이 발휘되고, 어떤 상황에서 스트레스를 받는지 실제 생활 예시와 함께 따뜻하게 서술해주세요. 반복되는 심리 패턴이나 사이클도 자연스럽게 녹여주세요. 4문단 내외로 작성해주세요.
+
+---
+
+## 3. 주요귀인과 살성
+
+이 분의 사주에서 주요 귀인(도움을 주는 사람이나 기운)과 살성(주의해야 할 기운)을 자연스럽게 풀어주세요. 어떤 유형의 사람이나 상황이 도움이 되고, 어떤 유형이 부담이나 갈등을 일으키는지 실제 생활 예시와 함께 서술해주세요. 인간관계와 연애 패턴도 자연스럽게 녹여주세요. 4문단 내외로 작성해주세요.
+
+---
+
+## 4. 평생운세 (초년/중년/말년)
+
+이 분의 평생 흐름을 초년기(0~30대 초반), 중년기(30대 중반~50대), 말년기(60대 이후)로 나누어 자연스럽게 서술해주세요. 각 시기의 주요 특징, 도전, 기회를 사주 구조와 대운 흐름으로 풀어주되, 표나 번호 없이 이어지는 문단으로 작성해주세요. 4문단 내외로 작성해주세요.
+
+---
+
+{section5_prompt}
+
+---
+
+**중요:**
+반드시 위 5개 섹션만 작성하세요. 추가 섹션을 만들지 마세요.
+모든 섹션을 문단형으로 작성하세요. 리스트, 표, 번호, 불릿, 별점 사용 금지.
+반복 레이블("사주 근거:", "구체적 재능:", "어떤 상황에서 빛나는지:" 등) 사용 금지.
+2인칭 대화체로, 공감과 위로가 담긴 따뜻한 문체로 작성하세요.
+전체 반드시 3000자 이상."""
+
+        max_tokens = 6000  # Increased to 6000 to accommodate 3000+ character non-student output
+
+    # 시스템 프롬프트와 풀이 양식은 같은 유형(학생/비학생, 올해운세 문구)끼리 바이트 단위로 같아
+    # API의 프롬프트 캐시(같은 앞부분 재사용)가 적용된다. 사주 데이터는 반드시 맨 뒤에 붙인다.
+    user_prompt = f"{instructions}\n\n---\n\n{saju_data_block}"
+
+    headings = tuple(STUDENT_REQUIRED_HEADINGS if is_student else GENERAL_HEADINGS)
+    return InterpretationPrompt(system_prompt, user_prompt, max_tokens, 0.75, is_student, saju_data_block,
+                                headings, 1000 if is_student else 3000)
+
+
+def create_client(api_key: Optional[str] = None):
+    """OpenAI 클라이언트 생성 (api_key가 없으면 OPENAI_API_KEY 환경변수 사용)"""
+    import openai
+    return openai.OpenAI(api_key=api_key)
+
+
+def record_usage(usage):
+    """
+    응답의 usage 누적 (usage가 없으면 무시)
+    
+    계측이 켜져 있으면 instrumentation 카운터(openai.prompt_tokens, openai.cached_tokens,
+    openai.completion_tokens)에도 더한다.
+    """
+    if usage is None:
+        return
+    details = getattr(usage, 'prompt_tokens_details', None)
+    counts = {
+        'prompt_tokens': getattr(usage, 'prompt_tokens', None) or 0,
+        'cached_tokens': getattr(details, 'cached_tokens', None) or 0,
+        'completion_tokens': getattr(usage, 'completion_tokens', None) or 0,
+    }
+    with _usage_lock:
+        _token_usage['responses'] += 1
+        for name, value in counts.items():
+            _token_usage[name] += value
+    if instrumentation.ENABLED:
+        for name, value in counts.items():
+            instrumentation.count(f'openai.{name}', value)
+
+
+def get_token_usage() -> Dict:
+    """
+    이 프로세스의 토큰 사용량 누적
+    
+    Returns:
+        {'responses', 'prompt_tokens', 'cached_tokens', 'completion_tokens',
+         'cached_ratio': 프롬프트 토큰 중 캐시 적중 비율}
+    """
+    with _usage_lock:
+        usage = dict(_token_usage)
+    usage['cached_ratio'] = round(usage['cached_tokens'] / usage['prompt_tokens'], 3) if usage['prompt_tokens'] else 0.0
+    return usage
+
+
+def reset_token_usage():
+    with _usage_lock:
+        for name in _token_usage:
+            _token_usage[name] = 0
+
+
+def complete(client, on_text: Optional[TextCallback] = None, **kwargs) -> str:
+    """
+    chat.completions 호출 후 응답 텍스트 반환 (응답의 토큰 사용량은 record_usage로 누적)
+    
+    on_text가 있으면 stream=True로 요청해 토큰이 도착하는 대로 지금까지의 전체 텍스트를
+    on_text에 넘긴다 (STREAM_UPDATE_INTERVAL마다 한 번, 마지막에 한 번).
+    스트리밍은 마지막 청크로 usage를 받도록 stream_options를 함께 보낸다.
+    """
+    if on_text is None:
+        response = client.chat.completions.create(**kwargs)
+        record_usage(getattr(response, 'usage', None))
+        return response.choices[0].message.content
+    
+    parts = []
+    last_update = time.monotonic()
+    for chunk in client.chat.completions.create(stream=True, stream_options={"include_usage": True}, **kwargs):
+        record_usage(getattr(chunk, 'usage', None))
+        if not chunk.choices or not chunk.choices[0].delta.content:
+            continue
+        parts.append(chunk.choices[0].delta.content)
+        now = time.monotonic()
+        if now - last_update >= STREAM_UPDATE_INTERVAL:
+            last_update = now
+            on_text(''.join(parts))
+    text = ''.join(parts)
+    on_text(text)
+    return text
+
+
+def split_sections(text: str, headings: Sequence[str]) -> Tuple[str, Dict[str, str], List[Tuple[Optional[str], str]]]:
+    """
+    섹션 제목(줄 맨 앞의 '## N.' 접두어) 기준으로 텍스트 나누기
+    
+    headings에 없는 번호 제목 줄('## 4. 학업운'처럼 양식과 다르게 쓴 제목, 같은 제목의 두 번째 등장)도
+    섹션 경계로 보고 따로 돌려준다. 앞 섹션에 섞이지 않도록 하기 위해서다.
+    
+    Args:
+        text: 풀이 또는 프롬프트 텍스트
+        headings: 찾을 섹션 제목 접두어 (예: STUDENT_REQUIRED_HEADINGS)
+    
+    Returns:
+        (첫 섹션 앞의 텍스트,
+         {제목 접두어: 제목 줄부터 다음 섹션 앞까지의 텍스트},
+         [(바로 앞의 headings 섹션 제목 또는 None, 양식에 없는 번호 제목 블록)])
+        텍스트에 없는 제목은 dict에 없다.
+    """
+    starts = {}
+    for heading in headings:
+        match = re.search(r'(?m)^' + re.escape(heading), text)
+        if match:
+            starts[match.start()] = heading
+    for match in _NUMBERED_HEADING.finditer(text):
+        starts.setdefault(match.start(), None)
+    if not starts:
+        return text, {}, []
+    positions = sorted(starts)
+    sections, strays = {}, []
+    previous = None
+    for n, start in enumerate(positions):
+        end = positions[n + 1] if n + 1 < len(positions) else len(text)
+        block = text[start:end].rstrip()
+        heading = starts[start]
+        if heading is None:
+            strays.append((previous, block))
+        else:
+            sections[heading] = block
+            previous = heading
+    return text[:positions[0]], sections, strays
+
+
+def section_instructions(prompt: InterpretationPrompt, headings: Sequence[str]) -> Dict[str, str]:
+    """풀이 양식에서 섹션별 제목 줄과 작성 지시 ('---' 구분선 앞까지)"""
+    _, sections, _ = split_sections(prompt.user_prompt, headings)
+    return {heading: block.split('\n---', 1)[0].strip() for heading, block in sections.items()}
+
+
+def repair_missing_sections(prompt: InterpretationPrompt, client, text: str,
+                            on_text: Optional[TextCallback] = None) -> str:
+    """
+    학생 풀이에서 빠진 섹션만 생성해 제목 순서대로 끼워 넣기
+    
+    전체를 다시 생성하지 않고, 빠진 섹션의 작성 지시만 담은 작은 요청
+    (섹션당 REPAIR_TOKENS_PER_SECTION 토큰)을 한 번 보낸다. 보충 응답에도 없는 섹션은 빠진 채로 둔다.
+    
+    양식에 없는 번호 제목 블록 중 빠진 섹션과 번호가 같은 것('## 4-학생.' 대신 쓴 '## 4. 학업운' 등)은
+    보충한 섹션으로 대신하므로 버리고, 나머지는 원래 있던 자리(앞 섹션 뒤)에 둔다.
+    """
+    headings = STUDENT_REQUIRED_HEADINGS
+    preamble, sections, strays = split_sections(text, headings)
+    missing = [heading for heading in headings if heading not in sections]
+    if not missing:
+        return text
+    missing_numbers = {_NUMBERED_HEADING.match(heading).group(1) for heading in missing}
+    kept_strays = [(previous, block) for previous, block in strays
+                   if _NUMBERED_HEADING.match(block).group(1) not in missing_numbers]
+    instructions = section_instructions(prompt, missing)
+    missing_block = "\n\n---\n\n".join(instructions.get(heading, heading) for heading in missing)
+    repair_user_prompt = f"""앞서 작성한 풀이에서 아래 섹션이 빠졌습니다. 빠진 섹션만 작성해주세요. 다른 섹션은 다시 쓰지 마세요.
+각 섹션은 섹션 제목(##)을 그대로 첫 줄에 쓰고, 본문은 문단형으로 작성하세요.
+리스트, 표, 번호, 불릿, 별점 사용 금지. 2인칭 대화체로, 공감과 위로가 담긴 따뜻한 문체로 작성하세요.
+사주 데이터는 맨 아래에 있습니다.
+
+---
+
+# 작성할 섹션
+
+{missing_block}
+
+---
+
+{prompt.saju_data_block}"""
+
+    def assemble(repair_text: str) -> str:
+        _, repaired, _ = split_sections(repair_text, missing)
+        if len(missing) == 1 and not repaired and repair_text.strip():
+            # 제목 없이 본문만 온 경우 (한 섹션만 요청했을 때만 위치가 분명하다)
+            title = instructions.get(missing[0], missing[0]).split('\n', 1)[0]
+            repaired = {missing[0]: f"{title}\n\n{repair_text.strip()}"}
+        blocks = [preamble.strip()]
+        for heading in [None] + headings:
+            if heading is not None:
+                blocks.append((sections.get(heading) or repaired.get(heading) or '').strip())
+            blocks.extend(block for previous, block in kept_strays if previous == heading)
+        return "\n\n".join(block for block in blocks if block)
+
+    repair_text = complete(
+        client,
+        None if on_text is None else (lambda partial: on_text(assemble(partial))),
+        model=MODEL,
+        messages=[
+            {"role": "system", "content": prompt.system_prompt},
+            {"role": "user", "content": repair_user_prompt}
+        ],
+        max_tokens=min(prompt.max_tokens, REPAIR_TOKENS_PER_SECTION * len(missing)),
+        temperature=0.6  # Lower temperature on repair for more deterministic compliance
+    )
+    return assemble(repair_text)
+
+
+def generate_interpretation(prompt: InterpretationPrompt, client, on_text: Optional[TextCallback] = None) -> str:
+    """
+    API로 풀이 생성 (API 오류는 그대로 전파)
+    
+    학생 풀이에서 필수 섹션 제목이 빠지면 빠진 섹션만 한 번 보충한다 (최대 2회 호출).
+    on_text가 있으면 토큰을 스트리밍하며, 보충 중에는 섹션을 끼워 넣은 전체 텍스트를 넘긴다.
+    """
+    result_text = complete(
+        client,
+        on_text,
+        model=MODEL,
+        messages=[
+            {"role": "system", "content": prompt.system_prompt},
+            {"role": "user", "content": prompt.user_prompt}
+        ],
+        max_tokens=prompt.max_tokens,
+        temperature=prompt.temperature
+    )
+
+    # Post-processing validation for student output: if any heading is missing,
+    # generate only the missing sections once and splice them back in (max 2 calls total).
+    if prompt.is_student and validate_student_headings(result_text):
+        result_text = repair_missing_sections(prompt, client, result_text, on_text)
+
+    return result_text
+
+
+def generate_interpretation_parallel(prompt: InterpretationPrompt, client,
+                                    on_text: Optional[TextCallback] = None,
+                                    max_workers: int = DEFAULT_SECTION_WORKERS) -> str:
+    """
+    섹션별 동시 요청으로 풀이 생성 (API 오류는 그대로 전파)
+    
+    같은 사주 데이터 블록과 시스템 프롬프트로 섹션마다 요청을 보내고(동시에 최대 max_workers개),
+    결과를 제목 순서대로 이어 붙인다. 전체 소요 시간은 섹션 시간의 합이 아니라
+    대략 가장 느린 섹션(과 대기열) 수준이 된다.
+    
+    on_text는 호출한 스레드에서만 부른다 (Streamlit 요소는 스크립트 스레드에서만 갱신 가능).
+    앞 섹션이 모두 끝난 섹션까지와, 그다음 섹션의 지금까지 받은 텍스트를 넘긴다.
+    """
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    headings = prompt.headings
+    instructions = section_instructions(prompt, headings)
+    total = len(headings)
+    section_tokens = min(prompt.max_tokens, int(prompt.max_tokens * SECTION_TOKEN_HEADROOM / total))
+    partials = [''] * total
+
+    def generate_section(index: int) -> str:
+        heading = headings[index]
+        instruction = instructions.get(heading, heading)
+        section_user_prompt = f"""맨 아래 사주 데이터의 사주팔자를 분석하여, 경험 많은 사주 상담사가 직접 상담하듯이 **문단형 풀이**의 한 섹션을 작성해주세요.
+반드시 상담받는 분에게 직접 말하는 2인칭 대화체로 작성하세요. 본문은 자연스러운 문단으로 작성하고, 리스트/번호/불릿/표/별점은 절대 사용하지 마세요.
+전체 풀이는 {total}개 섹션으로 이루어지며 다른 섹션은 따로 작성됩니다. 아래 섹션 하나만, 섹션 제목(##)을 그대로 첫 줄에 쓰고 작성하세요.
+이 섹션은 {prompt.min_chars // total}자 이상으로 작성하세요.
+
+---
+
+# 작성할 섹션 ({index + 1}/{total})
+
+{instruction}
+
+---
+
+{prompt.saju_data_block}"""
+        text = complete(
+            client,
+            None if on_text is None else (lambda partial: partials.__setitem__(index, partial)),
+            model=MODEL,
+            messages=[
+                {"role": "system", "content": prompt.system_prompt + SECTION_SYSTEM_NOTE},
+                {"role": "user", "content": section_user_prompt}
+            ],
+            max_tokens=section_tokens,
+            temperature=prompt.temperature
+        )
+        _, found, _ = split_sections(text, [heading])
+        if heading in found:
+            return found[heading]
+        title = instruction.split('\n', 1)[0]
+        return f"{title}\n\n{text.strip()}"
+
+    results = [None] * total
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, total))) as pool:
+        futures = {pool.submit(generate_section, index): index for index in range(total)}
+        pending = set(futures)
+        shown = None
+        while pending:
+            done, pending = wait(pending, timeout=None if on_text is None else STREAM_UPDATE_INTERVAL,
+                                 return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    for other in pending:
+                        other.cancel()
+                    raise future.exception()
+                results[futures[future]] = future.result()
+            if on_text is not None:
+                ready = 0
+                while ready < total and results[ready] is not None:
+                    ready += 1
+                blocks = results[:ready] + ([partials[ready]] if ready < total and partials[ready] else [])
+                text = "\n\n".join(block.strip() for block in blocks)
+                if text and text != shown:
+                    shown = text
+                    on_text(text)
+    return "\n\n".join(results)
+
+
+def prompt_cache_key(prompt: InterpretationPrompt, parallel: bool = False) -> str:
+    """프롬프트 내용 주소 캐시 키 (양식 버전, 모델, 생성 설정, 프롬프트 전체, 섹션별 생성 여부)"""
+    parts = [PROMPT_VERSION, MODEL, prompt.max_tokens, prompt.temperature,
+             prompt.system_prompt, prompt.user_prompt]
+    if parallel:
+        parts.append('sections')
+    return make_key(*parts)
+
+
+def interpretation_cache_key(saju_result: dict, gender: str, occupation: str, student_grade: Optional[str] = None, marital_status: str = "기타", children_status: str = "자녀없음", parallel: bool = False) -> str:
+    """get_saju_interpretation과 같은 인자로 캐시 키 계산"""
+    return prompt_cache_key(build_interpretation_prompt(
+        saju_result, gender, occupation, student_grade, marital_status, children_status), parallel)
+
+
+def get_saju_interpretation(saju_result: dict, gender: str, occupation: str, student_grade: Optional[str] = None, marital_status: str = "기타", children_status: str = "자녀없음", client=None, cache: Optional[InterpretationCache] = None, on_text: Optional[TextCallback] = None, parallel: bool = False) -> str:
+    """
+    사주 용어 기반 공감형 풀이
+    
+    같은 프롬프트로 만든 풀이가 캐시에 있으면 API를 호출하지 않고 돌려준다.
+    오류 메시지는 캐시하지 않는다.
+    
+    Args:
+        client: OpenAI 클라이언트 (None이면 create_client())
+        cache: 풀이 캐시 (None이면 기본 경로의 공유 캐시)
+        on_text: 스트리밍 콜백 (지금까지 받은 전체 텍스트, 캐시 적중 시 한 번 호출)
+        parallel: True면 섹션별 동시 요청으로 생성 (generate_interpretation_parallel)
+    """
+    prompt = build_interpretation_prompt(saju_result, gender, occupation, student_grade,
+                                         marital_status, children_status)
+    cache = get_default_cache() if cache is None else cache
+    key = prompt_cache_key(prompt, parallel)
+    cached = cache.get(key)
+    if cached is not None:
+        if on_text is not None:
+            on_text(cached)
+        return cached
+
+    try:
+        generate = generate_interpretation_parallel if parallel else generate_interpretation
+        result_text = generate(prompt, client if client is not None else create_client(), on_text)
+    except Exception as e:
+        return f"풀이 생성 중 오류가 발생했습니다: {str(e)}"
+    
+    cache.set(key, result_text, PROMPT_VERSION)
+    return result_text
+
+
+def get_followup_answer(question: str, previous_interpretation: str, saju_info: str, client=None, on_text: Optional[TextCallback] = None, context: Optional[FollowupContext] = None, token_budget: int = DEFAULT_FOLLOWUP_TOKEN_BUDGET) -> str:
+    """
+    구조 패턴 분석 기반 추가 질문 답변 (on_text가 있으면 토큰 스트리밍)
+    
+    context를 넘기면 previous_interpretation 대신 질문과 관련된 섹션 원문, 나머지 섹션 요약,
+    이전 질문/답변 요약을 전체 프롬프트가 token_budget 토큰을 넘지 않게 골라 넣고,
+    답변을 받으면 context에 대화를 추가한다.
+    """
+    
+    system_prompt = """You are an experienced traditional Saju (사주명리) counselor. You speak warmly and directly to the person as a trusted mentor.
+
+CRITICAL OUTPUT RULES:
+1. Write ONLY in flowing paragraph form. No bullet points, no numbered lists, no tables, no star ratings, no template sub-labels.
+2. Address the reader directly in second person. Make it feel like a real, warm conversation.
+3. Include concrete, vivid life situation examples naturally woven into your answer.
+4. Avoid fatalistic or deterministic language. No fear-based predictions.
+5. Avoid vague phrases: 노력, 긍정, 열심히, 성공, 운이 좋다, 운이 나쁘다, 잘 될 것이다.
+6. Connect all Saju terms to real, observable everyday patterns.
+7. Language: Natural, warm Korean."""
+    
+    def build_user_prompt(previous_interpretation: str) -> str:
+        return f"""## 이전 풀이
+{previous_interpretation}
+
+## 사주 정보
+{saju_info}
+
+## 추가 질문
+{question}
+
+---
+
+위 추가 질문에 대해, 경험 많은 사주 상담사가 직접 상담하듯이 따뜻하고 공감적인 문단형으로 답변해주세요.
+
+구체적인 생활 상황 예시를 자연스럽게 녹이면서, 사주 구조를 근거로 설명해주세요. 리스트, 번호, 불릿, 표, 별점은 절대 사용하지 마세요. 2인칭 대화체로, 실천 가능한 조언도 포함해 200자 이상의 문단으로 답변해주세요."""
+
+    if context is not None:
+        overhead = estimate_tokens(system_prompt) + estimate_tokens(build_user_prompt(''))
+        previous_interpretation = context.render(question, token_budget - overhead)
+    user_prompt = build_user_prompt(previous_interpretation)
+
+    try:
+        if client is None:
+            client = create_client()
+        answer = complete(
+            client,
+            on_text,
+            model=MODEL,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            max_tokens=2000,  # Followup answers are shorter, 2000 is sufficient
+            temperature=0.8
+        )
+        
+    except Exception as e:
+        return f"추가 질문 처리 중 오류가 발생했습니다: {str(e)}"
+    
+    if context is not None:
+        context.add_turn(question, answer)
+    return answer
@@ -0,0 +1,329 @@
+"""
+AI 풀이 영구 캐시 모듈
+Persistent Interpretation Cache (SQLite)
+
+같은 프롬프트(사주 데이터 + 성별/직업/학년/결혼·자녀 여부 + 양식 버전)로 생성한 AI 풀이를
+SQLite 파일에 보관해, 여러 Streamlit 프로세스가 함께 쓰고 재시작 후에도 다시 요청하지 않는다.
+
+- 키: 프롬프트 버전, 모델, 생성 설정, 시스템/사용자 프롬프트 전체의 SHA-256 (내용 주소)
+- TTL: 저장 후 ttl초가 지나면 만료
+- 크기 제한: 풀이 텍스트 합계가 max_bytes를 넘으면 가장 오래 읽지 않은 항목부터 퇴출 (LRU)
+
+캐시 파일을 쓸 수 없는 환경에서도 풀이 자체는 동작하도록 SQLite 오류는 출력만 하고 무시한다.
+
+    python interpretation_cache.py stats
+    python interpretation_cache.py purge                   # 만료/이전 버전 항목 삭제
+    python interpretation_cache.py warm popular.csv -j 4   # 자주 조회되는 사주 미리 풀이
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+# 기본 경로 (SAJU_INTERPRETATION_CACHE 환경변수로 변경 가능)
+DEFAULT_CACHE_PATH = os.environ.get(
+    'SAJU_INTERPRETATION_CACHE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'interpretation_cache.sqlite3')
+)
+DEFAULT_TTL = 30 * 24 * 3600            # 30일
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024    # 풀이 텍스트 합계 64MB
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS interpretations (
+    key TEXT PRIMARY KEY,
+    prompt_version TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS interpretations_accessed ON interpretations (accessed);
+"""
+
+
+def make_key(*parts: Any) -> str:
+    """내용 주소 키 (parts를 JSON으로 직렬화한 SHA-256 16진수)"""
+    payload = json.dumps(parts, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class InterpretationCache:
+    """
+    SQLite 기반 풀이 캐시 (프로세스/스레드 간 공유)
+
+    Args:
+        path: SQLite 파일 경로
+        ttl: 항목 유효 시간 (초, None이면 만료 없음)
+        max_bytes: 풀이 텍스트 합계 상한 (UTF-8 바이트, 넘으면 LRU 퇴출)
+        clock: 시간 함수 (기본 time.time, 프로세스 간 비교하므로 벽시계 시간)
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl: Optional[float] = DEFAULT_TTL,
+                 max_bytes: int = DEFAULT_MAX_BYTES, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._ready = False
+        self._hits = 0
+        self._misses = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        # 작업마다 연결을 열고 닫는다 (Streamlit은 재실행마다 스레드가 바뀐다)
+        conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+        if not self._ready:
+            with self._lock:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.executescript(_SCHEMA)
+                self._ready = True
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        """풀이 조회 (없거나 만료되었거나 오류면 None)"""
+        now = self._clock()
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute('SELECT value, created FROM interpretations WHERE key = ?',
+                                   (key,)).fetchone()
+                if row is not None and self.ttl is not None and row[1] + self.ttl <= now:
+                    conn.execute('DELETE FROM interpretations WHERE key = ?', (key,))
+                    row = None
+                if row is not None:
+                    conn.execute('UPDATE interpretations SET accessed = ?, hits = hits + 1 WHERE key = ?',
+                                 (now, key))
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"풀이 캐시 조회 오류: {e}")
+            return None
+        with self._lock:
+            if row is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return None if row is None else row[0]
+
+    def set(self, key: str, value: str, prompt_version: str = ''):
+        """풀이 저장 (상한을 넘으면 가장 오래 읽지 않은 항목부터 퇴출)"""
+        if self.max_bytes <= 0:
+            return
+        now = self._clock()
+        size = len(value.encode('utf-8'))
+        try:
+            conn = self._connect()
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                conn.execute('INSERT OR REPLACE INTO interpretations '
+                             '(key, prompt_version, value, size, created, accessed, hits) '
+                             'VALUES (?, ?, ?, ?, ?, ?, 0)',
+                             (key, prompt_version, value, size, now, now))
+                self._evict(conn)
+                conn.execute('COMMIT')
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                raise
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"풀이 캐시 저장 오류: {e}")
+
+    def _evict(self, conn: sqlite3.Connection) -> int:
+        """합계가 max_bytes 이하가 될 때까지 LRU 항목 삭제 (삭제 수 반환)"""
+        excess = conn.execute('SELECT COALESCE(SUM(size), 0) FROM interpretations').fetchone()[0] - self.max_bytes
+        if excess <= 0:
+            return 0
+        victims = []
+        for key, size in conn.execute('SELECT key, size FROM interpretations ORDER BY accessed').fetchall():
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany('DELETE FROM interpretations WHERE key = ?', victims)
+        return len(victims)
+
+    def purge(self, keep_version: Optional[str] = None) -> int:
+        """
+        만료 항목 삭제
+
+        Args:
+            keep_version: 지정하면 이 프롬프트 버전이 아닌 항목도 삭제
+
+        Returns:
+            삭제한 항목 수
+        """
+        conditions, params = [], []
+        if self.ttl is not None:
+            conditions.append('created <= ?')
+            params.append(self._clock() - self.ttl)
+        if keep_version is not None:
+            conditions.append('prompt_version != ?')
+            params.append(keep_version)
+        if not conditions:
+            return 0
+        conn = self._connect()
+        try:
+            return conn.execute(f"DELETE FROM interpretations WHERE {' OR '.join(conditions)}",
+                                params).rowcount
+        finally:
+            conn.close()
+
+    def clear(self):
+        """모든 항목과 통계 초기화"""
+        conn = self._connect()
+        try:
+            conn.execute('DELETE FROM interpretations')
+        finally:
+            conn.close()
+        with self._lock:
+            self._hits = self._misses = 0
+
+    def stats_dict(self) -> Dict[str, Any]:
+        """캐시 파일 전체 통계와 이 프로세스의 적중/실패 수"""
+        conn = self._connect()
+        try:
+            entries, total_bytes, total_hits = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0) FROM interpretations'
+            ).fetchone()
+            versions = dict(conn.execute(
+                'SELECT prompt_version, COUNT(*) FROM interpretations GROUP BY prompt_version'
+            ).fetchall())
+        finally:
+            conn.close()
+        with self._lock:
+            hits, misses = self._hits, self._misses
+        return {
+            'path': self.path,
+            'entries': entries,
+            'bytes': total_bytes,
+            'max_bytes': self.max_bytes,
+            'stored_hits': total_hits,
+            'versions': versions,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 4) if hits + misses else 0.0,
+        }
+
+
+_default_cache: Optional[InterpretationCache] = None
+
+
+def get_default_cache() -> InterpretationCache:
+    """기본 경로의 프로세스 공유 캐시"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = InterpretationCache()
+    return _default_cache
+
+
+def warm(input_path: str, cache: InterpretationCache, workers: int = 4,
+         correct_time: bool = False, parallel: bool = False) -> Dict[str, int]:
+    """
+    입력 파일의 사주를 미리 풀이해 캐시에 저장
+
+    입력 형식은 bulk_chart.py와 같고(id, date, time, calendar, leap, gender),
+    풀이 조건 열을 추가로 읽는다: occupation(일반/학생), grade(학년),
+    marital_status(미혼/기혼/기타), children_status(자녀없음/자녀있음).
+    parallel은 앱의 섹션별 생성 모드와 같은 캐시 항목을 채울 때 쓴다.
+
+    Returns:
+        {'total', 'cached', 'generated', 'failed'}
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    from bulk_chart import BirthInput, _solar_datetimes, read_records
+    from interpretation import create_client, get_saju_interpretation, interpretation_cache_key
+    from saju_calculator import calculate_four_pillars
+
+    records = list(read_records(input_path))
+    inputs = [BirthInput(row, record) for row, record in enumerate(records, 1)]
+    births = _solar_datetimes(inputs)
+    client = create_client()
+    counts = {'total': len(records), 'cached': 0, 'generated': 0, 'failed': 0}
+    lock = threading.Lock()
+
+    def warm_one(index: int):
+        birth, record = inputs[index], records[index]
+        if birth.error:
+            print(f"{birth.row}행 건너뜀: {birth.error}")
+            outcome = 'failed'
+        else:
+            gender = '여' if birth.female else '남'
+            result = calculate_four_pillars(births[index].astype(object), gender,
+                                            include_hour=not birth.time_unknown, correct_time=correct_time)
+            occupation = record.get('occupation') or '일반'
+            is_student = occupation == '학생'
+            profile = dict(
+                gender=gender,
+                occupation=occupation,
+                student_grade=(record.get('grade') or '') if is_student else '',
+                marital_status=(record.get('marital_status') or '기타') if not is_student else '기타',
+                children_status=(record.get('children_status') or '자녀없음') if not is_student else '자녀없음',
+            )
+            if cache.get(interpretation_cache_key(result, parallel=parallel, **profile)) is not None:
+                outcome = 'cached'
+            else:
+                text = get_saju_interpretation(result, client=client, cache=cache, parallel=parallel, **profile)
+                outcome = 'failed' if text.startswith('풀이 생성 중 오류') else 'generated'
+                if outcome == 'failed':
+                    print(f"{birth.row}행 실패: {text}")
+        with lock:
+            counts[outcome] += 1
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        list(pool.map(warm_one, range(len(inputs))))
+    return counts
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description='AI 풀이 영구 캐시 관리')
+    parser.add_argument('--path', default=DEFAULT_CACHE_PATH, help='캐시 파일 (SQLite)')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('stats', help='캐시 통계 출력')
+    purge_parser = sub.add_parser('purge', help='만료 항목과 이전 프롬프트 버전 항목 삭제')
+    purge_parser.add_argument('--keep-old-versions', action='store_true', help='이전 버전 항목은 남김')
+    sub.add_parser('clear', help='모든 항목 삭제')
+    warm_parser = sub.add_parser('warm', help='입력 파일의 사주를 미리 풀이 (OPENAI_API_KEY 필요)')
+    warm_parser.add_argument('input', help='입력 CSV/JSONL (bulk_chart.py 형식 + occupation/grade/marital_status/children_status)')
+    warm_parser.add_argument('-j', '--workers', type=int, default=4, help='동시 요청 수')
+    warm_parser.add_argument('--correct-time', action='store_true', help='당시 표준시/서머타임 보정')
+    warm_parser.add_argument('--parallel', action='store_true', help='섹션별 동시 생성 모드의 풀이로 채움')
+    args = parser.parse_args()
+
+    cache = InterpretationCache(args.path)
+    if args.command == 'stats':
+        print(json.dumps(cache.stats_dict(), ensure_ascii=False, indent=2))
+    elif args.command == 'purge':
+        from interpretation import PROMPT_VERSION
+        removed = cache.purge(None if args.keep_old_versions else PROMPT_VERSION)
+        print(f"{removed}개 항목을 삭제했습니다.")
+    elif args.command == 'clear':
+        cache.clear()
+        print("캐시를 비웠습니다.")
+    elif args.command == 'warm':
+        if not os.environ.get('OPENAI_API_KEY'):
+            print("OPENAI_API_KEY 환경변수가 필요합니다.")
+            sys.exit(2)
+        started = time.perf_counter()
+        counts = warm(args.input, cache, args.workers, args.correct_time, args.parallel)
+        print(f"{counts['total']}건: 새로 풀이 {counts['generated']}, 이미 있음 {counts['cached']}, "
+              f"실패 {counts['failed']} ({time.perf_counter() - started:.1f}초)")
+        from interpretation import get_token_usage
+        usage = get_token_usage()
+        if usage['responses']:
+            print(f"프롬프트 토큰 {usage['prompt_tokens']} (프롬프트 캐시 적중 {usage['cached_tokens']}, "
+                  f"{usage['cached_ratio']:.0%}), 완성 토큰 {usage['completion_tokens']}")
+        if counts['failed']:
+            sys.exit(1)
@@ -0,0 +1,246 @@
+"""
+음력 변환 모듈
+Precomputed Lunisolar Month Table Module
+
+한국 음력(1899~2050년)의 연도별 대·소월과 윤달 정보를 작은 상수표로 두고,
+이로부터 음력 월 시작일 배열을 한 번 만들어 음력↔양력 변환을 이진 탐색으로 처리한다.
+외부 라이브러리 없이 동작하며, 배열 단위 변환은 numpy로 벡터화한다.
+(상수표는 korean-lunar-calendar 라이브러리의 한국천문연구원 기준 데이터에서 추출)
+"""
+from bisect import bisect_right
+from datetime import date, timedelta
+from typing import Dict, Tuple
+
+from calendar_table import FIRST_DATE, day_number
+
+FIRST_LUNAR_YEAR = 1899
+LAST_LUNAR_YEAR = 2050
+
+# 음력 1899년 1월 1일의 양력 날짜
+FIRST_NEW_YEAR = date(1899, 2, 10)
+
+# 연도별 월 정보
+#   비트 0~12: 그해 n번째 달(윤달 포함 순서)이 대월(30일)이면 1, 소월(29일)이면 0
+#   비트 13~16: 윤달 월 (0이면 윤달 없음, 윤달은 같은 번호 평달 바로 뒤)
+LUNAR_YEAR_DATA = (
+    0x00ad5, 0x116d2, 0x00752, 0x00ea5, 0x0b64a, 0x0064b, 0x00a9b, 0x09556,  # 1899-1906
+    0x0056a, 0x00b59, 0x05752, 0x00752, 0x0db25, 0x00b25, 0x00a4b, 0x0b29b,  # 1907-1914
+    0x00aad, 0x0056a, 0x04b69, 0x00ba9, 0x0fb52, 0x00d92, 0x00d25, 0x0ba4d,  # 1915-1922
+    0x00956, 0x002b5, 0x095ad, 0x006d4, 0x00da9, 0x05d92, 0x00e92, 0x0cd26,  # 1923-1930
+    0x00527, 0x00a57, 0x0b2b6, 0x00ada, 0x006d4, 0x06ea9, 0x00749, 0x0f693,  # 1931-1938
+    0x00a93, 0x0052b, 0x0ca5b, 0x0096d, 0x00b6a, 0x09b54, 0x00ba4, 0x00b49,  # 1939-1946
+    0x05a93, 0x00a95, 0x0f52b, 0x0052d, 0x00aad, 0x0b56a, 0x00db2, 0x00da4,  # 1947-1954
+    0x07d49, 0x00d4a, 0x11a95, 0x00a96, 0x00556, 0x0cab5, 0x00ad5, 0x006d2,  # 1955-1962
+    0x08ea5, 0x00ea5, 0x00e4a, 0x06c96, 0x00a9b, 0x0f556, 0x0056a, 0x00b59,  # 1963-1970
+    0x0b752, 0x00752, 0x00725, 0x0964b, 0x00a4b, 0x112ab, 0x002ad, 0x0056b,  # 1971-1978
+    0x0cb69, 0x00da9, 0x00d92, 0x09b25, 0x00d25, 0x15a4d, 0x00a56, 0x002b6,  # 1979-1986
+    0x0d5ad, 0x006d4, 0x00da9, 0x0bd92, 0x00e92, 0x00d26, 0x06a56, 0x00a57,  # 1987-1994
+    0x112b6, 0x00b5a, 0x006d4, 0x0aec9, 0x00749, 0x00693, 0x09527, 0x0052b,  # 1995-2002
+    0x00a5b, 0x0555a, 0x0036a, 0x0fb55, 0x00ba4, 0x00b49, 0x0ba93, 0x00a95,  # 2003-2010
+    0x0052d, 0x06a5d, 0x00aad, 0x135aa, 0x005d2, 0x00da5, 0x0bd4a, 0x00d4a,  # 2011-2018
+    0x00a95, 0x0952d, 0x00556, 0x00ab5, 0x055aa, 0x006d2, 0x0cea5, 0x00ea5,  # 2019-2026
+    0x00e4a, 0x0ac96, 0x00c9b, 0x0055a, 0x06ad5, 0x00b69, 0x17752, 0x00752,  # 2027-2034
+    0x00b25, 0x0d64b, 0x00a4b, 0x004ab, 0x0a55b, 0x0056d, 0x00b69, 0x05b52,  # 2035-2042
+    0x00d92, 0x0fd25, 0x00d25, 0x00a4d, 0x0b4ad, 0x002b6, 0x005b5, 0x06da9,  # 2043-2050
+)
+
+
+def _build_month_table():
+    """월 시작일(1900-01-01 기준 일수), 월 라벨, 연도별 첫 달 위치 계산"""
+    starts, labels, year_first = [], [], []
+    start = day_number(FIRST_NEW_YEAR)
+    for offset, code in enumerate(LUNAR_YEAR_DATA):
+        year = FIRST_LUNAR_YEAR + offset
+        leap_month = (code >> 13) & 0xF
+        year_first.append(len(starts))
+        months = []
+        for month in range(1, 13):
+            months.append((month, False))
+            if month == leap_month:
+                months.append((month, True))
+        for position, (month, is_leap) in enumerate(months):
+            starts.append(start)
+            labels.append((year, month, is_leap))
+            start += 30 if (code >> position) & 1 else 29
+    starts.append(start)  # 마지막 달의 다음 날 (범위 끝)
+    return starts, labels, year_first
+
+
+# 음력 월 시작일 표 (모듈 로드 시 한 번 계산, 약 1,900개월)
+_MONTH_STARTS, _MONTH_LABELS, _YEAR_FIRST_MONTH = _build_month_table()
+
+# 변환 지원 범위 (양력)
+FIRST_SOLAR_DATE = FIRST_NEW_YEAR
+LAST_SOLAR_DATE = FIRST_DATE + timedelta(days=_MONTH_STARTS[-1] - 1)
+
+
+def get_leap_month(year: int) -> int:
+    """
+    음력 연도의 윤달 월
+
+    Returns:
+        윤달 월 (1~12), 윤달이 없으면 0
+    """
+    if not FIRST_LUNAR_YEAR <= year <= LAST_LUNAR_YEAR:
+        raise ValueError(f"음력 변환 지원 범위({FIRST_LUNAR_YEAR}~{LAST_LUNAR_YEAR}년)를 벗어났습니다: {year}")
+    return (LUNAR_YEAR_DATA[year - FIRST_LUNAR_YEAR] >> 13) & 0xF
+
+
+def _month_position(year: int, month: int, is_leap_month: bool) -> int:
+    """음력 연/월/윤달 여부를 월 시작일 표의 위치로 변환 (없는 달이면 ValueError)"""
+    if not 1 <= month <= 12:
+        raise ValueError(f"음력 월은 1~12 사이여야 합니다: {month}")
+    leap_month = get_leap_month(year)
+    if is_leap_month and leap_month != month:
+        raise ValueError(f"음력 {year}년에는 윤{month}월이 없습니다")
+    position = _YEAR_FIRST_MONTH[year - FIRST_LUNAR_YEAR] + month - 1
+    if leap_month and (month > leap_month or is_leap_month):
+        position += 1
+    return position
+
+
+def lunar_month_days(year: int, month: int, is_leap_month: bool = False) -> int:
+    """음력 달의 일수 (29 또는 30)"""
+    position = _month_position(year, month, is_leap_month)
+    return _MONTH_STARTS[position + 1] - _MONTH_STARTS[position]
+
+
+def lunar_to_solar(year: int, month: int, day: int, is_leap_month: bool = False) -> date:
+    """
+    음력을 양력으로 변환
+
+    Args:
+        year: 음력 연도 (1899~2050)
+        month: 음력 월
+        day: 음력 일
+        is_leap_month: 윤달 여부
+
+    Returns:
+        양력 date
+
+    Raises:
+        ValueError: 지원 범위 밖이거나 존재하지 않는 날짜(없는 윤달, 소월 30일 등)
+    """
+    position = _month_position(year, month, is_leap_month)
+    start = _MONTH_STARTS[position]
+    if not 1 <= day <= _MONTH_STARTS[position + 1] - start:
+        raise ValueError(f"음력 {year}년 {'윤' if is_leap_month else ''}{month}월에는 {day}일이 없습니다")
+    return FIRST_DATE + timedelta(days=start + day - 1)
+
+
+def solar_to_lunar(solar_date) -> Tuple[int, int, int, bool]:
+    """
+    양력을 음력으로 변환
+
+    Args:
+        solar_date: 양력 date/datetime
+
+    Returns:
+        (음력 연도, 월, 일, 윤달 여부)
+    """
+    number = day_number(solar_date)
+    position = bisect_right(_MONTH_STARTS, number) - 1
+    if position < 0 or position >= len(_MONTH_LABELS):
+        raise ValueError(f"음력 변환 지원 범위({FIRST_SOLAR_DATE}~{LAST_SOLAR_DATE})를 벗어났습니다: {solar_date}")
+    year, month, is_leap = _MONTH_LABELS[position]
+    return year, month, number - _MONTH_STARTS[position] + 1, is_leap
+
+
+_numpy_tables = None
+
+
+def _get_numpy_tables():
+    """벡터화 변환용 numpy 배열 (처음 사용할 때 한 번 생성)"""
+    global _numpy_tables
+    if _numpy_tables is None:
+        import numpy as np
+
+        labels = np.array(_MONTH_LABELS, dtype=np.int64)
+        leap_months = np.array([(code >> 13) & 0xF for code in LUNAR_YEAR_DATA], dtype=np.int64)
+        _numpy_tables = {
+            'starts': np.array(_MONTH_STARTS, dtype=np.int64),
+            'year': labels[:, 0],
+            'month': labels[:, 1],
+            'is_leap': labels[:, 2].astype(bool),
+            'year_first': np.array(_YEAR_FIRST_MONTH, dtype=np.int64),
+            'leap_month': leap_months,
+        }
+    return _numpy_tables
+
+
+def lunar_to_solar_batch(years, months, days, is_leap_month=None):
+    """
+    음력 → 양력 일괄 변환 (numpy)
+
+    Args:
+        years, months, days: 음력 연/월/일 배열
+        is_leap_month: 윤달 여부 bool 배열 (None이면 전부 평달)
+
+    Returns:
+        datetime64[D] 배열. 존재하지 않는 날짜(없는 윤달, 소월 30일, 범위 밖)는 NaT
+    """
+    import numpy as np
+
+    tables = _get_numpy_tables()
+    years = np.asarray(years, dtype=np.int64)
+    months = np.asarray(months, dtype=np.int64)
+    days = np.asarray(days, dtype=np.int64)
+    if is_leap_month is None:
+        is_leap = np.zeros(years.shape, dtype=bool)
+    else:
+        is_leap = np.asarray(is_leap_month, dtype=bool)
+
+    year_offset = years - FIRST_LUNAR_YEAR
+    valid = (year_offset >= 0) & (year_offset < len(LUNAR_YEAR_DATA)) & (months >= 1) & (months <= 12)
+    year_offset = np.where(valid, year_offset, 0)
+    leap_month = tables['leap_month'][year_offset]
+    valid &= ~is_leap | (leap_month == months)
+
+    position = tables['year_first'][year_offset] + np.where(valid, months - 1, 0)
+    position += (leap_month > 0) & ((months > leap_month) | is_leap)
+    start = tables['starts'][position]
+    valid &= (days >= 1) & (days <= tables['starts'][position + 1] - start)
+
+    result = np.datetime64(FIRST_DATE, 'D') + (start + days - 1).astype('timedelta64[D]')
+    result[~valid] = np.datetime64('NaT')
+    return result
+
+
+def solar_to_lunar_batch(solar_dates) -> Dict[str, object]:
+    """
+    양력 → 음력 일괄 변환 (numpy)
+
+    Args:
+        solar_dates: 양력 날짜 배열 (date 리스트, datetime64 배열, pandas Series)
+
+    Returns:
+        컬럼별 numpy 배열 dict: year, month, day (범위 밖은 0), is_leap (bool)
+    """
+    import numpy as np
+
+    tables = _get_numpy_tables()
+    values = np.asarray(getattr(solar_dates, 'values', solar_dates), dtype='datetime64[D]')
+    numbers = (values - np.datetime64(FIRST_DATE, 'D')).astype(np.int64)
+    position = np.searchsorted(tables['starts'], numbers, side='right') - 1
+    valid = (position >= 0) & (position < len(_MONTH_LABELS)) & ~np.isnat(values)
+    position = np.where(valid, position, 0)
+    return {
+        'year': np.where(valid, tables['year'][position], 0),
+        'month': np.where(valid, tables['month'][position], 0),
+        'day': np.where(valid, numbers - tables['starts'][position] + 1, 0),
+        'is_leap': valid & tables['is_leap'][position],
+    }
+
+
+if __name__ == '__main__':
+    print("=== 음력 변환 테스트 ===")
+    print(f"지원 범위: 양력 {FIRST_SOLAR_DATE} ~ {LAST_SOLAR_DATE}")
+    for args in [(2024, 1, 1, False), (2023, 2, 1, True), (1990, 5, 5, False)]:
+        solar = lunar_to_solar(*args)
+        print(f"음력 {args[0]}-{args[1]:02d}-{args[2]:02d}{' (윤달)' if args[3] else ''} → 양력 {solar}"
+              f" → 음력 {solar_to_lunar(solar)}")
+    print(f"2024년 윤달: {get_leap_month(2024) or '없음'}")
+    try:
+        lunar_to_solar(2024, 3, 1, True)
+    except ValueError as e:
+        print(f"없는 윤달 거부: {e}")
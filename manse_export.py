@@ -0,0 +1,253 @@
+"""
+만세력 내보내기 모듈
+Streaming Manse-ryeok Table Exporter
+
+지정한 기간의 만세력(날짜별 연주/월주/일주, 음력, 절기 시각, 12시주)을
+일정 일수 단위 청크로 계산해 흘려보낸다. 메모리는 청크 크기에만 비례하므로
+200년치 시간 단위 표도 한 번에 메모리에 올리지 않는다.
+
+계산은 saju_batch(조회표 기반 일괄 계산)를 쓰므로 calculate_four_pillars와
+같은 결과를 낸다.
+
+    python manse_export.py 만세력.csv --start 1900-01-01 --end 2100-12-31 --resolution hour
+    python manse_export.py 만세력.parquet --resolution day   # pyarrow 필요
+"""
+import csv
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from lunar_calendar import solar_to_lunar_batch
+from saju_batch import calculate_four_pillars_batch, pillar_indices
+from saju_calculator import DAY_PILLAR_BASE_DATE, EARTHLY_BRANCHES_HANJA, HEAVENLY_STEMS_HANJA
+from solar_terms import TERM_NAMES, TERMS_PER_YEAR, get_term_minutes
+
+# Parquet 출력 (선택적)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# 60갑자 한자 표기 (인덱스 = 60갑자 번호)
+JIAZI_HANJA = [HEAVENLY_STEMS_HANJA[i % 10] + EARTHLY_BRANCHES_HANJA[i % 12] for i in range(60)]
+
+# 시지별 시작 시각 (子시는 그날 00:00부터, 23:30~24:00도 같은 날 子시)
+HOUR_STARTS = [0] + [branch * 120 - 30 for branch in range(1, 12)]
+HOUR_RANGES = ['23:30-01:30'] + [f"{(s // 60):02d}:{s % 60:02d}-{((s + 120) // 60):02d}:{(s + 120) % 60:02d}"
+                                 for s in HOUR_STARTS[1:]]
+
+DAY_COLUMNS = (['date', 'lunar_year', 'lunar_month', 'lunar_day', 'lunar_leap',
+                'year_pillar', 'month_pillar', 'day_pillar', 'term', 'term_time']
+               + [f'hour_{b}' for b in EARTHLY_BRANCHES_HANJA])
+HOUR_COLUMNS = ['date', 'hour_branch', 'time_range', 'lunar_year', 'lunar_month', 'lunar_day', 'lunar_leap',
+                'year_pillar', 'month_pillar', 'day_pillar', 'hour_pillar', 'term', 'term_time']
+
+# 음력 컬럼 (lunar_calendar 지원 범위 밖의 날은 비워 둔다)
+LUNAR_COLUMNS = ('lunar_year', 'lunar_month', 'lunar_day', 'lunar_leap')
+
+# 60갑자/지지/절기 이름 컬럼 (Parquet에서 사전 인코딩)
+DICTIONARY_COLUMNS = {
+    'year_pillar': JIAZI_HANJA, 'month_pillar': JIAZI_HANJA, 'day_pillar': JIAZI_HANJA,
+    'hour_pillar': JIAZI_HANJA, 'hour_branch': EARTHLY_BRANCHES_HANJA, 'term': TERM_NAMES,
+    **{f'hour_{b}': JIAZI_HANJA for b in EARTHLY_BRANCHES_HANJA},
+}
+
+_BASE_DAY = np.datetime64(DAY_PILLAR_BASE_DATE.date(), 'D')
+_JIAZI_ARRAY = np.array(JIAZI_HANJA, dtype=object)
+_TERM_ARRAY = np.array(TERM_NAMES + [''], dtype=object)
+
+
+def _term_columns(days: np.ndarray):
+    """날짜별 절기 (이름 인덱스, 하루 중 분), 절기가 없는 날은 (24, -1)"""
+    terms = np.asarray(get_term_minutes(), dtype=np.int64)
+    day_start = (days - _BASE_DAY).astype(np.int64) * 1440
+    k = np.searchsorted(terms, day_start, side='left')
+    k_safe = np.minimum(k, len(terms) - 1)
+    has_term = (k < len(terms)) & (terms[k_safe] < day_start + 1440)
+    name = np.where(has_term, k_safe % TERMS_PER_YEAR, TERMS_PER_YEAR)
+    minute = np.where(has_term, terms[k_safe] - day_start, -1)
+    return name, minute
+
+
+def _format_minutes(minutes: np.ndarray) -> np.ndarray:
+    """하루 중 분을 'HH:MM' 문자열로 (-1은 빈 문자열)"""
+    return np.array(['' if m < 0 else f"{m // 60:02d}:{m % 60:02d}" for m in minutes.tolist()], dtype=object)
+
+
+def iter_manse_chunks(start: date, end: date, resolution: str = 'day',
+                      chunk_days: int = 1000) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    만세력을 컬럼별 배열 청크로 생성
+
+    Args:
+        start: 시작 날짜 (포함)
+        end: 끝 날짜 (포함)
+        resolution: 'day' (하루 1행, 12시주는 컬럼) 또는 'hour' (하루 12행)
+        chunk_days: 청크당 일수
+
+    Yields:
+        컬럼 이름 → 배열 dict (60갑자/지지/절기 컬럼은 인덱스 int 배열,
+        term은 절기 없는 날 24, term_time은 하루 중 분이며 없으면 -1,
+        음력 지원 범위 밖의 날은 lunar_* 가 0).
+        day 행의 연주/월주는 그날 00:00 기준, 시주 행은 각 시지 구간의 시작 시각 기준.
+    """
+    if resolution not in ('day', 'hour'):
+        raise ValueError(f"resolution은 'day' 또는 'hour'여야 합니다: {resolution}")
+    first = np.datetime64(start, 'D')
+    last = np.datetime64(end, 'D')
+    while first <= last:
+        days = np.arange(first, min(first + chunk_days, last + 1), dtype='datetime64[D]')
+        first = days[-1] + 1
+
+        lunar = solar_to_lunar_batch(days)
+        term, term_minute = _term_columns(days)
+        day_batch = calculate_four_pillars_batch(days.astype('datetime64[m]'))
+        chunk = {
+            'date': days,
+            'lunar_year': lunar['year'], 'lunar_month': lunar['month'],
+            'lunar_day': lunar['day'], 'lunar_leap': lunar['is_leap'],
+            'year_pillar': pillar_indices(day_batch, 'year'),
+            'month_pillar': pillar_indices(day_batch, 'month'),
+            'day_pillar': pillar_indices(day_batch, 'day'),
+            'term': term, 'term_time': term_minute,
+        }
+
+        # 12시주: 각 시지 구간 시작 시각으로 계산 (절입이 든 시간대는 시작 시각 기준 연주/월주)
+        starts = days.astype('datetime64[m]')[:, None] + np.array(HOUR_STARTS, dtype='timedelta64[m]')
+        hour_batch = calculate_four_pillars_batch(starts.ravel())
+        hour_pillar = pillar_indices(hour_batch, 'hour').reshape(len(days), 12)
+
+        if resolution == 'day':
+            for branch in range(12):
+                chunk[f'hour_{EARTHLY_BRANCHES_HANJA[branch]}'] = hour_pillar[:, branch]
+            yield chunk
+            continue
+
+        hour_chunk = {key: np.repeat(value, 12) for key, value in chunk.items()}
+        hour_chunk['hour_branch'] = np.tile(np.arange(12, dtype=np.int8), len(days))
+        hour_chunk['time_range'] = np.tile(np.arange(12, dtype=np.int8), len(days))
+        hour_chunk['year_pillar'] = pillar_indices(hour_batch, 'year')
+        hour_chunk['month_pillar'] = pillar_indices(hour_batch, 'month')
+        hour_chunk['hour_pillar'] = hour_pillar.ravel()
+        yield {column: hour_chunk[column] for column in HOUR_COLUMNS}
+
+
+def _render_chunk(chunk: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """인덱스 컬럼을 표시용 문자열로 변환 (CSV/행 dict용)"""
+    rendered = {}
+    for column, values in chunk.items():
+        if column == 'date':
+            rendered[column] = values.astype(str)
+        elif column == 'term':
+            rendered[column] = _TERM_ARRAY[values]
+        elif column == 'term_time':
+            rendered[column] = _format_minutes(values)
+        elif column in LUNAR_COLUMNS:
+            rendered[column] = np.where(chunk['lunar_year'] == 0, '', values.astype(object))
+        elif column == 'time_range':
+            rendered[column] = np.array(HOUR_RANGES, dtype=object)[values]
+        elif column == 'hour_branch':
+            rendered[column] = np.array(EARTHLY_BRANCHES_HANJA, dtype=object)[values]
+        elif column in DICTIONARY_COLUMNS:
+            rendered[column] = _JIAZI_ARRAY[values]
+        else:
+            rendered[column] = values
+    return rendered
+
+
+def iter_manse_rows(start: date, end: date, resolution: str = 'day',
+                    chunk_days: int = 1000) -> Iterator[Dict]:
+    """만세력을 한 행씩 dict로 생성 (표시용 문자열, 메모리는 청크 크기만큼)"""
+    for chunk in iter_manse_chunks(start, end, resolution, chunk_days):
+        rendered = _render_chunk(chunk)
+        columns = list(rendered)
+        for values in zip(*(rendered[c].tolist() for c in columns)):
+            yield dict(zip(columns, values))
+
+
+def write_csv(path: str, start: date, end: date, resolution: str = 'day', chunk_days: int = 1000) -> int:
+    """
+    만세력을 CSV로 저장 (UTF-8 BOM, 청크 단위 기록)
+
+    Returns:
+        기록한 행 수
+    """
+    rows = 0
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(DAY_COLUMNS if resolution == 'day' else HOUR_COLUMNS)
+        for chunk in iter_manse_chunks(start, end, resolution, chunk_days):
+            rendered = _render_chunk(chunk)
+            writer.writerows(zip(*(values.tolist() for values in rendered.values())))
+            rows += len(chunk['date'])
+    return rows
+
+
+def _arrow_column(column: str, values: np.ndarray, lunar_missing: np.ndarray):
+    """Parquet용 Arrow 배열 (60갑자/지지/절기는 사전 인코딩)"""
+    if column == 'time_range':
+        return pa.DictionaryArray.from_arrays(pa.array(values, type=pa.int8()), pa.array(HOUR_RANGES))
+    if column in DICTIONARY_COLUMNS:
+        dictionary = DICTIONARY_COLUMNS[column]
+        missing = values >= len(dictionary)
+        indices = pa.array(values.astype(np.int8), type=pa.int8(), mask=missing if missing.any() else None)
+        return pa.DictionaryArray.from_arrays(indices, pa.array(dictionary))
+    if column == 'date':
+        return pa.array(values, type=pa.date32())
+    if column == 'term_time':
+        return pa.array(values.astype(np.int16), type=pa.int16(), mask=values < 0)
+    mask = lunar_missing if column in LUNAR_COLUMNS and lunar_missing.any() else None
+    if column == 'lunar_leap':
+        return pa.array(values, type=pa.bool_(), mask=mask)
+    return pa.array(values.astype(np.int16), type=pa.int16(), mask=mask)
+
+
+def write_parquet(path: str, start: date, end: date, resolution: str = 'day', chunk_days: int = 1000) -> int:
+    """
+    만세력을 Parquet으로 저장 (청크당 row group 하나, 60갑자 컬럼은 사전 인코딩)
+
+    term_time은 하루 중 분(int16, 절기 없는 날은 null).
+
+    Returns:
+        기록한 행 수
+    """
+    if not PARQUET_AVAILABLE:
+        raise ImportError("Parquet 출력에는 pyarrow가 필요합니다 (pip install pyarrow)")
+    rows = 0
+    writer = None
+    try:
+        for chunk in iter_manse_chunks(start, end, resolution, chunk_days):
+            lunar_missing = chunk['lunar_year'] == 0
+            table = pa.table({column: _arrow_column(column, values, lunar_missing)
+                              for column, values in chunk.items()})
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression='zstd')
+            writer.write_table(table)
+            rows += table.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='만세력 표 내보내기 (CSV/Parquet)')
+    parser.add_argument('output', help='출력 파일 (.csv 또는 .parquet)')
+    parser.add_argument('--start', default='1900-01-01', help='시작 날짜 (YYYY-MM-DD)')
+    parser.add_argument('--end', default='2100-12-31', help='끝 날짜 (YYYY-MM-DD)')
+    parser.add_argument('--resolution', choices=['day', 'hour'], default='day')
+    parser.add_argument('--chunk-days', type=int, default=1000)
+    args = parser.parse_args()
+
+    start_date = datetime.strptime(args.start, '%Y-%m-%d').date()
+    end_date = datetime.strptime(args.end, '%Y-%m-%d').date()
+    write = write_parquet if args.output.endswith('.parquet') else write_csv
+    started = time.perf_counter()
+    count = write(args.output, start_date, end_date, args.resolution, args.chunk_days)
+    print(f"{args.output}: {count:,}행 ({time.perf_counter() - started:.1f}초)")
@@ -0,0 +1,252 @@
+"""
+사주 역산(逆算) 모듈
+Reverse Pillar Search Module
+
+주어진 사주(예: "己丑 丙子 丁未 戊申")가 나오는 생년월일시 구간을 모두 찾는다.
+calculate_four_pillars를 분 단위로 대입하지 않고,
+- 연주/월주: solar_terms 절기 배열에서 절(節) 사이 구간을 골라내고
+- 일주: 60일 주기 (일주가 없고 시주만 있으면 일간이 정해지는 5일 주기)
+- 시주: 시지의 2시간 구간 (子시는 같은 날짜의 00:00~01:30, 23:30~24:00)
+을 겹쳐서 구간 목록을 만든다. 일부 기둥만 지정한 패턴도 검색할 수 있다.
+"""
+from datetime import datetime
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from saju_calculator import (DAY_PILLAR_BASE_OFFSET, EARTHLY_BRANCHES_HANJA, HEAVENLY_STEMS_HANJA,
+                             ChartRecord, jiazi_index, month_stem_index)
+from solar_terms import (FIRST_TERM_YEAR, LAST_TERM_YEAR, from_minutes, get_term_minutes,
+                         term_year_and_month, to_minutes)
+
+# 기본 검색 범위 (만세력 조회표와 동일)
+DEFAULT_START = datetime(1900, 1, 1)
+DEFAULT_END = datetime(2101, 1, 1)
+
+# 한글 천간/지지 (한자와 같은 순서)
+STEMS_HANGUL = '갑을병정무기경신임계'
+BRANCHES_HANGUL = '자축인묘진사오미신유술해'
+
+# 비어 있는 기둥 표기
+WILDCARDS = ('?', '??', '*', '-', '_', '미상')
+
+PillarPattern = Union[str, Sequence[Optional[Union[str, int]]], Dict[str, Optional[Union[str, int]]]]
+
+
+class PillarWindow(NamedTuple):
+    """사주가 일치하는 출생 구간 [start, end)"""
+    start: datetime
+    end: datetime
+
+    @property
+    def minutes(self) -> int:
+        return int((self.end - self.start).total_seconds() // 60)
+
+
+def parse_pillar(text: Optional[Union[str, int]]) -> Optional[int]:
+    """
+    기둥 표기를 60갑자 인덱스로 변환
+
+    Args:
+        text: '丁未', '정미', '정(丁)미(未)', 60갑자 인덱스(int), 또는 와일드카드/None
+
+    Returns:
+        60갑자 인덱스 (0~59), 와일드카드면 None
+    """
+    if text is None:
+        return None
+    if isinstance(text, int):
+        if not 0 <= text < 60:
+            raise ValueError(f"60갑자 인덱스는 0~59 사이여야 합니다: {text}")
+        return text
+    text = text.strip()
+    if text in WILDCARDS:
+        return None
+    # '정(丁)미(未)' 형식은 한자만 사용
+    hanja = [c for c in text if c in HEAVENLY_STEMS_HANJA or c in EARTHLY_BRANCHES_HANJA]
+    chars = hanja if len(hanja) == 2 else list(text)
+    if len(chars) != 2:
+        raise ValueError(f"기둥 표기를 해석할 수 없습니다: {text}")
+    stem_char, branch_char = chars
+    if stem_char in HEAVENLY_STEMS_HANJA:
+        stem = HEAVENLY_STEMS_HANJA.index(stem_char)
+    elif stem_char in STEMS_HANGUL:
+        stem = STEMS_HANGUL.index(stem_char)
+    else:
+        raise ValueError(f"천간을 해석할 수 없습니다: {text}")
+    if branch_char in EARTHLY_BRANCHES_HANJA:
+        branch = EARTHLY_BRANCHES_HANJA.index(branch_char)
+    elif branch_char in BRANCHES_HANGUL:
+        branch = BRANCHES_HANGUL.index(branch_char)
+    else:
+        raise ValueError(f"지지를 해석할 수 없습니다: {text}")
+    if stem % 2 != branch % 2:
+        raise ValueError(f"60갑자에 없는 조합입니다 (천간/지지 음양 불일치): {text}")
+    return jiazi_index(stem, branch)
+
+
+def parse_pattern(pattern: PillarPattern) -> Dict[str, Optional[int]]:
+    """
+    사주 패턴을 기둥별 60갑자 인덱스 dict로 변환
+
+    Args:
+        pattern: "己丑 丙子 丁未 戊申" (연 월 일 시 순서, 3개면 시주 생략),
+                 "? 丙子 丁未 ?" 처럼 와일드카드 포함 문자열,
+                 [연, 월, 일, 시] 리스트, 또는 {'day': '丁未', 'month': '丙子'} dict
+
+    Returns:
+        {'year': int|None, 'month': int|None, 'day': int|None, 'hour': int|None}
+    """
+    if isinstance(pattern, dict):
+        unknown = set(pattern) - set(ChartRecord.POSITIONS)
+        if unknown:
+            raise ValueError(f"알 수 없는 기둥 이름: {sorted(unknown)}")
+        return {p: parse_pillar(pattern.get(p)) for p in ChartRecord.POSITIONS}
+    if isinstance(pattern, str):
+        pattern = pattern.replace(',', ' ').split()
+    pattern = list(pattern)
+    if not 1 <= len(pattern) <= 4:
+        raise ValueError(f"기둥은 1~4개여야 합니다: {pattern}")
+    pattern += [None] * (4 - len(pattern))
+    return {p: parse_pillar(v) for p, v in zip(ChartRecord.POSITIONS, pattern)}
+
+
+def _month_intervals(year: Optional[int], month: Optional[int],
+                     start: int, end: int) -> Iterator[Tuple[int, int]]:
+    """연주/월주 조건을 만족하는 절(節) 사이 구간 (분 오프셋, [a, b))"""
+    if year is None and month is None:
+        yield start, end
+        return
+    terms = get_term_minutes()
+    # 절(짝수 인덱스)부터 다음 절까지가 한 절월
+    for k in range(0, len(terms) - 2, 2):
+        a, b = terms[k], terms[k + 2]
+        if b <= start:
+            continue
+        if a >= end:
+            break
+        ganzhi_year, month_idx = term_year_and_month(k)
+        year60 = (ganzhi_year - 1984) % 60
+        if year is not None and year60 != year:
+            continue
+        if month is not None:
+            month60 = jiazi_index(month_stem_index(year60 % 10, month_idx), (month_idx + 2) % 12)
+            if month60 != month:
+                continue
+        yield max(a, start), min(b, end)
+
+
+def _hour_ranges(hour: Optional[int]) -> List[Tuple[int, int]]:
+    """시주 조건의 하루 중 분 구간 목록"""
+    if hour is None:
+        return [(0, 1440)]
+    branch = hour % 12
+    if branch == 0:
+        # 子시: 같은 날짜의 00:00~01:30과 23:30~24:00 (일주는 날짜 기준)
+        return [(0, 90), (1410, 1440)]
+    return [(branch * 120 - 30, branch * 120 + 90)]
+
+
+def _day_residue(day: Optional[int], hour: Optional[int]) -> Optional[Tuple[int, int]]:
+    """
+    일주/시주 조건에 맞는 날짜 번호(1900-01-01 기준 일수)의 (나머지, 주기)
+
+    일치하는 날이 없으면 None.
+    """
+    # 오자법: 시간 = (일간 % 5) * 2 + 시지 → 시주가 정해지면 일간 % 5가 정해진다
+    day_stem_mod5 = None
+    if hour is not None:
+        day_stem_mod5 = ((hour % 10 - hour % 12) % 10) // 2
+    if day is not None:
+        if day_stem_mod5 is not None and day % 5 != day_stem_mod5:
+            return None
+        return (day - DAY_PILLAR_BASE_OFFSET) % 60, 60
+    if day_stem_mod5 is not None:
+        # 일간 = (DAY_PILLAR_BASE_OFFSET + 날짜 번호) % 10, 기준 오프셋 10은 5의 배수
+        return day_stem_mod5, 5
+    return 0, 1
+
+
+def _merge(windows: Iterator[Tuple[int, int]]) -> Iterator[Tuple[int, int]]:
+    """맞닿은 구간 병합 (입력은 시작 순 정렬)"""
+    current = None
+    for a, b in windows:
+        if current is not None and a <= current[1]:
+            current = (current[0], max(current[1], b))
+            continue
+        if current is not None:
+            yield current
+        current = (a, b)
+    if current is not None:
+        yield current
+
+
+def iter_pillar_windows(pattern: PillarPattern, start: datetime = DEFAULT_START,
+                        end: datetime = DEFAULT_END) -> Iterator[Tuple[int, int]]:
+    """
+    사주 패턴이 일치하는 구간을 분 오프셋 (a, b)로 생성 (solar_terms 기준, 시간순)
+
+    pattern은 parse_pattern 형식 또는 그 결과 dict.
+    """
+    pillars = parse_pattern(pattern)
+    start_minute = max(to_minutes(start), get_term_minutes()[0])
+    end_minute = min(to_minutes(end), get_term_minutes()[-1])
+    residue = _day_residue(pillars['day'], pillars['hour'])
+    if residue is None or start_minute >= end_minute:
+        return
+    remainder, period = residue
+    hour_ranges = _hour_ranges(pillars['hour'])
+
+    def windows():
+        for a, b in _month_intervals(pillars['year'], pillars['month'], start_minute, end_minute):
+            if period == 1 and pillars['hour'] is None:
+                yield a, b
+                continue
+            first_day, last_day = a // 1440, (b - 1) // 1440
+            for day in range(first_day + (remainder - first_day) % period, last_day + 1, period):
+                base = day * 1440
+                for lo, hi in hour_ranges:
+                    lo, hi = max(base + lo, a), min(base + hi, b)
+                    if lo < hi:
+                        yield lo, hi
+
+    yield from _merge(windows())
+
+
+def find_pillar_windows(pattern: PillarPattern, start: datetime = DEFAULT_START,
+                        end: datetime = DEFAULT_END) -> List[PillarWindow]:
+    """
+    주어진 사주가 나오는 모든 출생 구간 찾기
+
+    Args:
+        pattern: 사주 패턴 (예: "己丑 丙子 丁未 戊申", "? 丙子 丁未", {'day': '丁未'})
+        start: 검색 시작 시각 (포함)
+        end: 검색 끝 시각 (미포함)
+
+    Returns:
+        PillarWindow(start, end) 리스트 (end 미포함, 시간순).
+        구간 안의 모든 분에서 calculate_chart_record의 기둥이 패턴과 일치한다.
+    """
+    return [PillarWindow(from_minutes(a), from_minutes(b))
+            for a, b in iter_pillar_windows(pattern, start, end)]
+
+
+def find_birth_dates(pattern: PillarPattern, start: datetime = DEFAULT_START,
+                     end: datetime = DEFAULT_END) -> List[datetime]:
+    """패턴이 일치하는 날짜 목록 (각 날짜의 첫 일치 시각, 날짜가 겹치는 구간은 하나로)"""
+    dates = []
+    for a, b in iter_pillar_windows(pattern, start, end):
+        for day in range(a // 1440, (b - 1) // 1440 + 1):
+            dates.append(from_minutes(max(a, day * 1440)))
+    return dates
+
+
+if __name__ == '__main__':
+    import time
+
+    print(f"=== 사주 역산 테스트 ({FIRST_TERM_YEAR}~{LAST_TERM_YEAR} 절기 기준) ===")
+    for text in ["己丑 丙子 丁未 戊申", "壬申 庚戌 癸酉 乙卯", "? 丙子 丁未", "? ? 甲子 甲子"]:
+        started = time.perf_counter()
+        found = find_pillar_windows(text)
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"\n{text}: {len(found)}개 구간 ({elapsed:.1f}ms)")
+        for window in found[:3]:
+            print(f"  {window.start:%Y-%m-%d %H:%M} ~ {window.end:%Y-%m-%d %H:%M}")
@@ -0,0 +1,220 @@
+"""
+사주팔자 일괄 계산 모듈 (NumPy)
+Vectorized Four Pillars Batch Calculator Module
+
+calculate_four_pillars를 행마다 호출하는 대신, 생년월일시 배열 전체를
+일수(day number) 산술과 조회표로 한 번에 계산한다.
+결과는 saju_calculator의 스칼라 계산과 정확히 일치한다.
+"""
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from branch_table import RELATIONS, combination_indices, get_count_table
+from hyungchunghap import relation_bits_batch
+from saju_calculator import DAY_PILLAR_BASE_DATE, DAY_PILLAR_BASE_OFFSET, ChartRecord, get_day_table
+from solar_terms import FIRST_TERM_YEAR, LICHUN_TERM, TERMS_PER_YEAR, get_term_minutes
+from time_correction import normalize_birth_times
+
+# 일주 기준일 (1900-01-01)
+_BASE_DAY = np.datetime64(DAY_PILLAR_BASE_DATE.date(), 'D')
+
+# 결과 컬럼 이름
+PILLAR_COLUMNS = ('year_stem', 'year_branch', 'month_stem', 'month_branch',
+                  'day_stem', 'day_branch', 'hour_stem', 'hour_branch')
+
+
+def _as_minutes(birth_dates) -> np.ndarray:
+    """datetime 리스트/배열/pandas Series를 datetime64[m] 배열로 변환"""
+    values = getattr(birth_dates, 'values', birth_dates)
+    return np.asarray(values, dtype='datetime64[m]')
+
+
+def _as_female_mask(genders, size: int) -> np.ndarray:
+    """성별 배열('남'/'여' 또는 bool: True=여)을 bool 마스크로 변환 ('남'이 아닌 문자열은 여, 대운 계산과 같은 규칙)"""
+    if genders is None:
+        return np.zeros(size, dtype=bool)
+    genders = np.asarray(getattr(genders, 'values', genders))
+    if genders.dtype == bool:
+        return genders
+    return genders != '남'
+
+
+def _year_and_month_index(minutes: np.ndarray):
+    """조회표를 쓸 수 없을 때: 절기 배열 이진 탐색으로 연주 60갑자와 절월 인덱스 계산"""
+    terms = np.asarray(get_term_minutes(), dtype=np.int64)
+    k = np.searchsorted(terms, minutes, side='right') - 1
+    if k.size and (k.min() < 0 or k.max() >= terms.shape[0] - 1):
+        raise ValueError("절기 계산 지원 범위를 벗어난 날짜가 포함되어 있습니다")
+    ganzhi_year = FIRST_TERM_YEAR + (k - LICHUN_TERM) // TERMS_PER_YEAR
+    month_index = (11 + k // 2) % 12
+    return (ganzhi_year - 1984) % 60, month_index
+
+
+def calculate_four_pillars_batch(birth_dates, genders=None, include_hour=None,
+                                 correct_time: bool = False, longitudes=None) -> Dict[str, np.ndarray]:
+    """
+    사주팔자 일괄 계산
+
+    Args:
+        birth_dates: 생년월일시 배열 (datetime 리스트, datetime64 배열, pandas Series)
+        genders: 성별 배열 ('남'/'여' 또는 True=여, None이면 전부 '남')
+        include_hour: 시주 포함 여부 bool 배열 (None이면 전부 포함)
+        correct_time: 당시 법정 시각(UTC+8:30, 서머타임) 보정 여부 (time_correction 참고)
+        longitudes: 출생지 경도 배열 또는 단일 값 (주면 경도 보정도 적용)
+
+    Returns:
+        컬럼별 numpy 배열 dict
+        - year/month/day/hour_stem: 천간 인덱스 (0~9, int8)
+        - year/month/day/hour_branch: 지지 인덱스 (0~11, int8)
+        - 시간 미상 행의 hour_stem/hour_branch는 -1
+        - month_index: 절월 인덱스 (寅월=0, int8)
+        - female, time_unknown: bool
+        - daeun_forward: 대운 순행 여부 (양남음녀)
+        - birth: 1900-01-01 기준 분 오프셋 (int64, ChartRecord.birth와 동일, 보정 후 시각)
+        - correction_minutes, time_correction: 보정량(분)과 CORRECTION_* 플래그
+          (correct_time 또는 longitudes를 준 경우에만)
+    """
+    minutes = _as_minutes(birth_dates)
+    size = minutes.shape[0]
+    female = _as_female_mask(genders, size)
+    if include_hour is None:
+        time_unknown = np.zeros(size, dtype=bool)
+    else:
+        time_unknown = ~np.asarray(getattr(include_hour, 'values', include_hour), dtype=bool)
+
+    # 출생 시각 보정 (사주 계산 전 단계)
+    correction = None
+    if correct_time or longitudes is not None:
+        correction = normalize_birth_times((minutes - _BASE_DAY).astype(np.int64), longitudes,
+                                           historical=correct_time)
+        minutes = _BASE_DAY + correction['minutes'].astype('timedelta64[m]')
+
+    # 일수와 하루 중 분
+    days = minutes.astype('datetime64[D]')
+    day_number = (days - _BASE_DAY).astype(np.int64)
+    minute_of_day = (minutes - days).astype(np.int64)
+
+    table = get_day_table()
+    offsets = None
+    if table is not None and size:
+        offsets = day_number - table.first_day
+        if offsets.min() < 0 or offsets.max() >= len(table):
+            offsets = None
+
+    if offsets is not None:
+        # 일주/연주/월주: mmap 조회표에서 한 번에 읽기 (절입일은 절입 시각 전후로 구분)
+        records = table.as_array()[offsets]
+        after_jeol = minute_of_day >= records['jeol_minute']
+        day_jiazi = records['day'].astype(np.int64)
+        year_jiazi = np.where(after_jeol, records['year_after'], records['year']).astype(np.int64)
+        month_jiazi = np.where(after_jeol, records['month_after'], records['month']).astype(np.int64)
+        month_index = (month_jiazi % 12 - 2) % 12
+        month_stem = month_jiazi % 10
+        month_branch = month_jiazi % 12
+        year_stem = year_jiazi % 10
+    else:
+        year_jiazi, month_index = _year_and_month_index(day_number * 1440 + minute_of_day)
+        year_stem = year_jiazi % 10
+
+        # 월주 (절기 + 오호법)
+        month_stem = ((year_stem % 5) * 2 + 2 + month_index) % 10
+        month_branch = (month_index + 2) % 12
+
+        # 일주
+        day_jiazi = (DAY_PILLAR_BASE_OFFSET + day_number) % 60
+    day_stem = day_jiazi % 10
+
+    # 시주 (30분 기준, 오자법)
+    hour_branch = ((minute_of_day + 30) % 1440) // 120
+    hour_stem = ((day_stem % 5) * 2 + hour_branch) % 10
+
+    # 대운 순행: 양남음녀
+    year_is_yang = (year_stem % 2) == 0
+
+    int8 = np.int8
+    result = {
+        'year_stem': year_stem.astype(int8),
+        'year_branch': (year_jiazi % 12).astype(int8),
+        'month_stem': month_stem.astype(int8),
+        'month_branch': month_branch.astype(int8),
+        'day_stem': day_stem.astype(int8),
+        'day_branch': (day_jiazi % 12).astype(int8),
+        'hour_stem': np.where(time_unknown, -1, hour_stem).astype(int8),
+        'hour_branch': np.where(time_unknown, -1, hour_branch).astype(int8),
+        'month_index': month_index.astype(int8),
+        'female': female,
+        'time_unknown': time_unknown,
+        'daeun_forward': year_is_yang != female,
+        'birth': day_number * 1440 + minute_of_day,
+    }
+    if correction is not None:
+        result['correction_minutes'] = correction['correction_minutes']
+        result['time_correction'] = correction['time_correction']
+    return result
+
+
+def pillar_indices(batch: Dict[str, np.ndarray], position: str) -> np.ndarray:
+    """배치 결과에서 특정 기둥의 60갑자 인덱스 배열 (시간 미상은 -1)"""
+    stem = batch[f'{position}_stem'].astype(np.int16)
+    branch = batch[f'{position}_branch'].astype(np.int16)
+    return np.where(stem < 0, -1, (6 * stem - 5 * branch) % 60).astype(np.int8)
+
+
+def branch_relations(batch: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    배치 결과의 지지 관계 개수 (branch_table 조회표에서 행마다 한 번 읽기)
+
+    Returns:
+        branch_table.RELATIONS 순서의 관계별(chung, yukhap, samhap, banhap, banghap, hyung, pa, hae,
+        wonjin, yeokma, dohwa) 개수 uint8 배열과 branch_combination (조회표 인덱스,
+        branch_table.RELATION_RECORDS[i]/SINSAL_RECORDS[i]로 정수 레코드 조회)
+    """
+    combinations = combination_indices(batch['year_branch'], batch['month_branch'],
+                                       batch['day_branch'], batch['hour_branch'])
+    counts = get_count_table()[combinations]
+    result = {name: counts[:, i] for i, name in enumerate(RELATIONS)}
+    result['branch_combination'] = combinations
+    return result
+
+
+def relation_bits(batch: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    배치 결과의 형충회합/파/해/천간 합충 비트셋 (hyungchunghap.relation_bits_batch)
+
+    비트 n은 hyungchunghap.RELATION_DEFS[n], JAHYUNG_BIT는 자형.
+    hyungchunghap.relation_counts로 관계 종류별 개수를 얻을 수 있다.
+    """
+    positions = ChartRecord.POSITIONS
+    return relation_bits_batch([batch[f'{p}_stem'] for p in positions],
+                               [batch[f'{p}_branch'] for p in positions])
+
+
+def daeun_start_ages(batch: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    배치 결과의 대운 시작 나이 (daeun.calculate_daeun_start_age와 같은 규칙, int8)
+
+    순행은 다음 절입까지, 역행은 직전 절입부터의 일수를 3일 = 1년으로 환산한다
+    (나머지 1일 이상은 올림, 1~20세로 제한).
+    """
+    terms = np.asarray(get_term_minutes(), dtype=np.int64)
+    minutes = batch['birth']
+    k = np.searchsorted(terms, minutes, side='right') - 1
+    if k.size and (k.min() < 0 or (k + 2 - k % 2).max() >= terms.shape[0]):
+        raise ValueError("절기 계산 지원 범위를 벗어난 날짜가 포함되어 있습니다")
+    previous_jeol = terms[k - k % 2]
+    next_jeol = terms[np.minimum(k + 2 - k % 2, terms.shape[0] - 1)]
+    days = np.where(batch['daeun_forward'], next_jeol - minutes, minutes - previous_jeol) // 1440
+    ages = days // 3 + (days % 3 >= 1)
+    return np.clip(ages, 1, 20).astype(np.int8)
+
+
+def to_chart_records(batch: Dict[str, np.ndarray], rows: Optional[slice] = None) -> List[ChartRecord]:
+    """배치 결과를 ChartRecord 리스트로 변환"""
+    rows = rows if rows is not None else slice(None)
+    columns = [pillar_indices(batch, p)[rows].tolist() for p in ChartRecord.POSITIONS]
+    flags = (batch['female'][rows].astype(np.int8) * ChartRecord.FLAG_FEMALE
+             + batch['time_unknown'][rows].astype(np.int8) * ChartRecord.FLAG_TIME_UNKNOWN).tolist()
+    births = batch['birth'][rows].tolist()
+    return [ChartRecord(y, m, d, h, f, b)
+            for y, m, d, h, f, b in zip(*columns, flags, births)]
@@ -2,22 +2,54 @@
 사주팔자 계산 모듈
 Four Pillars (Saju) Calculator Module
 """
-from datetime import datetime
-from typing import Dict, Tuple
-
-# 새로 추가된 모듈들 임포트
-try:
-    from sipsin import get_sipsin, get_branch_sipsin
-    from unsung_12 import get_twelve_unsung
-    from sinsal import (get_cheonul_gwiin, get_yeokma, get_dohwa, 
-                        get_gongmang, get_wonjin, get_yangin)
-    from napeum import get_napeum
-    from hyungchunghap import get_chung, get_yukhap, get_samhap, get_hyung
-    from daeun import get_daeun_direction, calculate_daeun_start_age, generate_daeun
-    from seun import get_current_seun_info, generate_seun
-    ENHANCED_MODULES_AVAILABLE = True
-except ImportError:
-    ENHANCED_MODULES_AVAILABLE = False
+from datetime import datetime, timedelta
+from time import perf_counter
+from typing import Dict, Optional, Sequence, Tuple
+
+import instrumentation
+from chart_cache import LRUTTLCache
+from solar_terms import locate_term, next_jeol, previous_jeol, term_year_and_month, to_minutes
+from time_correction import TimeCorrection, normalize_birth_time
+
+
+def _log_warning(message: str, *args, **kwargs):
+    """경고 로그 (logging 임포트 비용 약 10ms를 임포트 시간에서 빼려고 처음 실패할 때 가져온다)"""
+    import logging
+    logging.getLogger(__name__).warning(message, *args, **kwargs)
+
+
+# 추가 분석 모듈 (십신, 12운성, 신살, 납음, 형충합, 대운, 세운)
+# 임포트 비용을 첫 계산으로 미루기 위해 _load_enhanced_modules()에서 처음 쓸 때 가져온다.
+# 임포트에 실패하면 ENHANCED_MODULES_AVAILABLE이 False로 바뀌고 기본 네 기둥만 계산한다.
+ENHANCED_MODULES_AVAILABLE = True
+_enhanced_loaded = False
+
+
+def _load_enhanced_modules() -> bool:
+    """추가 분석 모듈을 임포트해 이 모듈 전역에 묶는다 (이미 했으면 바로 반환)"""
+    global ENHANCED_MODULES_AVAILABLE, _enhanced_loaded
+    global get_sipsin, get_branch_sipsin, get_twelve_unsung
+    global get_cheonul_gwiin, get_yeokma, get_dohwa, get_gongmang, get_wonjin, get_yangin
+    global get_napeum, find_relations, describe_relations
+    global get_daeun_direction, calculate_daeun_start_age, generate_daeun
+    global get_current_seun_info, generate_seun
+    if _enhanced_loaded:
+        return True
+    try:
+        from sipsin import get_sipsin, get_branch_sipsin
+        from unsung_12 import get_twelve_unsung
+        from sinsal import (get_cheonul_gwiin, get_yeokma, get_dohwa,
+                            get_gongmang, get_wonjin, get_yangin)
+        from napeum import get_napeum
+        from hyungchunghap import find_relations, describe_relations
+        from daeun import get_daeun_direction, calculate_daeun_start_age, generate_daeun
+        from seun import get_current_seun_info, generate_seun
+    except ImportError as e:
+        _log_warning("추가 분석 모듈을 불러올 수 없습니다: %s", e)
+        ENHANCED_MODULES_AVAILABLE = False
+        return False
+    _enhanced_loaded = True
+    return True
 
 # 천간 (Heavenly Stems) - 10개
 HEAVENLY_STEMS = ['갑(甲)', '을(乙)', '병(丙)', '정(丁)', '무(戊)', '기(己)', '경(庚)', '신(辛)', '임(壬)', '계(癸)']
@@ -57,6 +89,12 @@ BRANCH_YIN_YANG = {
     '신(申)': '양', '유(酉)': '음', '술(戌)': '양', '해(亥)': '음'
 }
 
+# 인덱스 기반 조회표 (천간 0~9, 지지 0~11 순서)
+STEM_ELEMENTS_BY_INDEX = [STEM_ELEMENTS[s] for s in HEAVENLY_STEMS]
+BRANCH_ELEMENTS_BY_INDEX = [BRANCH_ELEMENTS[b] for b in EARTHLY_BRANCHES]
+STEM_YIN_YANG_BY_INDEX = [STEM_YIN_YANG[s] for s in HEAVENLY_STEMS]
+BRANCH_YIN_YANG_BY_INDEX = [BRANCH_YIN_YANG[b] for b in EARTHLY_BRANCHES]
+
 # 월별 지지 (음력/절기 기준 근사)
 # 양력 기준 근사: 2월=寅, 3월=卯, ..., 12월=丑, 1월=寅
 # 하지만 절기를 고려하면 12월 중순 이전은 子월, 1월 입춘 이전은 丑월
@@ -81,56 +119,37 @@ SOLAR_TO_LUNAR_MONTH = {
 
 # 시간별 지지는 get_hour_pillar 함수 내부에서 계산됨 (30분 기준)
 
-# 입춘(立春) 날짜 데이터 (1900-2100년)
-# 입춘 전 출생자는 전년도 간지 사용
-# 출처: 천문학적 계산에 기초한 표준 만세력 데이터
-# 참고: 입춘은 태양이 황경 315도를 통과하는 시점으로, 매년 2월 3~5일 사이
-# 한국 표준시(KST) 기준으로 정오(12시) 전후로 발생하는 것으로 간주
-LICHUN_DATES = {
-    1900: (2, 5), 1901: (2, 4), 1902: (2, 5), 1903: (2, 5), 1904: (2, 5),
-    1905: (2, 4), 1906: (2, 5), 1907: (2, 5), 1908: (2, 5), 1909: (2, 4),
-    1910: (2, 5), 1911: (2, 5), 1912: (2, 5), 1913: (2, 4), 1914: (2, 5),
-    1915: (2, 5), 1916: (2, 5), 1917: (2, 4), 1918: (2, 5), 1919: (2, 5),
-    1920: (2, 5), 1921: (2, 4), 1922: (2, 4), 1923: (2, 5), 1924: (2, 5),
-    1925: (2, 4), 1926: (2, 4), 1927: (2, 5), 1928: (2, 5), 1929: (2, 4),
-    1930: (2, 4), 1931: (2, 5), 1932: (2, 5), 1933: (2, 4), 1934: (2, 4),
-    1935: (2, 5), 1936: (2, 5), 1937: (2, 4), 1938: (2, 4), 1939: (2, 5),
-    1940: (2, 5), 1941: (2, 4), 1942: (2, 4), 1943: (2, 5), 1944: (2, 5),
-    1945: (2, 4), 1946: (2, 4), 1947: (2, 4), 1948: (2, 5), 1949: (2, 4),
-    1950: (2, 4), 1951: (2, 4), 1952: (2, 5), 1953: (2, 4), 1954: (2, 4),
-    1955: (2, 4), 1956: (2, 5), 1957: (2, 4), 1958: (2, 4), 1959: (2, 4),
-    1960: (2, 5), 1961: (2, 4), 1962: (2, 4), 1963: (2, 4), 1964: (2, 5),
-    1965: (2, 4), 1966: (2, 4), 1967: (2, 4), 1968: (2, 5), 1969: (2, 4),
-    1970: (2, 4), 1971: (2, 4), 1972: (2, 5), 1973: (2, 4), 1974: (2, 4),
-    1975: (2, 4), 1976: (2, 5), 1977: (2, 4), 1978: (2, 4), 1979: (2, 4),
-    1980: (2, 5), 1981: (2, 4), 1982: (2, 4), 1983: (2, 4), 1984: (2, 5),
-    1985: (2, 4), 1986: (2, 4), 1987: (2, 4), 1988: (2, 5), 1989: (2, 4),
-    1990: (2, 4), 1991: (2, 4), 1992: (2, 4), 1993: (2, 4), 1994: (2, 4),
-    1995: (2, 4), 1996: (2, 4), 1997: (2, 4), 1998: (2, 4), 1999: (2, 4),
-    2000: (2, 4), 2001: (2, 4), 2002: (2, 4), 2003: (2, 4), 2004: (2, 4),
-    2005: (2, 4), 2006: (2, 4), 2007: (2, 4), 2008: (2, 4), 2009: (2, 4),
-    2010: (2, 4), 2011: (2, 4), 2012: (2, 4), 2013: (2, 4), 2014: (2, 4),
-    2015: (2, 4), 2016: (2, 4), 2017: (2, 3), 2018: (2, 4), 2019: (2, 4),
-    2020: (2, 4), 2021: (2, 3), 2022: (2, 4), 2023: (2, 4), 2024: (2, 4),
-    2025: (2, 3), 2026: (2, 4), 2027: (2, 4), 2028: (2, 4), 2029: (2, 3),
-    2030: (2, 4), 2031: (2, 4), 2032: (2, 4), 2033: (2, 3), 2034: (2, 4),
-    2035: (2, 4), 2036: (2, 4), 2037: (2, 3), 2038: (2, 4), 2039: (2, 4),
-    2040: (2, 4), 2041: (2, 3), 2042: (2, 4), 2043: (2, 4), 2044: (2, 4),
-    2045: (2, 3), 2046: (2, 4), 2047: (2, 4), 2048: (2, 4), 2049: (2, 3),
-    2050: (2, 4), 2051: (2, 3), 2052: (2, 4), 2053: (2, 3), 2054: (2, 4),
-    2055: (2, 4), 2056: (2, 4), 2057: (2, 3), 2058: (2, 4), 2059: (2, 4),
-    2060: (2, 4), 2061: (2, 3), 2062: (2, 4), 2063: (2, 4), 2064: (2, 4),
-    2065: (2, 3), 2066: (2, 4), 2067: (2, 4), 2068: (2, 4), 2069: (2, 3),
-    2070: (2, 4), 2071: (2, 4), 2072: (2, 4), 2073: (2, 3), 2074: (2, 4),
-    2075: (2, 4), 2076: (2, 4), 2077: (2, 3), 2078: (2, 4), 2079: (2, 4),
-    2080: (2, 4), 2081: (2, 3), 2082: (2, 4), 2083: (2, 4), 2084: (2, 4),
-    2085: (2, 3), 2086: (2, 4), 2087: (2, 4), 2088: (2, 4), 2089: (2, 3),
-    2090: (2, 4), 2091: (2, 4), 2092: (2, 4), 2093: (2, 3), 2094: (2, 4),
-    2095: (2, 4), 2096: (2, 4), 2097: (2, 3), 2098: (2, 4), 2099: (2, 4),
-    2100: (2, 4)
-}
+# 연주/월주의 절기 기준은 solar_terms 모듈의 절기 시각 배열 (분 단위, KST)
+# 시간 미상 등 시각이 없는 조회는 정오(12시) 기준
+
+
+# 일주 기준일: 1900년 1월 1일 = 甲戌일 (60갑자 index 10)
+DAY_PILLAR_BASE_DATE = datetime(1900, 1, 1)
+DAY_PILLAR_BASE_OFFSET = 10
+DAY_PILLAR_BASE_ORDINAL = DAY_PILLAR_BASE_DATE.toordinal()
+
+
+_DAY_TABLE_UNSET = object()
+_day_table = _DAY_TABLE_UNSET
+
+
+def get_day_table():
+    """
+    만세력 일별 조회표 (calendar_table.DayTable, 프로세스당 한 번 mmap)
+    
+    조회표를 쓸 수 없으면 None - 이 경우 아래 함수들로 직접 계산한다.
+    """
+    global _day_table
+    if _day_table is _DAY_TABLE_UNSET:
+        from calendar_table import load_table
+        _day_table = load_table()
+    return _day_table
 
 
+def jiazi_index(stem_idx: int, branch_idx: int) -> int:
+    """천간/지지 인덱스를 60갑자 인덱스(0=甲子 ~ 59=癸亥)로 변환"""
+    return (6 * stem_idx - 5 * branch_idx) % 60
+
 def get_stem_branch(year: int) -> Tuple[str, str]:
     """연도를 천간지지로 변환 (입춘 기준 고려 안 함, 단순 연도 변환)"""
     # 갑자년(1984)을 기준으로 계산
@@ -147,40 +166,48 @@ def get_stem_branch(year: int) -> Tuple[str, str]:
     return stem, branch
 
 
-def get_year_pillar(year: int, month: int, day: int) -> Tuple[str, str]:
+def get_year_pillar(year: int, month: int, day: int, hour: int = 12, minute: int = 0) -> Tuple[str, str]:
     """
     연주(年柱) 계산 - 입춘 기준 적용
     
-    입춘 전 출생자는 전년도 간지 사용
+    입춘 시각(분 단위) 전 출생자는 전년도 간지 사용
     
     Args:
         year: 양력 연도
         month: 양력 월
         day: 양력 일
+        hour, minute: 출생 시각 (기본값: 정오)
     
     Returns:
         (천간, 지지) tuple
     """
-    # 입춘 날짜 가져오기 (기본값: 2월 4일)
-    lichun_month, lichun_day = LICHUN_DATES.get(year, (2, 4))
-    
-    # 입춘 전이면 전년도 사용
-    if month < lichun_month or (month == lichun_month and day < lichun_day):
-        year_for_ganzhi = year - 1
-    else:
-        year_for_ganzhi = year
-    
-    # 간지 계산 (갑자년 = 1984년 기준)
-    base_year = 1984
-    diff = year_for_ganzhi - base_year
-    
-    stem_idx = diff % 10
-    branch_idx = diff % 12
+    jiazi_index = year_pillar_index(year, month, day, hour, minute)
+    return HEAVENLY_STEMS[jiazi_index % 10], EARTHLY_BRANCHES[jiazi_index % 12]
+
+
+def year_pillar_index(year: int, month: int, day: int, hour: int = 12, minute: int = 0) -> int:
+    """연주의 60갑자 인덱스 (0=甲子 ~ 59=癸亥, 입춘 기준)"""
+    minutes = to_minutes(datetime(year, month, day, hour, minute))
+    return term_pillars(minutes)[0]
+
+
+def term_pillars(minutes: int, terms: Sequence[int] = None) -> Tuple[int, int, int, int]:
+    """
+    절기 배열 이진 탐색으로 연주/월주 결정
     
-    stem = HEAVENLY_STEMS[stem_idx]
-    branch = EARTHLY_BRANCHES[branch_idx]
+    Args:
+        minutes: 1900-01-01 00:00 기준 분 오프셋 (KST)
+        terms: 절기 배열 (None이면 solar_terms 공유 배열)
     
-    return stem, branch
+    Returns:
+        (연주 60갑자, 월주 60갑자, 절월 인덱스, 절기 배열 인덱스)
+    """
+    k = locate_term(minutes, terms)
+    ganzhi_year, month_idx = term_year_and_month(k)
+    # 갑자년 = 1984년 기준
+    year_idx = (ganzhi_year - 1984) % 60
+    month_pillar = jiazi_index(month_stem_index(year_idx % 10, month_idx), (month_idx + 2) % 12)
+    return year_idx, month_pillar, month_idx, k
 
 
 def get_month_stem(year_stem: str, month_index: int) -> str:
@@ -233,94 +260,35 @@ def get_month_stem(year_stem: str, month_index: int) -> str:
     return HEAVENLY_STEMS[month_stem_idx]
 
 
-def get_month_pillar(year: int, month: int, day: int, year_stem: str) -> Tuple[str, str, int]:
+def month_stem_index(year_stem_idx: int, month_index: int) -> int:
+    """오호법 월간 인덱스 (get_month_stem의 정수 버전)"""
+    # 甲己→丙(2), 乙庚→戊(4), 丙辛→庚(6), 丁壬→壬(8), 戊癸→甲(0)
+    return ((year_stem_idx % 5) * 2 + 2 + month_index) % 10
+
+
+def get_month_pillar(year: int, month: int, day: int, year_stem: str,
+                     hour: int = 12, minute: int = 0) -> Tuple[str, str, int]:
     """
     월주(月柱) 계산 - 절기 기준 + 오호법
     
     24절기 중 12절기(입춘, 경칩, 청명, 입하, 망종, 소서, 입추, 백로, 한로, 입동, 대설, 소한)를 
     기준으로 월지를 결정하고, 년간에 따라 월간을 오호법으로 계산
     
-    절기 날짜는 근사치 사용 (정확한 계산은 천문역법 필요):
-    - 입춘(2/4경), 경칩(3/6경), 청명(4/5경), 입하(5/6경), 망종(6/6경), 소서(7/7경)
-    - 입추(8/8경), 백로(9/8경), 한로(10/8경), 입동(11/7경), 대설(12/7경), 소한(1/6경)
-    
-    참고: 실제 절기는 연도와 시간에 따라 ±1일 변동 가능하나, 
-          전통 명리학에서는 근사치를 관행적으로 사용
+    절입 시각은 solar_terms의 천문 계산값(분 단위, KST)을 사용하므로
+    절입일 당일 출생자도 시각에 따라 정확한 월이 결정된다.
     
     Args:
         year: 양력 연도
         month: 양력 월
         day: 양력 일
         year_stem: 년간 (오호법 계산용, 예: '경(庚)')
+        hour, minute: 출생 시각 (기본값: 정오)
     
     Returns:
         (천간, 지지, 절월인덱스) tuple
         절월인덱스는 0~11 (寅월=0, ..., 丑월=11)
     """
-    # 절기 기준 월 결정
-    # 각 월의 절입일을 기준으로 월지 결정 (근사치)
-    if month == 1:
-        if day < 6:
-            month_idx = 10  # 子월
-        else:
-            month_idx = 11  # 丑월
-    elif month == 2:
-        if day < 4:
-            month_idx = 11  # 丑월
-        else:
-            month_idx = 0   # 寅월
-    elif month == 3:
-        if day < 6:
-            month_idx = 0   # 寅월
-        else:
-            month_idx = 1   # 卯월
-    elif month == 4:
-        if day < 5:
-            month_idx = 1   # 卯월
-        else:
-            month_idx = 2   # 辰월
-    elif month == 5:
-        if day < 6:
-            month_idx = 2   # 辰월
-        else:
-            month_idx = 3   # 巳월
-    elif month == 6:
-        if day < 6:
-            month_idx = 3   # 巳월
-        else:
-            month_idx = 4   # 午월
-    elif month == 7:
-        if day < 7:
-            month_idx = 4   # 午월
-        else:
-            month_idx = 5   # 未월
-    elif month == 8:
-        if day < 8:
-            month_idx = 5   # 未월
-        else:
-            month_idx = 6   # 申월
-    elif month == 9:
-        if day < 8:
-            month_idx = 6   # 申월
-        else:
-            month_idx = 7   # 酉월
-    elif month == 10:
-        if day < 8:
-            month_idx = 7   # 酉월
-        else:
-            month_idx = 8   # 戌월
-    elif month == 11:
-        if day < 7:
-            month_idx = 8   # 戌월
-        else:
-            month_idx = 9   # 亥월
-    elif month == 12:
-        if day < 7:
-            month_idx = 9   # 亥월
-        else:
-            month_idx = 10  # 子월
-    else:
-        month_idx = 0  # 기본값
+    month_idx = solar_month_index(year, month, day, hour, minute)
     
     # 월지 결정
     branch = MONTH_BRANCHES[month_idx]
@@ -331,23 +299,21 @@ def get_month_pillar(year: int, month: int, day: int, year_stem: str) -> Tuple[s
     return stem, branch, month_idx
 
 
+def solar_month_index(year: int, month: int, day: int, hour: int = 12, minute: int = 0) -> int:
+    """절월 인덱스 (0~11, 寅월=0, ..., 丑월=11) - 절입 시각 기준"""
+    return term_pillars(to_minutes(datetime(year, month, day, hour, minute)))[2]
+
+
 def get_day_pillar(date: datetime) -> Tuple[str, str]:
     """일주 계산 (60갑자 순환)"""
-    # 기준일: 1900년 1월 1일 = 甲戌일 (60갑자 index 10)
-    # 이 계산은 양력 기준 근사치입니다
-    base_date = datetime(1900, 1, 1)
-    base_offset = 10  # 甲戌
-    
-    days_diff = (date - base_date).days
-    jiazi_index = (base_offset + days_diff) % 60
-    
-    stem_idx = jiazi_index % 10
-    branch_idx = jiazi_index % 12
-    
-    stem = HEAVENLY_STEMS[stem_idx]
-    branch = EARTHLY_BRANCHES[branch_idx]
-    
-    return stem, branch
+    jiazi_index = day_pillar_index(date)
+    return HEAVENLY_STEMS[jiazi_index % 10], EARTHLY_BRANCHES[jiazi_index % 12]
+
+
+def day_pillar_index(date: datetime) -> int:
+    """일주의 60갑자 인덱스 (양력 기준, DAY_PILLAR_BASE_DATE로부터의 일수)"""
+    days_diff = (date - DAY_PILLAR_BASE_DATE).days
+    return (DAY_PILLAR_BASE_OFFSET + days_diff) % 60
 
 
 def get_hour_pillar(date: datetime, day_stem: str) -> Tuple[str, str]:
@@ -355,18 +321,10 @@ def get_hour_pillar(date: datetime, day_stem: str) -> Tuple[str, str]:
     
     전통 사주학 기준: 각 시(時)는 해당 시간의 30분 전부터 시작
     예: 오시(午時) = 11:30 ~ 13:30
-    """
-    hour = date.hour
-    minute = date.minute
-    
-    # 시간을 분 단위로 변환 (자정 기준 적용)
-    # 예: 13시 5분 = 13 * 60 + 5 = 785분
-    total_minutes = hour * 60 + minute
-    
-    # 각 시는 30분 전부터 시작하므로 30분을 더함
-    adjusted_minutes = (total_minutes + 30) % 1440  # 1440분 = 24시간 (60분 * 24시간)
-    adjusted_hour = adjusted_minutes // 60
     
+    date는 UTC+9 표준시 기준 시각. 1954~1961년(UTC+8:30), 서머타임 시기,
+    출생지 경도 보정은 time_correction.normalize_birth_time으로 먼저 적용한다.
+    """
     # 시지(時支) 결정
     hour_branch_map = {
         0: '자(子)',   # 23:30 ~ 01:30
@@ -383,203 +341,567 @@ def get_hour_pillar(date: datetime, day_stem: str) -> Tuple[str, str]:
         11: '해(亥)'   # 21:30 ~ 23:30
     }
     
-    branch_index = adjusted_hour // 2  # 2시간 단위로 지지 결정 (자시=0, 축시=1, ...)
+    branch_index = hour_branch_index(date)
     branch = hour_branch_map.get(branch_index, '자(子)')
     
     # 시간(時干) 계산 (일간에 따라 달라짐)
-    day_stem_idx = HEAVENLY_STEMS.index(day_stem)
-    hour_stem_start = {0: 0, 1: 2, 2: 4, 3: 6, 4: 8, 5: 0, 6: 2, 7: 4, 8: 6, 9: 8}
-    
-    stem_idx = (hour_stem_start[day_stem_idx] + branch_index) % 10
-    stem = HEAVENLY_STEMS[stem_idx]
+    stem = HEAVENLY_STEMS[hour_stem_index(HEAVENLY_STEMS.index(day_stem), branch_index)]
     
     return stem, branch
 
 
-def calculate_four_pillars(birth_date: datetime, gender: str = '남', include_hour: bool = True) -> Dict:
-    """사주팔자 계산
+def hour_branch_index(date: datetime) -> int:
+    """시지 인덱스 (0=子시 ~ 11=亥시, 30분 기준)"""
+    # 시간을 분 단위로 변환 (자정 기준 적용)
+    # 예: 13시 5분 = 13 * 60 + 5 = 785분
+    total_minutes = date.hour * 60 + date.minute
+    
+    # 각 시는 30분 전부터 시작하므로 30분을 더함
+    adjusted_minutes = (total_minutes + 30) % 1440  # 1440분 = 24시간 (60분 * 24시간)
+    
+    # 2시간 단위로 지지 결정 (자시=0, 축시=1, ...)
+    return adjusted_minutes // 120
+
+
+def hour_stem_index(day_stem_idx: int, branch_index: int) -> int:
+    """오자법 시간 인덱스 (甲己일→甲子시, 乙庚일→丙子시, ...)"""
+    return ((day_stem_idx % 5) * 2 + branch_index) % 10
+
+
+class ChartRecord:
+    """
+    정수 코드 기반 사주 레코드
+    
+    네 기둥을 60갑자 인덱스(0=甲子 ~ 59=癸亥)로만 저장하고,
+    한글/한자 표기는 뷰(to_dict, pillar_label 등)를 요청할 때만 생성한다.
+    대량 분석용으로 차트당 수십 바이트만 사용한다.
+    
+    Attributes:
+        year, month, day: 연주/월주/일주 60갑자 인덱스
+        hour: 시주 60갑자 인덱스 (시간 미상이면 -1)
+        flags: FLAG_FEMALE | FLAG_TIME_UNKNOWN 비트 조합
+        birth: 생년월일시 (1900-01-01 00:00 기준 분 단위 오프셋)
+    """
+    __slots__ = ('year', 'month', 'day', 'hour', 'flags', 'birth')
+    
+    FLAG_FEMALE = 1
+    FLAG_TIME_UNKNOWN = 2
+    
+    POSITIONS = ('year', 'month', 'day', 'hour')
+    
+    def __init__(self, year: int, month: int, day: int, hour: int, flags: int = 0, birth: int = 0):
+        self.year = year
+        self.month = month
+        self.day = day
+        self.hour = hour
+        self.flags = flags
+        self.birth = birth
+    
+    def __repr__(self) -> str:
+        return f"ChartRecord({' '.join(self.hanja(p) for p in self.POSITIONS)}, flags={self.flags})"
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ChartRecord):
+            return NotImplemented
+        return self.astuple() == other.astuple()
+    
+    def __hash__(self) -> int:
+        return hash(self.astuple())
+    
+    def astuple(self) -> Tuple[int, int, int, int, int, int]:
+        return (self.year, self.month, self.day, self.hour, self.flags, self.birth)
+    
+    @property
+    def time_unknown(self) -> bool:
+        return bool(self.flags & self.FLAG_TIME_UNKNOWN)
+    
+    @property
+    def gender(self) -> str:
+        return '여' if self.flags & self.FLAG_FEMALE else '남'
+    
+    @property
+    def month_index(self) -> int:
+        """절월 인덱스 (寅월=0, ..., 丑월=11)"""
+        return (self.month - 2) % 12
+    
+    @property
+    def birth_date(self) -> datetime:
+        return DAY_PILLAR_BASE_DATE + timedelta(minutes=self.birth)
+    
+    def pillars(self) -> Tuple[int, ...]:
+        """존재하는 기둥의 60갑자 인덱스 (시간 미상이면 3개)"""
+        if self.hour < 0:
+            return (self.year, self.month, self.day)
+        return (self.year, self.month, self.day, self.hour)
+    
+    def stem_index(self, position: str) -> Optional[int]:
+        idx = getattr(self, position)
+        return None if idx < 0 else idx % 10
+    
+    def branch_index(self, position: str) -> Optional[int]:
+        idx = getattr(self, position)
+        return None if idx < 0 else idx % 12
+    
+    def stem(self, position: str) -> Optional[str]:
+        """천간 표기 (예: '정(丁)')"""
+        idx = getattr(self, position)
+        return None if idx < 0 else HEAVENLY_STEMS[idx % 10]
+    
+    def branch(self, position: str) -> Optional[str]:
+        """지지 표기 (예: '미(未)')"""
+        idx = getattr(self, position)
+        return None if idx < 0 else EARTHLY_BRANCHES[idx % 12]
+    
+    def pillar_label(self, position: str) -> str:
+        """기둥 표기 (예: '정(丁)미(未)', 시간 미상이면 '미상')"""
+        idx = getattr(self, position)
+        if idx < 0:
+            return "미상"
+        return f"{HEAVENLY_STEMS[idx % 10]}{EARTHLY_BRANCHES[idx % 12]}"
+    
+    def hanja(self, position: str) -> str:
+        """기둥 한자 표기 (예: '丁未', 시간 미상이면 '미상')"""
+        idx = getattr(self, position)
+        if idx < 0:
+            return "미상"
+        return f"{HEAVENLY_STEMS_HANJA[idx % 10]}{EARTHLY_BRANCHES_HANJA[idx % 12]}"
+    
+    def to_dict(self) -> Dict:
+        """calculate_four_pillars 기본 결과와 동일한 형식의 dict로 렌더링"""
+        pillars = self.pillars()
+        stems = [p % 10 for p in pillars]
+        branches = [p % 12 for p in pillars]
+        birth_date = self.birth_date
+        time_unknown = self.hour < 0
+        
+        result = {
+            'year_pillar': self.pillar_label('year'),
+            'month_pillar': self.pillar_label('month'),
+            'day_pillar': self.pillar_label('day'),
+            'hour_pillar': self.pillar_label('hour'),
+        }
+        for position in self.POSITIONS:
+            result[f'{position}_stem'] = self.stem(position)
+            result[f'{position}_branch'] = self.branch(position)
+        result.update({
+            'stems_elements': [STEM_ELEMENTS_BY_INDEX[s] for s in stems],
+            'branches_elements': [BRANCH_ELEMENTS_BY_INDEX[b] for b in branches],
+            'stems_yin_yang': [STEM_YIN_YANG_BY_INDEX[s] for s in stems],
+            'branches_yin_yang': [BRANCH_YIN_YANG_BY_INDEX[b] for b in branches],
+            'birth_date': birth_date.strftime('%Y년 %m월 %d일') if time_unknown else birth_date.strftime('%Y년 %m월 %d일 %H시'),
+            'year_hanja': self.hanja('year'),
+            'month_hanja': self.hanja('month'),
+            'day_hanja': self.hanja('day'),
+            'hour_hanja': self.hanja('hour'),
+            'time_unknown': time_unknown
+        })
+        return result
+
+
+def calculate_chart_record(birth_date: datetime, gender: str = '남', include_hour: bool = True) -> ChartRecord:
+    """
+    사주팔자를 정수 코드 레코드로 계산 (문자열 생성 없음)
+    
+    연주/월주는 입력 시각(분 단위)과 절입 시각을 비교해 결정한다.
+    시간 미상(include_hour=False)이면 입력된 시각을 그대로 쓰므로,
+    호출 측은 정오 등 기준 시각을 넣어야 한다 (app.py는 12:00).
     
     Args:
         birth_date: 생년월일시
         gender: 성별
         include_hour: 시주 포함 여부 (False면 3주만 계산)
-    """
-    year = birth_date.year
-    month = birth_date.month
-    day = birth_date.day
-    
-    # 연주 (입춘 기준)
-    year_stem, year_branch = get_year_pillar(year, month, day)
     
-    # 월주 (절기 + 오호법)
-    month_stem, month_branch, month_idx = get_month_pillar(year, month, day, year_stem)
-    
-    # 일주
-    day_stem, day_branch = get_day_pillar(birth_date)
+    Returns:
+        ChartRecord
+    """
+    day_number = birth_date.toordinal() - DAY_PILLAR_BASE_ORDINAL
+    table = get_day_table()
+    try:
+        # 일주/연주/월주는 조회표에서 읽기 (절입일이면 절입 시각 전후로 구분)
+        (day_idx, year_idx, month_pillar, _,
+         jeol_minute, year_after, month_after) = table.lookup(day_number)
+        if birth_date.hour * 60 + birth_date.minute >= jeol_minute:
+            year_idx, month_pillar = year_after, month_after
+    except (AttributeError, IndexError):
+        # 조회표가 없으면 절기 배열 이진 탐색으로 직접 계산 (연주: 입춘 기준, 월주: 절기 + 오호법)
+        year_idx, month_pillar, _, _ = term_pillars(to_minutes(birth_date))
+        
+        # 일주
+        day_idx = day_pillar_index(birth_date)
+    
+    # daeun.get_daeun_direction과 같은 규칙: '남'만 남자, 그 밖의 값은 모두 여자
+    flags = 0 if gender == '남' else ChartRecord.FLAG_FEMALE
     
     # 시주 (시간 모름 인 경우 건너뛰기)
     if include_hour:
-        hour_stem, hour_branch = get_hour_pillar(birth_date, day_stem)
-    else:
-        hour_stem, hour_branch = None, None
-    
-    # 오행 분석
-    if include_hour:
-        stems = [year_stem, month_stem, day_stem, hour_stem]
-        branches = [year_branch, month_branch, day_branch, hour_branch]
+        hour_branch = hour_branch_index(birth_date)
+        hour_idx = jiazi_index(hour_stem_index(day_idx % 10, hour_branch), hour_branch)
     else:
-        stems = [year_stem, month_stem, day_stem]
-        branches = [year_branch, month_branch, day_branch]
-    
-    stems_elements = [STEM_ELEMENTS[s] for s in stems]
-    branches_elements = [BRANCH_ELEMENTS[b] for b in branches]
+        hour_idx = -1
+        flags |= ChartRecord.FLAG_TIME_UNKNOWN
     
-    # 음양 분석
-    stems_yin_yang = [STEM_YIN_YANG[s] for s in stems]
-    branches_yin_yang = [BRANCH_YIN_YANG[b] for b in branches]
+    birth = (birth_date - DAY_PILLAR_BASE_DATE) // timedelta(minutes=1)
+    return ChartRecord(year_idx, month_pillar, day_idx, hour_idx, flags, birth)
+
+
+class SajuResult(dict):
+    """
+    calculate_four_pillars 결과 (dict)
     
-    # 한자 변환
-    year_hanja = f"{HEAVENLY_STEMS_HANJA[HEAVENLY_STEMS.index(year_stem)]}{EARTHLY_BRANCHES_HANJA[EARTHLY_BRANCHES.index(year_branch)]}"
-    month_hanja = f"{HEAVENLY_STEMS_HANJA[HEAVENLY_STEMS.index(month_stem)]}{EARTHLY_BRANCHES_HANJA[EARTHLY_BRANCHES.index(month_branch)]}"
-    day_hanja = f"{HEAVENLY_STEMS_HANJA[HEAVENLY_STEMS.index(day_stem)]}{EARTHLY_BRANCHES_HANJA[EARTHLY_BRANCHES.index(day_branch)]}"
-    if include_hour:
-        hour_hanja = f"{HEAVENLY_STEMS_HANJA[HEAVENLY_STEMS.index(hour_stem)]}{EARTHLY_BRANCHES_HANJA[EARTHLY_BRANCHES.index(hour_branch)]}"
-    else:
-        hour_hanja = "미상"
-    
-    result = {
-        'year_pillar': f"{year_stem}{year_branch}",
-        'month_pillar': f"{month_stem}{month_branch}",
-        'day_pillar': f"{day_stem}{day_branch}",
-        'hour_pillar': f"{hour_stem}{hour_branch}" if include_hour else "미상",
-        'year_stem': year_stem,
-        'year_branch': year_branch,
-        'month_stem': month_stem,
-        'month_branch': month_branch,
-        'day_stem': day_stem,
-        'day_branch': day_branch,
-        'hour_stem': hour_stem,
-        'hour_branch': hour_branch,
-        'stems_elements': stems_elements,
-        'branches_elements': branches_elements,
-        'stems_yin_yang': stems_yin_yang,
-        'branches_yin_yang': branches_yin_yang,
-        'birth_date': birth_date.strftime('%Y년 %m월 %d일 %H시') if include_hour else birth_date.strftime('%Y년 %m월 %d일'),
-        'year_hanja': year_hanja,
-        'month_hanja': month_hanja,
-        'day_hanja': day_hanja,
-        'hour_hanja': hour_hanja,
-        'time_unknown': not include_hour
-    }
+    네 기둥, 오행, 음양 등 기본 항목은 생성 시 채워지고, 추가 분석 항목
+    (십신, 12운성, 신살, 납음, 형충회합, 대운, 세운)은 처음 접근할 때 계산해
+    dict에 저장한다. result['daeun'], result.get('sipsin'), 'napeum' in result 등
+    기존 dict 사용법은 그대로 동작하며, keys()/items()/len() 등 전체를 보는
+    연산은 모든 항목을 먼저 계산한다.
+    """
     
-    # 추가 정보 계산 (모듈이 있을 때만)
-    if ENHANCED_MODULES_AVAILABLE:
+    SECTIONS = ('sipsin', 'unsung', 'sinsal', 'napeum', 'hyungchunghap', 'daeun', 'seun')
+    
+    def __init__(self, record: ChartRecord, birth_date: datetime, gender: str = '남',
+                 as_of: Optional[datetime] = None, correction: Optional[TimeCorrection] = None):
+        super().__init__(record.to_dict())
+        if correction is not None:
+            self['time_correction'] = correction.to_dict()
+        self.record = record
+        self.birth_datetime = birth_date
+        self.gender = gender
+        # 세운 기준 시점 (None이면 생성 시각)
+        self.as_of = as_of if as_of is not None else datetime.now()
+        self._failed_sections = set()
+        # 메모된 원본 (detached_copy로 만든 사본이면 추가 분석 항목을 원본에서 한 번만 계산해 복제해 온다)
+        self._source = None
+        # detached_copy용 기본 항목과 그중 list/dict 값의 키 (처음 사본을 만들 때 한 번 모은다)
+        self._base = None
+        self._mutable_keys = ()
+    
+    # ----- 지연 계산 -----
+    
+    def _compute_section(self, key: str) -> bool:
+        """추가 분석 항목 계산 후 저장 (계산할 수 없으면 False)"""
+        source = self._source
+        if source is not None:
+            if not (dict.__contains__(source, key) or source._compute_section(key)):
+                return False
+            dict.__setitem__(self, key, _clone(dict.__getitem__(source, key)))
+            return True
+        if not ENHANCED_MODULES_AVAILABLE or key in self._failed_sections:
+            return False
+        if not _enhanced_loaded and not _load_enhanced_modules():
+            return False
+        started = perf_counter() if instrumentation.ENABLED else None
         try:
-            # 한자만 추출
-            day_stem_hanja = HEAVENLY_STEMS_HANJA[HEAVENLY_STEMS.index(day_stem)]
-            year_stem_hanja = HEAVENLY_STEMS_HANJA[HEAVENLY_STEMS.index(year_stem)]
-            month_stem_hanja = HEAVENLY_STEMS_HANJA[HEAVENLY_STEMS.index(month_stem)]
-            
-            year_branch_hanja = EARTHLY_BRANCHES_HANJA[EARTHLY_BRANCHES.index(year_branch)]
-            month_branch_hanja = EARTHLY_BRANCHES_HANJA[EARTHLY_BRANCHES.index(month_branch)]
-            day_branch_hanja = EARTHLY_BRANCHES_HANJA[EARTHLY_BRANCHES.index(day_branch)]
-            
-            if include_hour:
-                hour_stem_hanja = HEAVENLY_STEMS_HANJA[HEAVENLY_STEMS.index(hour_stem)]
-                hour_branch_hanja = EARTHLY_BRANCHES_HANJA[EARTHLY_BRANCHES.index(hour_branch)]
-                branches_hanja = [year_branch_hanja, month_branch_hanja, day_branch_hanja, hour_branch_hanja]
-            else:
-                hour_stem_hanja = None
-                hour_branch_hanja = None
-                branches_hanja = [year_branch_hanja, month_branch_hanja, day_branch_hanja]
-            
-            # 십신
-            sipsin_data = {
-                'year_stem': get_sipsin(day_stem_hanja, year_stem_hanja),
-                'month_stem': get_sipsin(day_stem_hanja, month_stem_hanja),
-                'day_stem': '비견(比肩)',  # 일간 자신
-                'year_branch': get_branch_sipsin(day_stem_hanja, year_branch_hanja),
-                'month_branch': get_branch_sipsin(day_stem_hanja, month_branch_hanja),
-                'day_branch': get_branch_sipsin(day_stem_hanja, day_branch_hanja),
-            }
-            if include_hour:
-                sipsin_data['hour_stem'] = get_sipsin(day_stem_hanja, hour_stem_hanja)
-                sipsin_data['hour_branch'] = get_branch_sipsin(day_stem_hanja, hour_branch_hanja)
-            else:
-                sipsin_data['hour_stem'] = '미상'
-                sipsin_data['hour_branch'] = '미상'
-            result['sipsin'] = sipsin_data
-            
-            # 12운성
-            unsung_data = {
-                'year': get_twelve_unsung(day_stem_hanja, year_branch_hanja),
-                'month': get_twelve_unsung(day_stem_hanja, month_branch_hanja),
-                'day': get_twelve_unsung(day_stem_hanja, day_branch_hanja),
-            }
-            if include_hour:
-                unsung_data['hour'] = get_twelve_unsung(day_stem_hanja, hour_branch_hanja)
-            else:
-                unsung_data['hour'] = '미상'
-            result['unsung'] = unsung_data
-            
-            # 신살
-            result['sinsal'] = {
-                'cheonul': get_cheonul_gwiin(year_stem_hanja, month_stem_hanja, day_stem_hanja, branches_hanja),
-                'yeokma': get_yeokma(branches_hanja),
-                'dohwa': get_dohwa(branches_hanja),
-                'gongmang': get_gongmang(day_hanja, branches_hanja),
-                'wonjin': get_wonjin(branches_hanja),
-                'yangin': get_yangin(day_stem_hanja, branches_hanja)
-            }
-            
-            # 납음오행
-            napeum_data = {
-                'year': get_napeum(year_hanja),
-                'month': get_napeum(month_hanja),
-                'day': get_napeum(day_hanja),
-            }
-            if include_hour:
-                napeum_data['hour'] = get_napeum(hour_hanja)
-            else:
-                napeum_data['hour'] = '미상'
-            result['napeum'] = napeum_data
-            
-            # 형충회합
-            result['hyungchunghap'] = {
-                'chung': get_chung(branches_hanja),
-                'yukhap': get_yukhap(branches_hanja),
-                'samhap': get_samhap(branches_hanja),
-                'hyung': get_hyung(branches_hanja)
-            }
-            
-            # 대운
-            direction = get_daeun_direction(gender, year_stem_hanja)
-            # 절월 번호 (1~12, 寅월=1)
-            solar_month_num = month_idx + 1
-            daeun_age = calculate_daeun_start_age(birth_date, gender, year_stem_hanja, solar_month_num)
-            daeun_list = generate_daeun(year_stem, month_stem, year_branch, month_branch,
-                                       gender, daeun_age, day_stem, 10)
-            result['daeun'] = {
-                'direction': direction,
-                'start_age': daeun_age,
-                'list': daeun_list
-            }
-            
-            # 세운
-            current_year = datetime.now().year
-            current_seun = get_current_seun_info(year, current_year)
-            seun_list = generate_seun(year, current_year, 5, 10)
-            result['seun'] = {
-                'current': current_seun,
-                'list': seun_list
-            }
-            
+            value = getattr(self, f'_build_{key}')()
         except Exception as e:
-            print(f"추가 정보 계산 중 오류: {e}")
+            # 실패한 항목은 결과에서 빠지므로 계측 여부와 상관없이 세고 로그를 남긴다
+            _log_warning("추가 정보 계산 중 오류 (%s): %s", key, e, exc_info=True)
+            instrumentation.record_error(f'section.{key}', e)
+            self._failed_sections.add(key)
+            if started is not None:
+                instrumentation.record_stage(f'section.{key}', perf_counter() - started, e)
+            return False
+        if started is not None:
+            instrumentation.record_stage(f'section.{key}', perf_counter() - started)
+        dict.__setitem__(self, key, value)
+        return True
+    
+    def compute_all(self) -> 'SajuResult':
+        """아직 계산하지 않은 추가 분석 항목을 모두 계산"""
+        for key in self.SECTIONS:
+            if not dict.__contains__(self, key):
+                self._compute_section(key)
+        return self
+    
+    def __missing__(self, key):
+        if key in self.SECTIONS and self._compute_section(key):
+            return dict.__getitem__(self, key)
+        raise KeyError(key)
+    
+    def __contains__(self, key) -> bool:
+        if dict.__contains__(self, key):
+            return True
+        return key in self.SECTIONS and self._compute_section(key)
+    
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+    
+    def keys(self):
+        return dict.keys(self.compute_all())
+    
+    def values(self):
+        return dict.values(self.compute_all())
+    
+    def items(self):
+        return dict.items(self.compute_all())
+    
+    def __iter__(self):
+        return dict.__iter__(self.compute_all())
+    
+    def __len__(self) -> int:
+        return dict.__len__(self.compute_all())
+    
+    def __eq__(self, other) -> bool:
+        # 상대도 SajuResult면 아직 계산하지 않은 항목이 있을 수 있으므로 양쪽 다 계산한다
+        if isinstance(other, SajuResult):
+            other.compute_all()
+        return dict.__eq__(self.compute_all(), other)
+    
+    def __ne__(self, other) -> bool:
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+    
+    __hash__ = None
+    
+    def copy(self) -> Dict:
+        return dict(self.compute_all())
+    
+    def detached_copy(self) -> 'SajuResult':
+        """
+        이 결과와 값은 같지만 수정해도 서로 영향이 없는 SajuResult
+        
+        기본 항목은 바로 복제하고, 추가 분석 항목은 처음 접근할 때 이 결과에서(필요하면 여기서
+        한 번 계산해) 복제해 온다. 메모된 결과를 여러 호출자에게 나눠 줄 때 쓴다
+        (전체 deepcopy보다 훨씬 싸고, 추가 분석은 원본에서 한 번만 계산한다).
+        """
+        base = self._base
+        if base is None:
+            base = self._base = {key: value for key, value in dict.items(self) if key not in self.SECTIONS}
+            self._mutable_keys = tuple(key for key, value in base.items() if isinstance(value, (dict, list)))
+        clone = SajuResult.__new__(SajuResult)
+        dict.update(clone, base)
+        for key in self._mutable_keys:
+            dict.__setitem__(clone, key, _clone(base[key]))
+        clone.record = self.record
+        clone.birth_datetime = self.birth_datetime
+        clone.gender = self.gender
+        clone.as_of = self.as_of
+        clone._failed_sections = self._failed_sections
+        clone._source = self if self._source is None else self._source
+        clone._base = None
+        clone._mutable_keys = ()
+        return clone
+    
+    def __reduce__(self):
+        # pickle/copy 시에는 모든 항목을 계산한 일반 dict로 저장
+        return (dict, (dict(self.compute_all()),))
+    
+    # ----- 항목별 계산 -----
+    
+    def _hanja_chars(self, position: str) -> Tuple[Optional[str], Optional[str]]:
+        """기둥의 천간/지지 한자 (시간 미상이면 (None, None))"""
+        idx = getattr(self.record, position)
+        if idx < 0:
+            return None, None
+        return HEAVENLY_STEMS_HANJA[idx % 10], EARTHLY_BRANCHES_HANJA[idx % 12]
+    
+    def _branches_hanja(self):
+        positions = ChartRecord.POSITIONS if self.record.hour >= 0 else ChartRecord.POSITIONS[:3]
+        return [self._hanja_chars(p)[1] for p in positions]
+    
+    def _build_sipsin(self) -> Dict:
+        day_stem_hanja, day_branch_hanja = self._hanja_chars('day')
+        year_stem_hanja, year_branch_hanja = self._hanja_chars('year')
+        month_stem_hanja, month_branch_hanja = self._hanja_chars('month')
+        hour_stem_hanja, hour_branch_hanja = self._hanja_chars('hour')
+        sipsin_data = {
+            'year_stem': get_sipsin(day_stem_hanja, year_stem_hanja),
+            'month_stem': get_sipsin(day_stem_hanja, month_stem_hanja),
+            'day_stem': '비견(比肩)',  # 일간 자신
+            'year_branch': get_branch_sipsin(day_stem_hanja, year_branch_hanja),
+            'month_branch': get_branch_sipsin(day_stem_hanja, month_branch_hanja),
+            'day_branch': get_branch_sipsin(day_stem_hanja, day_branch_hanja),
+        }
+        if hour_stem_hanja is not None:
+            sipsin_data['hour_stem'] = get_sipsin(day_stem_hanja, hour_stem_hanja)
+            sipsin_data['hour_branch'] = get_branch_sipsin(day_stem_hanja, hour_branch_hanja)
+        else:
+            sipsin_data['hour_stem'] = '미상'
+            sipsin_data['hour_branch'] = '미상'
+        return sipsin_data
+    
+    def _build_unsung(self) -> Dict:
+        day_stem_hanja = self._hanja_chars('day')[0]
+        unsung_data = {}
+        for position in ChartRecord.POSITIONS:
+            branch_hanja = self._hanja_chars(position)[1]
+            unsung_data[position] = '미상' if branch_hanja is None else get_twelve_unsung(day_stem_hanja, branch_hanja)
+        return unsung_data
+    
+    def _build_sinsal(self) -> Dict:
+        year_stem_hanja = self._hanja_chars('year')[0]
+        month_stem_hanja = self._hanja_chars('month')[0]
+        day_stem_hanja = self._hanja_chars('day')[0]
+        branches_hanja = self._branches_hanja()
+        return {
+            'cheonul': get_cheonul_gwiin(year_stem_hanja, month_stem_hanja, day_stem_hanja, branches_hanja),
+            'yeokma': get_yeokma(branches_hanja),
+            'dohwa': get_dohwa(branches_hanja),
+            'gongmang': get_gongmang(self['day_hanja'], branches_hanja),
+            'wonjin': get_wonjin(branches_hanja),
+            'yangin': get_yangin(day_stem_hanja, branches_hanja)
+        }
+    
+    def _build_napeum(self) -> Dict:
+        napeum_data = {}
+        for position in ChartRecord.POSITIONS:
+            hanja = self[f'{position}_hanja']
+            napeum_data[position] = '미상' if hanja == '미상' else get_napeum(hanja)
+        return napeum_data
+    
+    def _build_hyungchunghap(self) -> Dict:
+        stems = [self._hanja_chars(p)[0] for p in ChartRecord.POSITIONS]
+        branches = self._branches_hanja()
+        # 종류별 표시 문자열(chung, yukhap, samhap, banhap, banghap, hyung, pa, hae, stem_hap, stem_chung)은
+        # 위치 쌍마다 한 항목(get_* 형식), 구조화 관계(hyungchunghap.Relation)는 같은 엔진의 합친 보기다
+        result = describe_relations(stems, branches)
+        result['relations'] = find_relations(stems, branches)
+        return result
+    
+    def _build_daeun(self) -> Dict:
+        year_stem_hanja = self._hanja_chars('year')[0]
+        direction = get_daeun_direction(self.gender, year_stem_hanja)
+        # 절월 번호 (1~12, 寅월=1)
+        solar_month_num = self.record.month_index + 1
+        daeun_age = calculate_daeun_start_age(self.birth_datetime, self.gender, year_stem_hanja, solar_month_num)
+        daeun_list = generate_daeun(self['year_stem'], self['month_stem'], self['year_branch'], self['month_branch'],
+                                    self.gender, daeun_age, self['day_stem'], 10)
+        return {
+            'direction': direction,
+            'start_age': daeun_age,
+            'list': daeun_list
+        }
+    
+    def _build_seun(self) -> Dict:
+        year = self.birth_datetime.year
+        current_year = self.as_of.year
+        return {
+            'current': get_current_seun_info(year, current_year),
+            'list': generate_seun(year, current_year, 5, 10)
+        }
+
+
+def _clone(value):
+    """결과 값 복제 (dict/list만 새로 만들고 문자열, 숫자, 튜플 등 불변 값은 공유)"""
+    if isinstance(value, dict):
+        return {key: _clone(item) if isinstance(item, (dict, list)) else item for key, item in value.items()}
+    if isinstance(value, list):
+        return [_clone(item) if isinstance(item, (dict, list)) else item for item in value]
+    return value
+
+
+# calculate_four_pillars 결과 메모 (정규화 키 → SajuResult, 호출자에게는 detached_copy를 준다)
+_chart_cache = LRUTTLCache(maxsize=4096, ttl=3600.0)
+
+
+def chart_cache_key(record: ChartRecord, birth_date: datetime, as_of: datetime) -> Tuple:
+    """
+    결과를 결정하는 값만 모은 정규화 키
+    
+    네 기둥(절입 시각 반영), 성별/시간 미상 플래그, 출생일과 표시용 시(時),
+    대운 시작 나이를 정하는 절입까지의 일수, 세운 기준 연도. 같은 날 같은 시간대의
+    출생은 분이 달라도 이 값이 같으면 결과가 같다.
     
+    대운 일수는 절기 배열만으로 구하므로 추가 분석 모듈(daeun 등)을 임포트하지 않는다.
+    """
+    display_hour = -1 if record.time_unknown else birth_date.hour
+    return (record.year, record.month, record.day, record.hour, record.flags,
+            birth_date.toordinal(), display_hour, _daeun_term_days(record, birth_date), as_of.year)
+
+
+def _daeun_term_days(record: ChartRecord, birth_date: datetime) -> int:
+    """
+    대운 시작 나이를 정하는 출생~절입 일수 (daeun.calculate_daeun_start_age와 같은 규칙)
+    
+    양남음녀는 다음 절입까지, 음남양녀는 직전 절입부터. 절기 지원 범위 밖이면 -1.
+    이 값과 출생일이 같으면 대운 시작 나이도 같다.
+    """
+    forward = (record.year % 2 == 0) != bool(record.flags & ChartRecord.FLAG_FEMALE)
+    minutes = to_minutes(birth_date)
+    try:
+        if forward:
+            return (next_jeol(minutes) - minutes) // 1440
+        return (minutes - previous_jeol(minutes)) // 1440
+    except ValueError:
+        return -1
+
+
+def calculate_four_pillars(birth_date: datetime, gender: str = '남', include_hour: bool = True,
+                           as_of: Optional[datetime] = None, use_cache: bool = True,
+                           correct_time: bool = False, longitude: Optional[float] = None) -> SajuResult:
+    """사주팔자 계산
+    
+    네 기둥과 오행/음양은 즉시 계산하고, 십신·12운성·신살·납음·형충회합·대운·세운은
+    결과에서 처음 접근할 때 계산한다 (SajuResult 참고).
+    
+    결과는 정규화 키(chart_cache_key)로 메모된다. 같은 키의 요청은 메모된 결과의
+    detached_copy를 받으므로 추가 분석 항목은 한 번만 계산되고, 반환값을 수정해도
+    다른 호출의 결과에는 영향이 없다.
+    
+    Args:
+        birth_date: 생년월일시
+        gender: 성별 ('남'이 아니면 여자로 계산, 대운 순역과 같은 규칙)
+        include_hour: 시주 포함 여부 (False면 3주만 계산)
+        as_of: 세운 기준 시점 (None이면 현재 시각)
+        use_cache: 메모 사용 여부
+        correct_time: 출생 당시 법정 시각(UTC+8:30, 서머타임) 보정 여부
+        longitude: 출생지 경도 (주면 경도 보정도 적용)
+    
+    보정을 요청하면 보정된 시각으로 계산하고, 결과의 'time_correction'에
+    입력 시각/보정 시각/보정량/적용된 보정 목록을 기록한다.
+    
+    instrumentation이 켜져 있으면 단계(time_correction, four_pillars, section.*)별
+    소요 시간과 예외, 메모 적중/실패 수를 기록한다.
+    """
+    started = perf_counter() if instrumentation.ENABLED else None
+    correction = None
+    if correct_time or longitude is not None:
+        correction = normalize_birth_time(birth_date, longitude, historical=correct_time)
+        birth_date = correction.corrected
+        if started is not None:
+            instrumentation.record_stage('time_correction', perf_counter() - started)
+            started = perf_counter()
+    record = calculate_chart_record(birth_date, gender, include_hour)
+    # 성별은 레코드 플래그로 한 번 정규화한다 ('M', 'female' 등도 대운 계산과 같은 규칙으로 '남'/'여')
+    gender = record.gender
+    if started is not None:
+        instrumentation.record_stage('four_pillars', perf_counter() - started)
+    if as_of is None:
+        as_of = datetime.now()
+    if not use_cache:
+        return SajuResult(record, birth_date, gender, as_of, correction)
+    key = chart_cache_key(record, birth_date, as_of)
+    if correction is not None:
+        # 같은 입력 시각이라도 경도가 다르면 보정량/보정 시각과 'time_correction'이 달라진다
+        key += (correction.original, correction.corrected, correction.minutes, correction.flags)
+    computed = []
+
+    def compute():
+        computed.append(True)
+        return SajuResult(record, birth_date, gender, as_of, correction)
+
+    # 같은 키를 동시에 요청해도 한 번만 계산한다 (조회와 저장을 캐시가 원자적으로 처리)
+    result = _chart_cache.get_or_compute(key, compute).detached_copy()
+    if started is not None:
+        instrumentation.count('chart_cache.miss' if computed else 'chart_cache.hit')
+    # 같은 키라도 분 단위 입력 시각은 다를 수 있으므로 호출자 자신의 시각/레코드를 돌려준다
+    result.record = record
+    result.birth_datetime = birth_date
+    result.as_of = as_of
     return result
 
 
+def get_chart_cache_stats() -> Dict:
+    """calculate_four_pillars 메모 통계 (hits, misses, evictions, expirations, size, maxsize, hit_rate)"""
+    return _chart_cache.stats_dict()
+
+
+def clear_chart_cache():
+    """calculate_four_pillars 메모 비우기"""
+    _chart_cache.clear()
+
+
 def get_element_count(result: Dict) -> Dict[str, int]:
     """오행 개수 계산"""
     all_elements = result['stems_elements'] + result['branches_elements']
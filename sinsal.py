@@ -1,6 +1,9 @@
 """
 신살(神殺) 계산 모듈
 Spirit Stars Calculator Module
+
+지지만 보는 원진/역마/도화는 branch_table 조회표의 정수 레코드에서 읽는다
+(scan_*은 직접 계산, 표준 지지 3~4개가 아닐 때 쓴다).
 """
 
 # 천을귀인 (天乙貴人) - 가장 길한 귀인
@@ -109,7 +112,7 @@ def get_cheonul_gwiin(year_stem: str, month_stem: str, day_stem: str, branches:
     return result
 
 
-def get_yeokma(branches: list) -> list:
+def scan_yeokma(branches: list) -> list:
     """
     역마살 확인 (년지 또는 일지 기준)
     
@@ -135,7 +138,7 @@ def get_yeokma(branches: list) -> list:
     return result
 
 
-def get_dohwa(branches: list) -> list:
+def scan_dohwa(branches: list) -> list:
     """
     도화살 확인 (년지 또는 일지 기준)
     
@@ -185,7 +188,7 @@ def get_gongmang(day_pillar: str, branches: list) -> list:
     return result
 
 
-def get_wonjin(branches: list) -> list:
+def scan_wonjin(branches: list) -> list:
     """
     원진 확인 (지지 간 충돌)
     
@@ -238,6 +241,78 @@ def get_yangin(day_stem: str, branches: list) -> list:
     return result
 
 
+_branch_table_module = None
+
+# 위치 비트 4개(0=년지 ~ 3=시지)의 값별 위치 이름
+_POSITION_NAMES = tuple(tuple(name for p, name in enumerate(['년지', '월지', '일지', '시지']) if bits >> p & 1)
+                        for bits in range(16))
+
+
+def _branch_table():
+    """branch_table 모듈 (branch_table이 임포트할 때 이 모듈의 표를 읽으므로 처음 쓸 때 임포트)"""
+    global _branch_table_module
+    if _branch_table_module is None:
+        import branch_table
+        _branch_table_module = branch_table
+    return _branch_table_module
+
+
+def _position_names(bits: int) -> list:
+    """위치 비트(0=년지 ~ 3=시지, 하위 4비트)를 위치 이름 리스트로"""
+    return list(_POSITION_NAMES[bits & 0xF])
+
+
+def get_wonjin(branches: list) -> list:
+    """
+    원진 확인 (결과 형식은 scan_wonjin과 같다)
+    
+    지지 관계 조회표(branch_table)에서 읽고, 표준 지지 3~4개가 아니면 직접 계산한다.
+    """
+    table = _branch_table()
+    indices = table.branch_indices(branches)
+    if indices is None:
+        return scan_wonjin(branches)
+    index = table.combination_index(indices)
+    wonjin = table.SINSAL_RECORDS[index] & table.WONJIN_BITS
+    if not wonjin:
+        return []
+    positions = ['년지', '월지', '일지', '시지']
+    branches_hanja = [extract_hanja(b) for b in branches]
+    result = []
+    for n, (i, j) in enumerate(table.POSITION_PAIRS):
+        if wonjin >> n & 1:
+            result.append(f"{positions[i]}-{positions[j]}({branches_hanja[i]}-{branches_hanja[j]})")
+    return result
+
+
+def get_yeokma(branches: list) -> list:
+    """
+    역마살 확인 (년지 기준)
+    
+    지지 관계 조회표(branch_table)에서 읽고, 표준 지지 3~4개가 아니면 직접 계산한다.
+    """
+    table = _branch_table()
+    indices = table.branch_indices(branches)
+    if indices is None:
+        return scan_yeokma(branches)
+    index = table.combination_index(indices)
+    return _position_names(table.SINSAL_RECORDS[index] >> table.YEOKMA_SHIFT)
+
+
+def get_dohwa(branches: list) -> list:
+    """
+    도화살 확인 (년지 기준)
+    
+    지지 관계 조회표(branch_table)에서 읽고, 표준 지지 3~4개가 아니면 직접 계산한다.
+    """
+    table = _branch_table()
+    indices = table.branch_indices(branches)
+    if indices is None:
+        return scan_dohwa(branches)
+    index = table.combination_index(indices)
+    return _position_names(table.SINSAL_RECORDS[index] >> table.DOHWA_SHIFT)
+
+
 if __name__ == '__main__':
     # 테스트: 2009-12-28생 己丑 丙子 丁未 戊申
     print("=== 신살 테스트: 2009-12-28생 ===")
@@ -0,0 +1,291 @@
+"""
+24절기(節氣) 계산 모듈
+Minute-precision Solar Term Engine
+
+태양의 시황경(apparent longitude)을 천문 계산(VSOP87 축약 급수, 장동, 광행차, ΔT)으로
+구하여, 지원 범위의 24절기 시각을 한국 표준시(KST, UTC+9) 분 단위로 미리 계산한다.
+절기 시각은 오름차순 배열 하나로 유지되며, 월주/연주/대운 계산은
+이 배열에 대한 이진 탐색(O(log n))으로 결정된다.
+
+이 배열이 saju_calculator, daeun, saju_batch가 공유하는 유일한 절기 기준이다.
+calendar_table 조회표 파일이 있으면 그 안의 절기 배열을 mmap으로 그대로 사용한다.
+
+시각 표현: 1900-01-01 00:00 (KST) 기준 분 단위 오프셋 (ChartRecord.birth와 같은 기준)
+"""
+import math
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from typing import Sequence, Tuple
+
+# 24절기 이름 (소한부터, 인덱스 짝수 = 절(節), 홀수 = 중기(中氣))
+TERM_NAMES = [
+    '소한(小寒)', '대한(大寒)', '입춘(立春)', '우수(雨水)', '경칩(驚蟄)', '춘분(春分)',
+    '청명(淸明)', '곡우(穀雨)', '입하(立夏)', '소만(小滿)', '망종(芒種)', '하지(夏至)',
+    '소서(小暑)', '대서(大暑)', '입추(立秋)', '처서(處暑)', '백로(白露)', '추분(秋分)',
+    '한로(寒露)', '상강(霜降)', '입동(立冬)', '소설(小雪)', '대설(大雪)', '동지(冬至)'
+]
+TERMS_PER_YEAR = 24
+LICHUN_TERM = 2  # 입춘 = 寅월 시작
+
+# 절기 배열 범위: FIRST_TERM_YEAR 소한 ~ LAST_TERM_YEAR 동지
+# (1900-2100 출생자의 이전/다음 절입까지 포함)
+FIRST_TERM_YEAR = 1899
+LAST_TERM_YEAR = 2101
+
+# 분 오프셋 기준 시각
+EPOCH = datetime(1900, 1, 1)
+KST_OFFSET_HOURS = 9
+_EPOCH_JD_UT = 2415020.5 - KST_OFFSET_HOURS / 24  # 1900-01-01 00:00 KST의 율리우스일(UT)
+
+# VSOP87 지구 일심황경 축약 급수 (Meeus, Astronomical Algorithms 표 32.A)
+# 각 항: (A, B, C) → A * cos(B + C * τ), 단위 1e-8 rad
+_L0 = (
+    (175347046, 0, 0), (3341656, 4.6692568, 6283.0758500), (34894, 4.62610, 12566.15170),
+    (3497, 2.7441, 5753.3849), (3418, 2.8289, 3.5231), (3136, 3.6277, 77713.7715),
+    (2676, 4.4181, 7860.4194), (2343, 6.1352, 3930.2097), (1324, 0.7425, 11506.7698),
+    (1273, 2.0371, 529.6910), (1199, 1.1096, 1577.3435), (990, 5.233, 5884.927),
+    (902, 2.045, 26.298), (857, 3.508, 398.149), (780, 1.179, 5223.694),
+    (753, 2.533, 5507.553), (505, 4.583, 18849.228), (492, 4.205, 775.523),
+    (357, 2.920, 0.067), (317, 5.849, 11790.629), (284, 1.899, 796.298),
+    (271, 0.315, 10977.079), (243, 0.345, 5486.778), (206, 4.806, 2544.314),
+    (205, 1.869, 5573.143), (202, 2.458, 6069.777), (156, 0.833, 213.299),
+    (132, 3.411, 2942.463), (126, 1.083, 20.775), (115, 0.645, 0.980),
+    (103, 0.636, 4694.003), (102, 0.976, 15720.839), (102, 4.267, 7.114),
+    (99, 6.21, 2146.17), (98, 0.68, 155.42), (86, 5.98, 161000.69),
+    (85, 1.30, 6275.96), (85, 3.67, 71430.70), (80, 1.81, 17260.15),
+    (79, 3.04, 12036.46), (75, 1.76, 5088.63), (74, 3.50, 3154.69),
+    (74, 4.68, 801.82), (70, 0.83, 9437.76), (62, 3.98, 8827.39),
+    (61, 1.82, 7084.90), (57, 2.78, 6286.60), (56, 4.39, 14143.50),
+    (56, 3.47, 6279.55), (52, 0.19, 12139.55), (52, 1.33, 1748.02),
+    (51, 0.28, 5856.48), (49, 0.49, 1194.45), (41, 5.37, 8429.24),
+    (41, 2.40, 19651.05), (39, 6.17, 10447.39), (37, 6.04, 10213.29),
+    (37, 2.57, 1059.38), (36, 1.71, 2352.87), (36, 1.78, 6812.77),
+    (33, 0.59, 17789.85), (30, 0.44, 83996.85), (30, 2.74, 1349.87),
+    (25, 3.16, 4690.48),
+)
+_L1 = (
+    (628331966747, 0, 0), (206059, 2.678235, 6283.075850), (4303, 2.6351, 12566.1517),
+    (425, 1.590, 3.523), (119, 5.796, 26.298), (109, 2.966, 1577.344),
+    (93, 2.59, 18849.23), (72, 1.14, 529.69), (68, 1.87, 398.15),
+    (67, 4.41, 5507.55), (59, 2.89, 5223.69), (56, 2.17, 155.42),
+    (45, 0.40, 796.30), (36, 0.47, 775.52), (29, 2.65, 7.11),
+    (21, 5.34, 0.98), (19, 1.85, 5486.78), (19, 4.97, 213.30),
+    (17, 2.99, 6275.96), (16, 0.03, 2544.31), (16, 1.43, 2146.17),
+    (15, 1.21, 10977.08), (12, 2.83, 1748.02), (12, 3.26, 5088.63),
+    (12, 5.27, 1194.45), (12, 2.08, 4694.00), (11, 0.77, 553.57),
+    (10, 1.30, 6286.60), (10, 4.24, 1349.87), (9, 2.70, 242.73),
+    (9, 5.64, 951.72), (8, 5.30, 2352.87), (6, 2.65, 9437.76),
+    (6, 4.67, 4690.48),
+)
+_L2 = (
+    (52919, 0, 0), (8720, 1.0721, 6283.0758), (309, 0.867, 12566.152),
+    (27, 0.05, 3.52), (16, 5.19, 26.30), (16, 3.68, 155.42),
+    (10, 0.76, 18849.23), (9, 2.06, 77713.77), (7, 0.83, 775.52),
+    (5, 4.66, 1577.34), (4, 1.03, 7.11), (4, 3.44, 5573.14),
+    (3, 5.14, 796.30), (3, 6.05, 5507.55), (3, 1.19, 242.73),
+    (3, 6.12, 529.69), (3, 0.31, 398.15), (3, 2.28, 553.57),
+    (2, 4.38, 5223.69), (2, 3.75, 0.98),
+)
+_L3 = (
+    (289, 5.844, 6283.076), (35, 0, 0), (17, 5.49, 12566.15),
+    (3, 5.20, 155.42), (1, 4.72, 3.52), (1, 5.30, 18849.23),
+    (1, 5.97, 242.73),
+)
+_L4 = ((114, 3.142, 0), (8, 4.13, 6283.08), (1, 3.84, 12566.15))
+_L5 = ((1, 3.14, 0),)
+_L_SERIES = (_L0, _L1, _L2, _L3, _L4, _L5)
+
+_ARCSEC = math.pi / (180 * 3600)
+_TROPICAL_YEAR = 365.24219
+
+
+def delta_t(year: float) -> float:
+    """ΔT = TT - UT (초), Espenak-Meeus 다항식 (1860-2150)"""
+    if year < 1900:
+        t = year - 1860
+        return 7.62 + 0.5737 * t - 0.251754 * t ** 2 + 0.01680668 * t ** 3 \
+            - 0.0004473624 * t ** 4 + t ** 5 / 233174
+    if year < 1920:
+        t = year - 1900
+        return -2.79 + 1.494119 * t - 0.0598939 * t ** 2 + 0.0061966 * t ** 3 - 0.000197 * t ** 4
+    if year < 1941:
+        t = year - 1920
+        return 21.20 + 0.84493 * t - 0.076100 * t ** 2 + 0.0020936 * t ** 3
+    if year < 1961:
+        t = year - 1950
+        return 29.07 + 0.407 * t - t ** 2 / 233 + t ** 3 / 2547
+    if year < 1986:
+        t = year - 1975
+        return 45.45 + 1.067 * t - t ** 2 / 260 - t ** 3 / 718
+    if year < 2005:
+        t = year - 2000
+        return 63.86 + 0.3345 * t - 0.060374 * t ** 2 + 0.0017275 * t ** 3 \
+            + 0.000651814 * t ** 4 + 0.00002373599 * t ** 5
+    if year < 2050:
+        t = year - 2000
+        return 62.92 + 0.32217 * t + 0.005589 * t ** 2
+    return -20 + 32 * ((year - 1820) / 100) ** 2 - 0.5628 * (2150 - year)
+
+
+def apparent_solar_longitude(jde: float) -> float:
+    """태양의 시황경 (도, 0~360) - jde: 역학시(TT) 율리우스일"""
+    tau = (jde - 2451545.0) / 365250.0
+    longitude = 0.0
+    power = 1.0
+    for series in _L_SERIES:
+        longitude += power * sum(a * math.cos(b + c * tau) for a, b, c in series)
+        power *= tau
+    longitude = longitude / 1e8 + math.pi  # 일심 지구 → 지심 태양
+
+    t = tau * 10  # 율리우스 세기
+    # 장동 (황경 방향, 주요 4항)
+    omega = math.radians(125.04452 - 1934.136261 * t)
+    sun_mean = math.radians(280.4665 + 36000.7698 * t)
+    moon_mean = math.radians(218.3165 + 481267.8813 * t)
+    nutation = (-17.20 * math.sin(omega) - 1.32 * math.sin(2 * sun_mean)
+                - 0.23 * math.sin(2 * moon_mean) + 0.21 * math.sin(2 * omega))
+    # 태양-지구 거리 (광행차 보정용)
+    anomaly = math.radians(357.52911 + 35999.05029 * t)
+    eccentricity = 0.016708634 - 0.000042037 * t
+    center = math.radians((1.914602 - 0.004817 * t) * math.sin(anomaly)
+                          + (0.019993 - 0.000101 * t) * math.sin(2 * anomaly)
+                          + 0.000289 * math.sin(3 * anomaly))
+    radius = 1.000001018 * (1 - eccentricity ** 2) / (1 + eccentricity * math.cos(anomaly + center))
+
+    # FK5 보정 + 장동 + 광행차
+    longitude += (-0.09033 + nutation - 20.4898 / radius) * _ARCSEC
+    return math.degrees(longitude) % 360.0
+
+
+def _term_longitude(term_index: int) -> float:
+    """절기 인덱스(0=소한)의 태양 황경"""
+    return (285.0 + 15.0 * term_index) % 360.0
+
+
+def compute_term_jd(year: int, term_index: int) -> float:
+    """
+    절기 시각 계산 (뉴턴 반복)
+
+    Args:
+        year: 양력 연도
+        term_index: 0=소한 ~ 23=동지
+
+    Returns:
+        절기 시각의 율리우스일 (UT)
+    """
+    target = _term_longitude(term_index)
+    # 초기값: 소한 ≈ 1월 5일, 이후 15도마다 약 15.2일
+    jde = 2451545.0 + (year - 2000) * _TROPICAL_YEAR + 4.5 + term_index * _TROPICAL_YEAR / 24
+    for _ in range(10):
+        diff = (target - apparent_solar_longitude(jde) + 180.0) % 360.0 - 180.0
+        jde += diff * _TROPICAL_YEAR / 360.0
+        if abs(diff) < 1e-7:
+            break
+    return jde - delta_t(year + term_index / 24) / 86400.0
+
+
+def compute_term_minutes(first_year: int = FIRST_TERM_YEAR, last_year: int = LAST_TERM_YEAR) -> list:
+    """
+    범위 내 모든 절기 시각 (KST, EPOCH 기준 분, 반올림) - 오름차순
+
+    인덱스 k의 절기: first_year + k // 24 년의 TERM_NAMES[k % 24]
+    """
+    minutes = []
+    for year in range(first_year, last_year + 1):
+        for term_index in range(TERMS_PER_YEAR):
+            jd = compute_term_jd(year, term_index)
+            minutes.append(int(round((jd - _EPOCH_JD_UT) * 1440)))
+    return minutes
+
+
+_term_table = None
+
+
+def get_term_minutes() -> Sequence[int]:
+    """
+    공유 절기 배열 (프로세스당 한 번 로드)
+
+    calendar_table 조회표가 있으면 mmap된 배열을 복사 없이 사용하고,
+    없으면 직접 계산한다.
+    """
+    global _term_table
+    if _term_table is None:
+        from saju_calculator import get_day_table
+        table = get_day_table()
+        if table is not None and table.term_first_year == FIRST_TERM_YEAR:
+            _term_table = table.terms
+        else:
+            _term_table = compute_term_minutes()
+    return _term_table
+
+
+def to_minutes(date: datetime) -> int:
+    """datetime(KST) → EPOCH 기준 분 오프셋"""
+    return (date - EPOCH) // timedelta(minutes=1)
+
+
+def from_minutes(minutes: int) -> datetime:
+    """EPOCH 기준 분 오프셋 → datetime(KST)"""
+    return EPOCH + timedelta(minutes=minutes)
+
+
+def locate_term(minutes: int, terms: Sequence[int] = None) -> int:
+    """
+    주어진 시각 직전(같은 분 포함)에 시작된 절기의 배열 인덱스 (O(log n))
+
+    Args:
+        minutes: EPOCH 기준 분 오프셋
+        terms: 절기 배열 (None이면 공유 배열 사용)
+
+    Raises:
+        ValueError: 지원 범위 밖의 시각
+    """
+    if terms is None:
+        terms = get_term_minutes()
+    k = bisect_right(terms, minutes) - 1
+    if k < 0 or k >= len(terms) - 1:
+        raise ValueError(f"절기 계산 지원 범위({FIRST_TERM_YEAR + 1}-{LAST_TERM_YEAR - 1}년)를 벗어났습니다: "
+                         f"{from_minutes(minutes)}")
+    return k
+
+
+def term_year_and_month(k: int) -> Tuple[int, int]:
+    """절기 배열 인덱스 → (입춘 기준 간지 연도, 절월 인덱스 寅월=0 ~ 丑월=11)"""
+    return FIRST_TERM_YEAR + (k - LICHUN_TERM) // TERMS_PER_YEAR, (11 + k // 2) % 12
+
+
+def solar_year_and_month(minutes: int) -> Tuple[int, int]:
+    """시각 → (입춘 기준 간지 연도, 절월 인덱스)"""
+    return term_year_and_month(locate_term(minutes))
+
+
+def previous_jeol(minutes: int) -> int:
+    """시각 직전(같은 분 포함)의 절입 시각 (분)"""
+    k = locate_term(minutes)
+    return get_term_minutes()[k - (k % 2)]
+
+
+def next_jeol(minutes: int) -> int:
+    """시각 이후의 다음 절입 시각 (분)"""
+    k = locate_term(minutes)
+    terms = get_term_minutes()
+    k_next = k + 2 - (k % 2)
+    if k_next >= len(terms):
+        raise ValueError(f"절기 계산 지원 범위를 벗어났습니다: {from_minutes(minutes)}")
+    return terms[k_next]
+
+
+def get_term_datetime(year: int, term_index: int) -> datetime:
+    """특정 연도 절기의 시각 (KST)"""
+    k = (year - FIRST_TERM_YEAR) * TERMS_PER_YEAR + term_index
+    terms = get_term_minutes()
+    if not 0 <= k < len(terms):
+        raise ValueError(f"절기 계산 지원 범위를 벗어났습니다: {year}년")
+    return from_minutes(terms[k])
+
+
+if __name__ == '__main__':
+    # 테스트: 2024년 절기 (KASI 발표: 입춘 2/4 17:27, 춘분 3/20 12:06, 하지 6/21 05:51, 동지 12/21 18:21)
+    print("=== 2024년 24절기 (KST) ===")
+    for i, name in enumerate(TERM_NAMES):
+        print(f"{name}: {get_term_datetime(2024, i):%Y-%m-%d %H:%M}")
@@ -0,0 +1,249 @@
+"""
+출생 시각 보정 모듈
+Historical Korean Standard Time / DST / Longitude Correction Module
+
+사주 계산은 "동경 135도 표준시(UTC+9) 시계 + 고정 30분 보정(동경 127.5도 기준)"을
+전제로 한다 (saju_calculator.hour_branch_index 참고). 하지만 한국의 법정 시각은
+여러 번 바뀌었다.
+
+    ~1908-03-31  지방평균시 (서울, UTC+8:28)
+    1908~1911    UTC+8:30
+    1912~1954    UTC+9
+    1954~1961    UTC+8:30
+    1961~        UTC+9
+    서머타임      1948~1951, 1955~1960, 1987~1988 (+1시간)
+
+출생증명서의 시각(당시 법정 시각)을 위 전제의 시각으로 바꾸는 전처리 단계.
+보정된 시각 = 입력 시각 - (당시 UTC 오프셋 - 9시간) + (출생지 경도 - 127.5) × 4분.
+어떤 보정이 적용됐는지는 비트 플래그로 함께 돌려준다.
+배열 단위 보정(normalize_birth_times)은 numpy로 벡터화한다.
+"""
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional
+
+from solar_terms import to_minutes
+
+# 사주 계산의 기준 시각 (UTC+9, 동경 127.5도 지방시에 30분 보정)
+STANDARD_OFFSET_MINUTES = 540
+REFERENCE_LONGITUDE = 127.5
+
+# 주요 출생지 경도
+CITY_LONGITUDES = {
+    '서울': 126.98, '인천': 126.71, '수원': 127.01, '춘천': 127.73, '강릉': 128.90,
+    '대전': 127.38, '청주': 127.49, '전주': 127.15, '광주': 126.85, '목포': 126.39,
+    '대구': 128.60, '포항': 129.37, '울산': 129.31, '부산': 129.08, '창원': 128.68,
+    '제주': 126.53,
+}
+
+# 보정 종류 (비트 플래그)
+CORRECTION_NONE = 0
+CORRECTION_STANDARD_TIME = 1  # UTC+9가 아닌 표준시 (UTC+8:30, 지방평균시)
+CORRECTION_DST = 2            # 서머타임
+CORRECTION_LONGITUDE = 4      # 출생지 경도
+
+CORRECTION_LABELS = {
+    CORRECTION_STANDARD_TIME: '표준시',
+    CORRECTION_DST: '서머타임',
+    CORRECTION_LONGITUDE: '경도',
+}
+
+# 법정 시각 구간표: (구간 시작 시각(해당 구간의 법정 시각), 표준시 오프셋(분), 서머타임(분))
+# 서머타임 시작 직후의 존재하지 않는 시각은 이전 구간으로, 종료 직후 두 번 나오는
+# 시각은 뒤 구간(표준시)으로 해석한다. (IANA tz database Asia/Seoul 기준)
+OFFSET_INTERVALS = (
+    (datetime(1, 1, 1), 508, 0),
+    (datetime(1908, 4, 1, 0, 3), 510, 0),
+    (datetime(1912, 1, 1, 0, 30), 540, 0),
+    (datetime(1948, 6, 1, 1, 0), 540, 60),
+    (datetime(1948, 9, 12, 23, 0), 540, 0),
+    (datetime(1949, 4, 3, 1, 0), 540, 60),
+    (datetime(1949, 9, 10, 23, 0), 540, 0),
+    (datetime(1950, 4, 1, 1, 0), 540, 60),
+    (datetime(1950, 9, 9, 23, 0), 540, 0),
+    (datetime(1951, 5, 6, 1, 0), 540, 60),
+    (datetime(1951, 9, 8, 23, 0), 540, 0),
+    (datetime(1954, 3, 20, 23, 30), 510, 0),
+    (datetime(1955, 5, 5, 1, 0), 510, 60),
+    (datetime(1955, 9, 8, 23, 0), 510, 0),
+    (datetime(1956, 5, 20, 1, 0), 510, 60),
+    (datetime(1956, 9, 29, 23, 0), 510, 0),
+    (datetime(1957, 5, 5, 1, 0), 510, 60),
+    (datetime(1957, 9, 21, 23, 0), 510, 0),
+    (datetime(1958, 5, 4, 1, 0), 510, 60),
+    (datetime(1958, 9, 20, 23, 0), 510, 0),
+    (datetime(1959, 5, 3, 1, 0), 510, 60),
+    (datetime(1959, 9, 19, 23, 0), 510, 0),
+    (datetime(1960, 5, 1, 1, 0), 510, 60),
+    (datetime(1960, 9, 17, 23, 0), 510, 0),
+    (datetime(1961, 8, 10, 0, 30), 540, 0),
+    (datetime(1987, 5, 10, 3, 0), 540, 60),
+    (datetime(1987, 10, 11, 2, 0), 540, 0),
+    (datetime(1988, 5, 8, 3, 0), 540, 60),
+    (datetime(1988, 10, 9, 2, 0), 540, 0),
+)
+
+# 구간 시작 시각 (solar_terms 기준 분 오프셋, 이진 탐색용)
+_INTERVAL_STARTS = [to_minutes(start) for start, _, _ in OFFSET_INTERVALS]
+
+
+class TimeCorrection(NamedTuple):
+    """출생 시각 보정 결과"""
+    corrected: datetime     # 사주 계산에 쓸 시각
+    original: datetime      # 입력 시각 (당시 법정 시각)
+    utc_offset: int         # 당시 표준시 오프셋 (분)
+    dst: int                # 서머타임 (분)
+    longitude: int          # 경도 보정 (분)
+    flags: int              # CORRECTION_* 비트 조합
+
+    @property
+    def minutes(self) -> int:
+        """총 보정량 (분, 보정 시각 - 입력 시각)"""
+        return STANDARD_OFFSET_MINUTES - self.utc_offset - self.dst + self.longitude
+
+    def labels(self) -> List[str]:
+        """적용된 보정 이름 목록 (예: ['서머타임'])"""
+        return correction_labels(self.flags)
+
+    def to_dict(self) -> Dict:
+        """결과 dict 표시용"""
+        return {
+            'original': self.original.strftime('%Y-%m-%d %H:%M'),
+            'corrected': self.corrected.strftime('%Y-%m-%d %H:%M'),
+            'minutes': self.minutes,
+            'applied': self.labels(),
+        }
+
+
+def correction_labels(flags: int) -> List[str]:
+    """보정 플래그를 이름 목록으로"""
+    return [label for flag, label in CORRECTION_LABELS.items() if flags & flag]
+
+
+def longitude_minutes(longitude: Optional[float]) -> int:
+    """출생지 경도 보정 (분, 기준 127.5도보다 동쪽이면 +), None이면 0"""
+    if longitude is None:
+        return 0
+    if not -180 <= longitude <= 180:
+        raise ValueError(f"경도는 -180~180 사이여야 합니다: {longitude}")
+    return round((longitude - REFERENCE_LONGITUDE) * 4)
+
+
+def get_utc_offset(civil: datetime):
+    """
+    당시 법정 시각의 (표준시 오프셋, 서머타임) 분 단위
+
+    Args:
+        civil: 출생 당시 법정 시각
+    """
+    _, offset, dst = OFFSET_INTERVALS[bisect_right(_INTERVAL_STARTS, to_minutes(civil)) - 1]
+    return offset, dst
+
+
+def _flags(offset: int, dst: int, longitude: int) -> int:
+    flags = CORRECTION_NONE
+    if offset != STANDARD_OFFSET_MINUTES:
+        flags |= CORRECTION_STANDARD_TIME
+    if dst:
+        flags |= CORRECTION_DST
+    if longitude:
+        flags |= CORRECTION_LONGITUDE
+    return flags
+
+
+def normalize_birth_time(civil: datetime, longitude: Optional[float] = None,
+                         historical: bool = True) -> TimeCorrection:
+    """
+    출생 시각(당시 법정 시각)을 사주 계산 기준 시각으로 보정
+
+    Args:
+        civil: 출생 당시 법정 시각 (출생증명서 시각)
+        longitude: 출생지 경도 (None이면 경도 보정 없음 = 기존 고정 30분 보정만)
+        historical: 당시 표준시/서머타임 보정 여부 (False면 경도 보정만)
+
+    Returns:
+        TimeCorrection (corrected를 calculate_four_pillars에 넘긴다)
+    """
+    offset, dst = get_utc_offset(civil) if historical else (STANDARD_OFFSET_MINUTES, 0)
+    lon = longitude_minutes(longitude)
+    corrected = civil + timedelta(minutes=STANDARD_OFFSET_MINUTES - offset - dst + lon)
+    return TimeCorrection(corrected, civil, offset, dst, lon, _flags(offset, dst, lon))
+
+
+_interval_arrays = None
+
+
+def _get_interval_arrays():
+    """벡터화 보정용 numpy 배열 (처음 사용할 때 한 번 생성)"""
+    global _interval_arrays
+    if _interval_arrays is None:
+        import numpy as np
+
+        _interval_arrays = (
+            np.array(_INTERVAL_STARTS, dtype=np.int64),
+            np.array([offset for _, offset, _ in OFFSET_INTERVALS], dtype=np.int64),
+            np.array([dst for _, _, dst in OFFSET_INTERVALS], dtype=np.int64),
+        )
+    return _interval_arrays
+
+
+def normalize_birth_times(minutes, longitudes=None, historical: bool = True) -> Dict[str, object]:
+    """
+    출생 시각 배열 일괄 보정 (numpy)
+
+    Args:
+        minutes: 출생 시각 배열 (1900-01-01 기준 분 오프셋, int64)
+        longitudes: 출생지 경도 배열 또는 단일 값 (None/NaN이면 경도 보정 없음)
+        historical: 당시 표준시/서머타임 보정 여부 (False면 경도 보정만)
+
+    Returns:
+        dict
+        - minutes: 보정된 분 오프셋 (int64)
+        - correction_minutes: 보정량 (분, int16)
+        - time_correction: CORRECTION_* 비트 조합 (uint8)
+    """
+    import numpy as np
+
+    starts, offsets, dsts = _get_interval_arrays()
+    minutes = np.asarray(minutes, dtype=np.int64)
+    if historical:
+        position = np.searchsorted(starts, minutes, side='right') - 1
+        offset, dst = offsets[position], dsts[position]
+    else:
+        offset, dst = np.full_like(minutes, STANDARD_OFFSET_MINUTES), np.zeros_like(minutes)
+
+    if longitudes is None:
+        lon = np.zeros_like(minutes)
+    else:
+        longitudes = np.broadcast_to(np.asarray(getattr(longitudes, 'values', longitudes), dtype=float),
+                                     minutes.shape)
+        if np.any(np.abs(longitudes) > 180):
+            raise ValueError("경도는 -180~180 사이여야 합니다")
+        # np.round는 짝수 반올림으로 round()와 같다
+        lon = np.where(np.isnan(longitudes), 0,
+                       np.round((longitudes - REFERENCE_LONGITUDE) * 4)).astype(np.int64)
+
+    correction = STANDARD_OFFSET_MINUTES - offset - dst + lon
+    flags = ((offset != STANDARD_OFFSET_MINUTES) * CORRECTION_STANDARD_TIME
+             | (dst != 0) * CORRECTION_DST
+             | (lon != 0) * CORRECTION_LONGITUDE)
+    return {
+        'minutes': minutes + correction,
+        'correction_minutes': correction.astype(np.int16),
+        'time_correction': flags.astype(np.uint8),
+    }
+
+
+if __name__ == '__main__':
+    print("=== 출생 시각 보정 테스트 ===")
+    samples = [
+        (datetime(1957, 7, 1, 13, 20), None),
+        (datetime(1958, 1, 15, 23, 40), None),
+        (datetime(1988, 8, 1, 1, 15), CITY_LONGITUDES['부산']),
+        (datetime(1992, 10, 24, 5, 30), CITY_LONGITUDES['서울']),
+    ]
+    for civil, longitude in samples:
+        result = normalize_birth_time(civil, longitude)
+        applied = ', '.join(result.labels()) or '없음'
+        print(f"{civil:%Y-%m-%d %H:%M} → {result.corrected:%Y-%m-%d %H:%M} "
+              f"({result.minutes:+d}분, 보정: {applied})")
@@ -0,0 +1,280 @@
+"""
+만세력 기준표 대조 도구
+Golden-Reference Verifier for the Batch Engine
+
+기준 만세력(예: 천을귀인 만세력 v5.05에서 내보낸 표)의 날짜·시각별 네 기둥과
+대운 시작 나이를 saju_batch 일괄 계산 결과와 전부 대조한다.
+1900~2100년 전 기간(약 73,000일 × 12시진)을 몇 초 안에 확인할 수 있다.
+
+기준표 CSV 컬럼:
+    date            YYYY-MM-DD (필수)
+    time            HH:MM, 또는 hour_branch (子~亥, 해당 시진의 시작 시각으로 계산)
+    gender          남/여 (선택, 기본 남 — 대운 시작 나이에만 영향)
+    year_pillar, month_pillar, day_pillar, hour_pillar
+                    '甲子', '갑자', '갑(甲)자(子)' 중 아무 형식 (있는 컬럼만 대조)
+    daeun_start     대운 시작 나이 (선택)
+
+manse_export.py의 시간 단위 CSV(--resolution hour)도 그대로 읽을 수 있다.
+
+불일치는 원인별로 분류한다.
+    lichun          입춘 절입일의 불일치 (연주 경계)
+    term_day        입춘 외 절(節) 절입일의 불일치 (월주 경계)
+    hour_boundary   시진 경계(XX:30) 근처 또는 23:30~00:30 자시 구간의 시주/일주 불일치
+    other           그 밖의 불일치
+
+    python verify_reference.py reference.csv
+    python verify_reference.py reference.csv --mismatches mismatches.csv
+    python verify_reference.py --write-reference reference.csv   # 스칼라 계산으로 기준표 생성
+"""
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict
+
+import numpy as np
+
+from pillar_search import parse_pillar
+from saju_batch import calculate_four_pillars_batch, daeun_start_ages, pillar_indices
+from saju_calculator import EARTHLY_BRANCHES_HANJA, HEAVENLY_STEMS_HANJA
+from solar_terms import LICHUN_TERM, TERMS_PER_YEAR, get_term_minutes
+
+PILLAR_FIELDS = ('year', 'month', 'day', 'hour')
+CATEGORIES = ('lichun', 'term_day', 'hour_boundary', 'other')
+
+# 시진 경계(XX:30)에서 이 분 수 이내면 hour_boundary로 분류
+HOUR_BOUNDARY_MINUTES = 5
+
+# 시진별 시작 시각 (manse_export와 같은 규칙: 子시는 그날 00:00)
+HOUR_STARTS = {branch: (0 if i == 0 else i * 120 - 30) for i, branch in enumerate(EARTHLY_BRANCHES_HANJA)}
+
+
+def _pillar_codes(values) -> np.ndarray:
+    """기둥 표기 컬럼을 60갑자 인덱스 배열로 (빈 값/해석 불가는 -1, 고유 값만 해석)"""
+    import pandas as pd
+
+    series = pd.Series(values, dtype='string').fillna('')
+    codes = {}
+    for text in series.unique():
+        try:
+            index = parse_pillar(text) if text.strip() else None
+        except ValueError:
+            index = None
+        codes[text] = -1 if index is None else index
+    return series.map(codes).to_numpy(dtype=np.int16)
+
+
+def load_reference(path: str) -> Dict[str, np.ndarray]:
+    """
+    기준표 CSV 읽기
+
+    Returns:
+        birth (datetime64[m]), female (bool), 기둥별 기준 60갑자 인덱스 (없으면 키 없음),
+        daeun_start (없으면 키 없음)
+    """
+    import pandas as pd
+
+    frame = pd.read_csv(path, dtype=str, keep_default_na=False, encoding='utf-8-sig')
+    if 'date' not in frame:
+        raise ValueError("기준표에 date 컬럼이 없습니다")
+    days = pd.to_datetime(frame['date'], format='%Y-%m-%d').to_numpy().astype('datetime64[D]')
+    if 'time' in frame:
+        # 고유 값만 해석 (시각 종류는 최대 1,440개)
+        times = {text: int(text[:2]) * 60 + int(text[3:5]) for text in frame['time'].unique()}
+        clock = frame['time'].map(times).to_numpy(dtype=np.int64).astype('timedelta64[m]')
+    elif 'hour_branch' in frame:
+        starts = frame['hour_branch'].map(HOUR_STARTS)
+        if starts.isna().any():
+            raise ValueError("hour_branch는 子~亥 중 하나여야 합니다")
+        clock = starts.to_numpy(dtype=np.int64).astype('timedelta64[m]')
+    else:
+        clock = np.zeros(len(frame), dtype='timedelta64[m]')
+
+    reference = {
+        'birth': days.astype('datetime64[m]') + clock,
+        'female': (frame['gender'].str.strip() == '여').to_numpy() if 'gender' in frame
+        else np.zeros(len(frame), dtype=bool),
+        'has_time': 'time' in frame or 'hour_branch' in frame,
+    }
+    for field in PILLAR_FIELDS:
+        column = f'{field}_pillar'
+        if column in frame:
+            reference[field] = _pillar_codes(frame[column])
+    if 'daeun_start' in frame:
+        ages = {text: int(text) if text.strip().isdigit() else -1 for text in frame['daeun_start'].unique()}
+        reference['daeun_start'] = frame['daeun_start'].map(ages).to_numpy(dtype=np.int16)
+    return reference
+
+
+def _day_terms(minutes: np.ndarray) -> np.ndarray:
+    """각 시각이 속한 날짜에 든 절(節)의 절기 번호 (0~23, 없으면 -1)"""
+    terms = np.asarray(get_term_minutes(), dtype=np.int64)
+    jeol = terms[::2]
+    day_start = minutes // 1440 * 1440
+    k = np.searchsorted(jeol, day_start, side='left')
+    k_safe = np.minimum(k, jeol.shape[0] - 1)
+    on_day = (k < jeol.shape[0]) & (jeol[k_safe] < day_start + 1440)
+    return np.where(on_day, (k_safe * 2) % TERMS_PER_YEAR, -1)
+
+
+def verify(reference: Dict[str, np.ndarray]) -> Dict:
+    """
+    기준표와 일괄 계산 결과 대조
+
+    Returns:
+        dict
+        - rows: 대조한 행 수
+        - mismatch: 행별 불일치 여부 (bool 배열)
+        - fields: 항목별 불일치 bool 배열 ('year'~'hour', 'daeun_start')
+        - category: 행별 분류 (CATEGORIES 인덱스, 일치하는 행은 -1)
+        - expected: 일괄 계산 결과 (항목별 배열)
+        - counts: {분류: {항목: 개수}}
+    """
+    births = reference['birth']
+    batch = calculate_four_pillars_batch(births, genders=reference['female'],
+                                         include_hour=np.full(births.shape[0], reference['has_time']))
+    expected = {field: pillar_indices(batch, field) for field in PILLAR_FIELDS}
+    if 'daeun_start' in reference:
+        expected['daeun_start'] = daeun_start_ages(batch)
+
+    fields = {name: reference[name] != expected[name] for name in expected if name in reference}
+    mismatch = np.zeros(births.shape[0], dtype=bool)
+    for wrong in fields.values():
+        mismatch |= wrong
+
+    minutes = batch['birth']
+    minute_of_day = minutes % 1440
+    day_term = _day_terms(minutes)
+    lichun = day_term == LICHUN_TERM
+    term_day = (day_term >= 0) & ~lichun
+    to_boundary = (minute_of_day + 30) % 120
+    near_boundary = (np.minimum(to_boundary, 120 - to_boundary) <= HOUR_BOUNDARY_MINUTES) | \
+                    (minute_of_day >= 1410) | (minute_of_day < 30)
+    zero = np.zeros_like(mismatch)
+    year_month = fields.get('year', zero) | fields.get('month', zero) | fields.get('daeun_start', zero)
+    day_hour = fields.get('day', zero) | fields.get('hour', zero)
+
+    category = np.full(births.shape[0], -1, dtype=np.int8)
+    category[mismatch] = CATEGORIES.index('other')
+    category[mismatch & day_hour & near_boundary] = CATEGORIES.index('hour_boundary')
+    category[mismatch & year_month & term_day] = CATEGORIES.index('term_day')
+    category[mismatch & year_month & lichun] = CATEGORIES.index('lichun')
+
+    counts = {}
+    for index, name in enumerate(CATEGORIES):
+        rows = category == index
+        counts[name] = {field: int((wrong & rows).sum()) for field, wrong in fields.items()}
+        counts[name]['rows'] = int(rows.sum())
+    return {'rows': int(births.shape[0]), 'mismatch': mismatch, 'fields': fields,
+            'category': category, 'expected': expected, 'counts': counts}
+
+
+def _jiazi(index: int) -> str:
+    return '' if index < 0 else HEAVENLY_STEMS_HANJA[index % 10] + EARTHLY_BRANCHES_HANJA[index % 12]
+
+
+def write_mismatches(path: str, reference: Dict[str, np.ndarray], report: Dict):
+    """불일치 행을 CSV로 저장 (기준값/계산값 나란히)"""
+    import csv
+
+    rows = np.flatnonzero(report['mismatch'])
+    fields = list(report['fields'])
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['datetime', 'category'] + [f'{name}_{side}' for name in fields for side in ('ref', 'calc')])
+        for i in rows.tolist():
+            values = []
+            for name in fields:
+                ref, calc = int(reference[name][i]), int(report['expected'][name][i])
+                if name in PILLAR_FIELDS:
+                    ref, calc = _jiazi(ref), _jiazi(calc)
+                values += [ref, calc]
+            birth = str(reference['birth'][i]).replace('T', ' ')
+            writer.writerow([birth, CATEGORIES[report['category'][i]]] + values)
+
+
+def print_report(reference: Dict[str, np.ndarray], report: Dict, examples: int = 5):
+    total = int(report['mismatch'].sum())
+    print(f"대조: {report['rows']:,}행, 항목 {', '.join(report['fields'])}")
+    if not total:
+        print("불일치 없음 ✓")
+        return
+    print(f"불일치: {total:,}행")
+    for index, name in enumerate(CATEGORIES):
+        counts = report['counts'][name]
+        if not counts['rows']:
+            continue
+        detail = ', '.join(f"{field} {n:,}" for field, n in counts.items() if field != 'rows' and n)
+        print(f"  {name:<14} {counts['rows']:>8,}행  ({detail})")
+        for i in np.flatnonzero(report['category'] == index)[:examples].tolist():
+            diffs = []
+            for field, wrong in report['fields'].items():
+                if wrong[i]:
+                    ref, calc = int(reference[field][i]), int(report['expected'][field][i])
+                    if field in PILLAR_FIELDS:
+                        ref, calc = _jiazi(ref) or '?', _jiazi(calc)
+                    diffs.append(f"{field} 기준 {ref} / 계산 {calc}")
+            print(f"      {str(reference['birth'][i]).replace('T', ' ')}  " + '; '.join(diffs))
+
+
+def write_reference(path: str, start: date, end: date):
+    """
+    스칼라 계산(calculate_chart_record, calculate_daeun_start_age)으로 기준표 생성
+
+    일괄 계산 엔진을 스칼라 경로와 대조하거나, 외부 기준표와 같은 형식의 예시를 만들 때 쓴다.
+    """
+    import csv
+
+    from daeun import calculate_daeun_start_age
+    from saju_calculator import calculate_chart_record
+
+    def jiazi(index):
+        return HEAVENLY_STEMS_HANJA[index % 10] + EARTHLY_BRANCHES_HANJA[index % 12]
+
+    rows = 0
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['date', 'time', 'gender', 'year_pillar', 'month_pillar', 'day_pillar',
+                         'hour_pillar', 'daeun_start'])
+        day = start
+        while day <= end:
+            for i, minute in enumerate(HOUR_STARTS.values()):
+                birth = datetime(day.year, day.month, day.day) + timedelta(minutes=minute)
+                gender = '여' if i % 2 else '남'
+                record = calculate_chart_record(birth, gender)
+                age = calculate_daeun_start_age(birth, gender, HEAVENLY_STEMS_HANJA[record.year % 10],
+                                                record.month_index + 1)
+                writer.writerow([day.isoformat(), f"{birth:%H:%M}", gender, jiazi(record.year), jiazi(record.month),
+                                 jiazi(record.day), jiazi(record.hour), age])
+                rows += 1
+            day += timedelta(days=1)
+    return rows
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='만세력 기준표와 일괄 계산 결과 대조')
+    parser.add_argument('reference', help='기준표 CSV')
+    parser.add_argument('--mismatches', help='불일치 행을 저장할 CSV')
+    parser.add_argument('--examples', type=int, default=5, help='분류별 예시 출력 수')
+    parser.add_argument('--write-reference', action='store_true',
+                        help='대조 대신 스칼라 계산으로 기준표를 생성')
+    parser.add_argument('--start', default='1900-01-01')
+    parser.add_argument('--end', default='2100-12-31')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.write_reference:
+        count = write_reference(args.reference, date.fromisoformat(args.start), date.fromisoformat(args.end))
+        print(f"기준표 생성: {args.reference} ({count:,}행, {time.perf_counter() - started:.1f}초)")
+        sys.exit(0)
+
+    reference = load_reference(args.reference)
+    loaded = time.perf_counter()
+    report = verify(reference)
+    print_report(reference, report, args.examples)
+    if args.mismatches and report['mismatch'].any():
+        write_mismatches(args.mismatches, reference, report)
+        print(f"불일치 목록: {args.mismatches}")
+    print(f"(읽기 {loaded - started:.1f}초, 대조 {time.perf_counter() - loaded:.1f}초)")
+    sys.exit(1 if report['mismatch'].any() else 0)